@@ -23,6 +23,9 @@ if not SECRET_KEY:
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24 * 7  # 7 days
 
+# Shared key for /admin endpoints (X-Admin-Key header); unset disables them
+ADMIN_API_KEY = os.getenv("ADMIN_API_KEY", "")
+
 # Password hashing
 pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
 
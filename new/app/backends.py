@@ -0,0 +1,160 @@
+"""
+Load balancing across Ollama instances.
+OLLAMA_BASE_URL may list several backends (comma-separated). Each LLM call
+goes to the healthy backend with the fewest outstanding requests; backends
+that keep failing are ejected for a cooldown and re-admitted afterwards
+(passive health checking, no probe traffic).
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from typing import Callable, Optional
+
+from app.tracing import percentile
+
+
+OLLAMA_BACKEND_MAX_FAILURES = int(os.getenv("OLLAMA_BACKEND_MAX_FAILURES", "3"))
+OLLAMA_BACKEND_EJECT_SECONDS = float(os.getenv("OLLAMA_BACKEND_EJECT_SECONDS", "30"))
+
+# Latency samples kept per backend for avg/p95
+LATENCY_WINDOW = 200
+
+
+def parse_base_urls(base_urls: str) -> list[str]:
+    """Split a comma-separated OLLAMA_BASE_URL into normalized URLs."""
+    urls = [url.strip().rstrip("/") for url in base_urls.split(",")]
+    urls = [url for url in urls if url]
+    if not urls:
+        raise ValueError("No Ollama backend URL configured")
+    return list(dict.fromkeys(urls))
+
+
+class Backend:
+    """One Ollama instance and its routing state."""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.in_flight = 0
+        self.requests = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.ejections = 0
+        self.ejected_until = 0.0
+        self.last_error: Optional[str] = None
+        self.latencies: deque = deque(maxlen=LATENCY_WINDOW)
+
+    def is_ejected(self, now: float) -> bool:
+        return now < self.ejected_until
+
+
+class BackendRouter:
+    """
+    Least-outstanding-requests routing with passive ejection.
+
+    Usage:
+        backend = router.acquire()
+        try:
+            ... call backend.url ...
+        finally:
+            router.release(backend, latency_ms, failed=...)
+
+    After max_failures consecutive failures a backend is skipped for
+    eject_seconds. Once the cooldown passes it receives traffic again; a
+    success clears its failure count, another failure ejects it again.
+    If every backend is ejected, routing fails open to the one whose
+    cooldown ends first rather than refusing the call.
+    """
+
+    def __init__(
+        self,
+        urls: list[str],
+        max_failures: int = OLLAMA_BACKEND_MAX_FAILURES,
+        eject_seconds: float = OLLAMA_BACKEND_EJECT_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if not urls:
+            raise ValueError("BackendRouter needs at least one backend")
+        self.backends = [Backend(url) for url in urls]
+        self.max_failures = max_failures
+        self.eject_seconds = eject_seconds
+        self._clock = clock
+        # Called from the event loop and from sync graph threads
+        self._lock = threading.Lock()
+
+    def acquire(self, exclude: frozenset = frozenset()) -> Backend:
+        """Pick a backend for one call and count it as outstanding."""
+        with self._lock:
+            now = self._clock()
+            candidates = [b for b in self.backends if b.url not in exclude] or self.backends
+            healthy = [b for b in candidates if not b.is_ejected(now)]
+            if healthy:
+                backend = min(healthy, key=lambda b: (b.in_flight, b.requests))
+            else:
+                backend = min(candidates, key=lambda b: b.ejected_until)
+            backend.in_flight += 1
+            backend.requests += 1
+            return backend
+
+    def release(self, backend: Backend, latency_ms: float, failed: bool = False, error: Optional[str] = None):
+        """Finish a call: record latency and update health."""
+        with self._lock:
+            backend.in_flight -= 1
+            if not failed:
+                backend.latencies.append(latency_ms)
+                if backend.consecutive_failures >= self.max_failures:
+                    print(f"[INFO] Ollama backend {backend.url} re-admitted")
+                backend.consecutive_failures = 0
+                return
+
+            backend.failures += 1
+            backend.consecutive_failures += 1
+            backend.last_error = error
+            if backend.consecutive_failures >= self.max_failures:
+                backend.ejected_until = self._clock() + self.eject_seconds
+                backend.ejections += 1
+                print(
+                    f"[WARNING] Ollama backend {backend.url} ejected for {self.eject_seconds:.0f}s "
+                    f"after {backend.consecutive_failures} consecutive failures: {error}"
+                )
+
+    def stats(self) -> dict:
+        """Per-backend health, in-flight counts and latency."""
+        with self._lock:
+            now = self._clock()
+            backends = []
+            for b in self.backends:
+                latencies = list(b.latencies)
+                p95 = percentile(latencies, 95)
+                backends.append({
+                    "url": b.url,
+                    "healthy": not b.is_ejected(now),
+                    "in_flight": b.in_flight,
+                    "requests": b.requests,
+                    "failures": b.failures,
+                    "consecutive_failures": b.consecutive_failures,
+                    "ejections": b.ejections,
+                    "avg_latency_ms": round(sum(latencies) / len(latencies), 2) if latencies else None,
+                    "p95_latency_ms": round(p95, 2) if p95 is not None else None,
+                    "last_error": b.last_error,
+                })
+            return {
+                "backends": backends,
+                "healthy": sum(1 for b in backends if b["healthy"]),
+                "max_failures": self.max_failures,
+                "eject_seconds": self.eject_seconds,
+            }
+
+
+_routers: dict[str, BackendRouter] = {}
+_routers_lock = threading.Lock()
+
+
+def get_backend_router(base_urls: str) -> BackendRouter:
+    """Process-wide router for a (comma-separated) OLLAMA_BASE_URL value."""
+    with _routers_lock:
+        router = _routers.get(base_urls)
+        if router is None:
+            router = _routers[base_urls] = BackendRouter(parse_base_urls(base_urls))
+        return router
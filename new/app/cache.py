@@ -0,0 +1,330 @@
+"""
+Content-addressed cache for generated workout plans.
+Identical requests (same normalized profile + injury list) reuse a previous
+SAFE result instead of re-running the draft → critique loop.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Optional
+
+
+PLAN_CACHE_BACKEND = os.getenv("PLAN_CACHE_BACKEND", "memory")  # memory | database | none
+PLAN_CACHE_TTL_SECONDS = int(os.getenv("PLAN_CACHE_TTL_SECONDS", "3600"))
+PLAN_CACHE_MAX_ENTRIES = int(os.getenv("PLAN_CACHE_MAX_ENTRIES", "512"))
+# How often the server lifespan deletes expired entries (0 = never)
+PLAN_CACHE_PURGE_INTERVAL_SECONDS = float(os.getenv("PLAN_CACHE_PURGE_INTERVAL_SECONDS", "600"))
+
+# Only one process purges the shared plan_cache table at a time
+PLAN_CACHE_PURGE_LOCK_ID = 720_415_003
+
+logger = logging.getLogger(__name__)
+
+# Bump when prompts or the graph change in a way that invalidates old plans
+PLAN_CACHE_VERSION = "v1"
+
+
+# ============= Key Normalization ============= #
+
+def _norm_text(value) -> str:
+    """Lowercase, trim and collapse whitespace so cosmetic edits hit the cache."""
+    if value is None:
+        return ""
+    return " ".join(str(value).split()).lower()
+
+
+def normalize_profile(user_profile: dict) -> dict:
+    """Canonical form of a UserProfile dict (order-insensitive equipment)."""
+    equipment = user_profile.get("equipment_available") or []
+    return {
+        "goals": _norm_text(user_profile.get("goals")),
+        "fitness_level": _norm_text(user_profile.get("fitness_level")),
+        "weight": user_profile.get("weight"),
+        "age": user_profile.get("age"),
+        "equipment_available": sorted({_norm_text(e) for e in equipment if _norm_text(e)}),
+    }
+
+
+def normalize_injuries(injury_history: list[dict]) -> list[dict]:
+    """Canonical, sorted form of an InjuryHistoryItem list."""
+    items = [
+        {
+            "injury_type": _norm_text(inj.get("injury_type")),
+            "injury_date": str(inj.get("injury_date") or ""),
+            "severity": _norm_text(inj.get("severity")),
+            "notes": _norm_text(inj.get("notes")),
+            "is_active": inj.get("is_active") is not False,
+        }
+        for inj in injury_history or []
+    ]
+    return sorted(items, key=lambda i: (i["injury_type"], i["injury_date"], i["severity"], i["notes"]))
+
+
+def plan_cache_key(user_profile: dict, injury_history: list[dict], namespace: str = "") -> str:
+    """
+    Hash the normalized request into a stable cache key.
+
+    Args:
+        user_profile: UserProfile as a dict
+        injury_history: List of InjuryHistoryItem dicts
+        namespace: Separates results per model/provider (e.g. "ollama:mistral")
+    """
+    canonical = json.dumps(
+        {"profile": normalize_profile(user_profile), "injuries": normalize_injuries(injury_history)},
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str,
+    )
+    digest = hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+    return f"plan:{PLAN_CACHE_VERSION}:{namespace}:{digest}"
+
+
+# ============= Backends ============= #
+
+class CacheBackend(ABC):
+    """Interface for plan cache storage. Values are JSON-serializable dicts."""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[dict]:
+        """The unexpired value for key, or None."""
+
+    @abstractmethod
+    def set(self, key: str, value: dict) -> None:
+        """Store value under key for the backend's TTL."""
+
+    @abstractmethod
+    def purge_expired(self) -> int:
+        """Delete expired entries. Returns the number removed."""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Delete every entry."""
+
+    @abstractmethod
+    def size(self) -> int:
+        """Number of stored entries, including expired ones not yet purged."""
+
+
+class InMemoryCacheBackend(CacheBackend):
+    """Per-process LRU cache with TTL expiry."""
+
+    def __init__(self, max_entries: int = PLAN_CACHE_MAX_ENTRIES, ttl_seconds: int = PLAN_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._data: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: dict) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def purge_expired(self) -> int:
+        with self._lock:
+            now = time.monotonic()
+            expired = [key for key, (expires_at, _) in self._data.items() if expires_at < now]
+            for key in expired:
+                del self._data[key]
+            return len(expired)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def size(self) -> int:
+        return len(self._data)
+
+
+class DatabaseCacheBackend(CacheBackend):
+    """
+    Shared cache in the plan_cache PostgreSQL table.
+
+    Lets every API worker and replica reuse the same results. Expired rows
+    are ignored on read and removed by purge_expired(), which the server
+    lifespan runs every PLAN_CACHE_PURGE_INTERVAL_SECONDS.
+    """
+
+    def __init__(self, ttl_seconds: int = PLAN_CACHE_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+
+    def get(self, key: str) -> Optional[dict]:
+        from app.database import SessionLocal
+        from app.models import PlanCacheEntry
+
+        db = SessionLocal()
+        try:
+            entry = db.get(PlanCacheEntry, key)
+            if entry is None or entry.expires_at < datetime.utcnow():
+                return None
+            return entry.value
+        finally:
+            db.close()
+
+    def set(self, key: str, value: dict) -> None:
+        from app.database import get_db_context
+        from app.models import PlanCacheEntry
+
+        with get_db_context() as db:
+            db.merge(PlanCacheEntry(
+                cache_key=key,
+                value=value,
+                expires_at=datetime.utcnow() + timedelta(seconds=self.ttl_seconds),
+            ))
+
+    def purge_expired(self) -> int:
+        """
+        Delete expired rows. Returns the number removed; 0 while another
+        process holds PLAN_CACHE_PURGE_LOCK_ID (it is purging the same rows).
+        """
+        from app.database import engine, get_db_context
+        from app.migrations import try_advisory_lock
+        from app.models import PlanCacheEntry
+
+        with try_advisory_lock(engine, PLAN_CACHE_PURGE_LOCK_ID) as locked:
+            if not locked:
+                return 0
+            with get_db_context() as db:
+                return db.query(PlanCacheEntry).filter(
+                    PlanCacheEntry.expires_at < datetime.utcnow()
+                ).delete(synchronize_session=False)
+
+    def clear(self) -> None:
+        from app.database import get_db_context
+        from app.models import PlanCacheEntry
+
+        with get_db_context() as db:
+            db.query(PlanCacheEntry).delete(synchronize_session=False)
+
+    def size(self) -> int:
+        from app.database import SessionLocal
+        from app.models import PlanCacheEntry
+
+        db = SessionLocal()
+        try:
+            return db.query(PlanCacheEntry).count()
+        finally:
+            db.close()
+
+
+# ============= Cache Facade ============= #
+
+class PlanCache:
+    """
+    Plan cache with hit/miss accounting.
+
+    Backend errors are logged and treated as misses so a cache outage never
+    fails plan generation.
+    """
+
+    def __init__(self, backend: CacheBackend, name: str = "memory"):
+        self.backend = backend
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.purged = 0
+        self.errors = 0
+
+    def get(self, key: str) -> Optional[dict]:
+        try:
+            value = self.backend.get(key)
+        except Exception as e:
+            logger.warning(f"Plan cache read failed: {e}")
+            self.errors += 1
+            value = None
+
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key: str, value: dict) -> None:
+        try:
+            self.backend.set(key, value)
+            self.stores += 1
+        except Exception as e:
+            logger.warning(f"Plan cache write failed: {e}")
+            self.errors += 1
+
+    def purge_expired(self) -> int:
+        try:
+            removed = self.backend.purge_expired()
+        except Exception as e:
+            logger.warning(f"Plan cache purge failed: {e}")
+            self.errors += 1
+            return 0
+        self.purged += removed
+        return removed
+
+    def stats(self) -> dict:
+        """Counters for metrics endpoints."""
+        lookups = self.hits + self.misses
+        return {
+            "backend": self.name,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups * 100, 2) if lookups > 0 else 0,
+            "stores": self.stores,
+            "purged": self.purged,
+            "errors": self.errors,
+            "evictions": getattr(self.backend, "evictions", None),
+        }
+
+
+def get_plan_cache(backend: str = PLAN_CACHE_BACKEND) -> Optional[PlanCache]:
+    """
+    Build the plan cache selected by PLAN_CACHE_BACKEND.
+
+    Returns:
+        PlanCache, or None when caching is disabled ("none")
+    """
+    if backend == "none":
+        return None
+    if backend == "memory":
+        return PlanCache(InMemoryCacheBackend(), name="memory")
+    if backend == "database":
+        return PlanCache(DatabaseCacheBackend(), name="database")
+    raise ValueError(f"Unknown PLAN_CACHE_BACKEND: {backend!r} (expected memory, database or none)")
+
+
+# ============= Expiry ============= #
+
+async def run_purge_loop(cache: PlanCache, interval_seconds: float = PLAN_CACHE_PURGE_INTERVAL_SECONDS):
+    """Delete expired entries every interval_seconds until cancelled."""
+    while True:
+        await asyncio.sleep(interval_seconds)
+        removed = await asyncio.to_thread(cache.purge_expired)
+        if removed:
+            logger.info(f"Plan cache: purged {removed} expired entries")
+
+
+def start_purge_loop(cache: Optional[PlanCache]) -> Optional[asyncio.Task]:
+    """Background expiry task for the server lifespan; None when caching or purging is off."""
+    if cache is None or PLAN_CACHE_PURGE_INTERVAL_SECONDS <= 0:
+        return None
+    return asyncio.create_task(run_purge_loop(cache))
@@ -0,0 +1,113 @@
+"""
+Connection pools for the LangGraph Postgres checkpointers.
+Every checkpoint read/write checks a connection out of a psycopg_pool pool,
+so concurrent plan generations no longer share (and serialize on) a single
+psycopg connection. Pool sizing is configurable; wait-time stats are exposed
+for /metrics/checkpointer.
+"""
+
+import contextlib
+import os
+from typing import Optional
+
+from langgraph.checkpoint.postgres import PostgresSaver
+from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
+from psycopg.rows import dict_row
+from psycopg_pool import AsyncConnectionPool, ConnectionPool
+
+
+CHECKPOINT_POOL_MIN_SIZE = int(os.getenv("CHECKPOINT_POOL_MIN_SIZE", "1"))
+CHECKPOINT_POOL_MAX_SIZE = int(os.getenv("CHECKPOINT_POOL_MAX_SIZE", "10"))
+# Seconds a checkpoint operation may wait for a free connection before failing
+CHECKPOINT_POOL_TIMEOUT = float(os.getenv("CHECKPOINT_POOL_TIMEOUT", "30"))
+# Idle connections above min size are closed after this many seconds
+CHECKPOINT_POOL_MAX_IDLE = float(os.getenv("CHECKPOINT_POOL_MAX_IDLE", "300"))
+
+# Required by the LangGraph savers: autocommit for CREATE INDEX CONCURRENTLY in
+# setup(), dict rows, and no server-side prepared statements (pgbouncer-safe)
+CONNECTION_KWARGS = {"autocommit": True, "prepare_threshold": 0, "row_factory": dict_row}
+
+
+def _pool_options(min_size: Optional[int], max_size: Optional[int]) -> dict:
+    min_size = CHECKPOINT_POOL_MIN_SIZE if min_size is None else min_size
+    max_size = CHECKPOINT_POOL_MAX_SIZE if max_size is None else max_size
+    return {
+        "min_size": min_size,
+        "max_size": max(max_size, min_size),
+        "timeout": CHECKPOINT_POOL_TIMEOUT,
+        "max_idle": CHECKPOINT_POOL_MAX_IDLE,
+        "kwargs": CONNECTION_KWARGS,
+        "name": "checkpoints",
+        "open": False,
+    }
+
+
+def open_pool(url: str, min_size: Optional[int] = None, max_size: Optional[int] = None) -> ConnectionPool:
+    """Open a sync pool, waiting until min_size connections are established."""
+    pool = ConnectionPool(url, **_pool_options(min_size, max_size))
+    pool.open(wait=True, timeout=CHECKPOINT_POOL_TIMEOUT)
+    return pool
+
+
+async def open_async_pool(url: str, min_size: Optional[int] = None, max_size: Optional[int] = None) -> AsyncConnectionPool:
+    """Open an async pool, waiting until min_size connections are established."""
+    pool = AsyncConnectionPool(url, **_pool_options(min_size, max_size))
+    await pool.open(wait=True, timeout=CHECKPOINT_POOL_TIMEOUT)
+    return pool
+
+
+class PooledPostgresSaver(PostgresSaver):
+    """
+    PostgresSaver over a ConnectionPool.
+
+    The stock saver holds one lock around every query because it assumes a
+    single shared connection. Each query here checks out its own connection,
+    so the lock is dropped; otherwise the pool would still run one query at
+    a time.
+    """
+
+    def __init__(self, pool: ConnectionPool, serde=None):
+        super().__init__(pool, serde=serde)
+        self.lock = contextlib.nullcontext()
+
+
+class PooledAsyncPostgresSaver(AsyncPostgresSaver):
+    """AsyncPostgresSaver over an AsyncConnectionPool, without the per-saver lock (see PooledPostgresSaver)."""
+
+    def __init__(self, pool: AsyncConnectionPool, serde=None):
+        super().__init__(pool, serde=serde)
+        self.lock = contextlib.nullcontext()
+
+
+def pool_stats(pool) -> dict:
+    """
+    Pool size and connection wait times.
+
+    Counters are cumulative since the pool opened (get_stats, not pop_stats,
+    so several readers see the same numbers).
+    """
+    stats = pool.get_stats()
+    requests = stats.get("requests_num", 0)
+    wait_ms = stats.get("requests_wait_ms", 0)
+    return {
+        "min_size": pool.min_size,
+        "max_size": pool.max_size,
+        "size": stats.get("pool_size", 0),
+        "available": stats.get("pool_available", 0),
+        "waiting": stats.get("requests_waiting", 0),
+        "requests": requests,
+        "requests_queued": stats.get("requests_queued", 0),
+        "avg_wait_ms": round(wait_ms / requests, 2) if requests else 0.0,
+        "total_wait_ms": wait_ms,
+        "timeouts": stats.get("requests_errors", 0),
+        "connection_errors": stats.get("connections_errors", 0),
+        "timeout_s": pool.timeout,
+    }
+
+
+def checkpointer_pool_stats(checkpointer) -> dict:
+    """pool_stats for a pooled saver; {"enabled": False} without one."""
+    pool = getattr(checkpointer, "conn", None)
+    if not isinstance(pool, (ConnectionPool, AsyncConnectionPool)):
+        return {"enabled": False}
+    return {"enabled": True, **pool_stats(pool)}
@@ -0,0 +1,323 @@
+"""
+Checkpoint retention for LangGraph threads.
+Every graph run writes a checkpoint (full state, plus channel blobs and
+pending writes) per step, and clients start a new thread per plan, so the
+checkpoint tables only ever grow. Two policies keep them bounded:
+
+- Compaction: once a run completes, keep one checkpoint per revision (the
+  last one with each revision_count), dropping the intermediate steps.
+  /history still shows every draft and critique, and the final checkpoint
+  is kept to continue the thread.
+- Retention: threads whose latest checkpoint is older than
+  CHECKPOINT_RETENTION_DAYS are deleted in batches by a background loop.
+"""
+
+import asyncio
+import contextlib
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from psycopg.rows import dict_row
+
+
+CHECKPOINT_COMPACT_ON_COMPLETE = os.getenv("CHECKPOINT_COMPACT_ON_COMPLETE", "true").lower() in ("1", "true", "yes")
+CHECKPOINT_RETENTION_DAYS = float(os.getenv("CHECKPOINT_RETENTION_DAYS", "30"))  # 0 keeps threads forever
+CHECKPOINT_PRUNE_INTERVAL_SECONDS = float(os.getenv("CHECKPOINT_PRUNE_INTERVAL_SECONDS", "3600"))
+CHECKPOINT_PRUNE_BATCH_SIZE = int(os.getenv("CHECKPOINT_PRUNE_BATCH_SIZE", "500"))  # Threads per DELETE
+
+# Pause between delete batches so pruning never holds locks for long
+PRUNE_BATCH_PAUSE_SECONDS = 0.1
+
+CHECKPOINT_TABLES = ("checkpoints", "checkpoint_blobs", "checkpoint_writes")
+
+# Advisory lock key: every API worker runs the retention loop, one prunes at a time
+RETENTION_LOCK_ID = 720_415_002
+
+logger = logging.getLogger(__name__)
+
+
+# ============= SQL ============= #
+
+# revision_count is an int, so the saver keeps it inline in the checkpoint JSON
+COMPACT_CANDIDATES_SQL = """
+SELECT checkpoint_ns, checkpoint_id,
+       checkpoint -> 'channel_values' -> 'revision_count' AS revision_count
+FROM checkpoints
+WHERE thread_id = %(thread_id)s
+"""
+
+COMPACT_CHECKPOINTS_SQL = """
+DELETE FROM checkpoints
+WHERE thread_id = %(thread_id)s
+  AND NOT (checkpoint_id = ANY(%(keep)s))
+"""
+
+# Pending writes of checkpoints that no longer exist
+COMPACT_WRITES_SQL = """
+DELETE FROM checkpoint_writes w
+WHERE w.thread_id = %(thread_id)s
+  AND NOT EXISTS (
+      SELECT 1 FROM checkpoints c
+      WHERE c.thread_id = w.thread_id AND c.checkpoint_ns = w.checkpoint_ns
+        AND c.checkpoint_id = w.checkpoint_id
+  )
+"""
+
+# Channel values no remaining checkpoint refers to
+COMPACT_BLOBS_SQL = """
+DELETE FROM checkpoint_blobs b
+WHERE b.thread_id = %(thread_id)s
+  AND NOT EXISTS (
+      SELECT 1 FROM checkpoints c
+      WHERE c.thread_id = b.thread_id AND c.checkpoint_ns = b.checkpoint_ns
+        AND c.checkpoint -> 'channel_versions' ->> b.channel = b.version
+  )
+"""
+
+# Run after COMPACT_CHECKPOINTS_SQL, in the same transaction
+COMPACT_CLEANUP_SQL = (COMPACT_WRITES_SQL, COMPACT_BLOBS_SQL)
+
+# Threads whose most recent checkpoint is older than the cutoff
+EXPIRED_THREADS_SQL = """
+SELECT thread_id FROM checkpoints
+GROUP BY thread_id
+HAVING max((checkpoint ->> 'ts')::timestamptz) < %(cutoff)s
+LIMIT %(limit)s
+"""
+
+DELETE_THREADS_SQL = tuple(
+    f"DELETE FROM {table} WHERE thread_id = ANY(%(thread_ids)s)" for table in CHECKPOINT_TABLES
+)
+
+TABLE_SIZES_SQL = """
+SELECT c.relname AS table_name,
+       pg_total_relation_size(c.oid) AS total_bytes,
+       pg_relation_size(c.oid) AS table_bytes,
+       greatest(c.reltuples, 0)::bigint AS approx_rows
+FROM pg_class c
+JOIN pg_namespace n ON n.oid = c.relnamespace
+WHERE c.relkind = 'r' AND n.nspname = current_schema() AND c.relname = ANY(%(tables)s)
+ORDER BY c.relname
+"""
+
+THREAD_COUNT_SQL = "SELECT count(DISTINCT thread_id) AS threads FROM checkpoints"
+
+
+def _connection(checkpointer):
+    """Connection context for a (pooled) saver: one pooled connection or the shared one."""
+    conn = checkpointer.conn
+    if hasattr(conn, "connection"):
+        return conn.connection()
+    return _Shared(conn)
+
+
+class _Shared:
+    """Context manager that hands out an already-open connection without closing it."""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self.conn
+
+    def __exit__(self, *exc):
+        return False
+
+    async def __aenter__(self):
+        return self.conn
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+def _cutoff(retention_days: float) -> datetime:
+    return datetime.now(timezone.utc) - timedelta(days=retention_days)
+
+
+# ============= Compaction ============= #
+
+def checkpoints_to_keep(rows: list[dict]) -> list[str]:
+    """
+    The newest checkpoint of each revision, per namespace.
+
+    rows have checkpoint_ns, checkpoint_id and revision_count (None where the
+    namespace has no such channel, which keeps just its newest checkpoint).
+    Checkpoint ids are uuid6, so the greatest is the newest.
+    """
+    newest: dict[tuple, str] = {}
+    for row in rows:
+        key = (row["checkpoint_ns"], row["revision_count"])
+        if key not in newest or row["checkpoint_id"] > newest[key]:
+            newest[key] = row["checkpoint_id"]
+    return sorted(newest.values())
+
+
+def compact_thread(checkpointer, thread_id: str) -> None:
+    """Keep one checkpoint per revision of a thread (sync saver)."""
+    params = {"thread_id": thread_id}
+    with _connection(checkpointer) as conn:
+        with conn.transaction(), conn.cursor(row_factory=dict_row) as cur:
+            cur.execute(COMPACT_CANDIDATES_SQL, params)
+            keep = checkpoints_to_keep(cur.fetchall())
+            cur.execute(COMPACT_CHECKPOINTS_SQL, {**params, "keep": keep})
+            for sql in COMPACT_CLEANUP_SQL:
+                cur.execute(sql, params)
+
+
+async def acompact_thread(checkpointer, thread_id: str) -> None:
+    """Keep one checkpoint per revision of a thread (async saver)."""
+    params = {"thread_id": thread_id}
+    async with _connection(checkpointer) as conn:
+        async with conn.transaction(), conn.cursor(row_factory=dict_row) as cur:
+            await cur.execute(COMPACT_CANDIDATES_SQL, params)
+            keep = checkpoints_to_keep(await cur.fetchall())
+            await cur.execute(COMPACT_CHECKPOINTS_SQL, {**params, "keep": keep})
+            for sql in COMPACT_CLEANUP_SQL:
+                await cur.execute(sql, params)
+
+
+_background_tasks: set = set()
+
+
+def schedule_compaction(checkpointer, thread_id: str) -> None:
+    """
+    Compact a finished thread in the background (async saver).
+
+    No-op without a checkpointer or with CHECKPOINT_COMPACT_ON_COMPLETE off.
+    Failures are logged; the thread is then left for retention to delete.
+    """
+    if checkpointer is None or not CHECKPOINT_COMPACT_ON_COMPLETE:
+        return
+
+    async def _compact():
+        try:
+            await acompact_thread(checkpointer, thread_id)
+        except Exception as e:
+            logger.warning(f"Checkpoint compaction failed for thread {thread_id}: {e}")
+
+    task = asyncio.create_task(_compact())
+    # Keep a reference until done, or the task may be garbage collected mid-run
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+# ============= Retention ============= #
+
+_last_prune: dict = {}
+
+
+async def aprune_expired_threads(
+    checkpointer,
+    retention_days: float = CHECKPOINT_RETENTION_DAYS,
+    batch_size: int = CHECKPOINT_PRUNE_BATCH_SIZE,
+    conn=None,
+) -> int:
+    """
+    Delete threads whose latest checkpoint is older than retention_days.
+
+    Deletes batch_size threads per transaction, pausing between batches,
+    on conn if given, else on a connection checked out per batch.
+
+    Returns:
+        Number of threads deleted
+    """
+    if retention_days <= 0:
+        return 0
+    cutoff = _cutoff(retention_days)
+    deleted = 0
+    while True:
+        async with (_Shared(conn) if conn is not None else _connection(checkpointer)) as batch_conn:
+            async with batch_conn.transaction(), batch_conn.cursor(row_factory=dict_row) as cur:
+                await cur.execute(EXPIRED_THREADS_SQL, {"cutoff": cutoff, "limit": batch_size})
+                thread_ids = [row["thread_id"] for row in await cur.fetchall()]
+                if thread_ids:
+                    for sql in DELETE_THREADS_SQL:
+                        await cur.execute(sql, {"thread_ids": thread_ids})
+        deleted += len(thread_ids)
+        if len(thread_ids) < batch_size:
+            return deleted
+        await asyncio.sleep(PRUNE_BATCH_PAUSE_SECONDS)
+
+
+@contextlib.asynccontextmanager
+async def _retention_lock(checkpointer):
+    """A connection holding RETENTION_LOCK_ID, or None while another process holds it."""
+    async with _connection(checkpointer) as conn:
+        async with conn.cursor(row_factory=dict_row) as cur:
+            await cur.execute("SELECT pg_try_advisory_lock(%s) AS locked", (RETENTION_LOCK_ID,))
+            locked = (await cur.fetchone())["locked"]
+        if not locked:
+            yield None
+            return
+        try:
+            yield conn
+        finally:
+            async with conn.cursor(row_factory=dict_row) as cur:
+                await cur.execute("SELECT pg_advisory_unlock(%s)", (RETENTION_LOCK_ID,))
+
+
+async def run_retention_loop(
+    checkpointer,
+    interval_seconds: float = CHECKPOINT_PRUNE_INTERVAL_SECONDS,
+    retention_days: float = CHECKPOINT_RETENTION_DAYS,
+):
+    """
+    Prune expired threads every interval_seconds until cancelled.
+
+    A run is skipped while another process (e.g. a sibling uvicorn worker)
+    holds RETENTION_LOCK_ID, so workers do not delete the same rows at once.
+    """
+    while True:
+        started = datetime.now(timezone.utc)
+        try:
+            async with _retention_lock(checkpointer) as conn:
+                # Pruned on the lock's own connection, so a one-connection pool suffices
+                deleted = await aprune_expired_threads(checkpointer, retention_days, conn=conn) if conn else None
+            if deleted is not None:
+                _last_prune.update(at=started.isoformat(), threads_deleted=deleted, error=None)
+            if deleted:
+                logger.info(f"Checkpoint retention: deleted {deleted} threads older than {retention_days:g} days")
+        except Exception as e:
+            _last_prune.update(at=started.isoformat(), threads_deleted=0, error=str(e))
+            logger.warning(f"Checkpoint retention run failed: {e}")
+        await asyncio.sleep(interval_seconds)
+
+
+def start_retention_loop(checkpointer) -> Optional[asyncio.Task]:
+    """Background pruning task for the server lifespan; None when retention is off."""
+    if checkpointer is None or CHECKPOINT_RETENTION_DAYS <= 0:
+        return None
+    return asyncio.create_task(run_retention_loop(checkpointer))
+
+
+# ============= Reporting ============= #
+
+async def acheckpoint_table_stats(checkpointer) -> dict:
+    """Size of the checkpoint tables, thread count and retention settings."""
+    async with _connection(checkpointer) as conn:
+        async with conn.cursor(row_factory=dict_row) as cur:
+            await cur.execute(TABLE_SIZES_SQL, {"tables": list(CHECKPOINT_TABLES)})
+            tables = {
+                row["table_name"]: {
+                    "total_bytes": row["total_bytes"],
+                    "table_bytes": row["table_bytes"],
+                    "approx_rows": row["approx_rows"],
+                }
+                for row in await cur.fetchall()
+            }
+            await cur.execute(THREAD_COUNT_SQL)
+            threads = (await cur.fetchone())["threads"]
+    return {
+        "tables": tables,
+        "total_bytes": sum(t["total_bytes"] for t in tables.values()),
+        "threads": threads,
+        "retention": {
+            "compact_on_complete": CHECKPOINT_COMPACT_ON_COMPLETE,
+            "retention_days": CHECKPOINT_RETENTION_DAYS,
+            "prune_interval_seconds": CHECKPOINT_PRUNE_INTERVAL_SECONDS,
+            "batch_size": CHECKPOINT_PRUNE_BATCH_SIZE,
+            "last_prune": dict(_last_prune) or None,
+        },
+    }
@@ -0,0 +1,139 @@
+"""
+Concurrency control for LLM-backed graph executions.
+Bounds how many plan generations run at once per worker so slow LLM calls
+cannot pile up unbounded while the event loop keeps serving other routes,
+and coalesces identical requests that arrive while one is already running.
+"""
+
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable, TypeVar
+
+
+PLAN_MAX_CONCURRENCY = int(os.getenv("PLAN_MAX_CONCURRENCY", "8"))
+PLAN_QUEUE_TIMEOUT_SECONDS = float(os.getenv("PLAN_QUEUE_TIMEOUT_SECONDS", "30"))
+
+T = TypeVar("T")
+
+
+class PlanLimiter:
+    """
+    Async semaphore with queue timeout and in-flight counters.
+
+    Usage:
+        async with limiter.slot():
+            await graph_app.ainvoke(...)
+
+    Raises TimeoutError from slot() if no capacity frees up within
+    queue_timeout seconds.
+    """
+
+    def __init__(self, max_concurrency: int = PLAN_MAX_CONCURRENCY, queue_timeout: float = PLAN_QUEUE_TIMEOUT_SECONDS):
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+
+        self.max_concurrency = max_concurrency
+        self.queue_timeout = queue_timeout
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+        # Counters (single event loop, so plain ints are safe)
+        self.in_flight = 0
+        self.waiting = 0
+        self.completed = 0
+        self.rejected = 0
+
+    @asynccontextmanager
+    async def slot(self):
+        """Acquire one execution slot, waiting at most queue_timeout seconds."""
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise TimeoutError(
+                f"No plan generation slot available within {self.queue_timeout}s "
+                f"({self.max_concurrency} already in flight)"
+            )
+        finally:
+            self.waiting -= 1
+
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self.completed += 1
+            self._semaphore.release()
+
+    def stats(self) -> dict:
+        """Snapshot of limiter state for metrics endpoints."""
+        return {
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls that share a key into one execution.
+
+    The first caller for a key (the leader) runs the work; callers arriving
+    while it is in flight await the same result or exception instead of
+    starting their own. Nothing is remembered once the leader finishes.
+
+    Usage:
+        result = await single_flight.run(key, lambda: expensive_coroutine())
+    """
+
+    def __init__(self):
+        self._in_flight: dict[str, asyncio.Future] = {}
+
+        # Counters (single event loop, so plain ints are safe)
+        self.executions = 0
+        self.coalesced = 0
+
+    async def run(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """Run fn() for key, or wait for the execution already in flight."""
+        while key in self._in_flight:
+            future = self._in_flight[key]
+            self.coalesced += 1
+            try:
+                # shield: a cancelled follower must not cancel the shared future
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+                # The leader was cancelled; retry (possibly as the new leader)
+                self.coalesced -= 1
+
+        future = asyncio.get_running_loop().create_future()
+        # Mark exceptions as retrieved even when no follower awaited them
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._in_flight[key] = future
+        self.executions += 1
+
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._in_flight[key]
+
+    def stats(self) -> dict:
+        """Snapshot of coalescing counters for metrics endpoints."""
+        return {
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "in_flight_keys": len(self._in_flight),
+        }
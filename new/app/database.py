@@ -3,7 +3,7 @@ Database connection and session management.
 """
 
 import os
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker, Session
 from contextlib import contextmanager
 
@@ -19,9 +19,24 @@ engine = create_engine(DATABASE_URL, pool_pre_ping=True)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
+# Columns added after a table first shipped. create_all() never alters
+# existing tables, so these are applied idempotently on startup.
+ADDED_COLUMNS = [
+    ("llm_metrics", "llm_calls_saved", "INTEGER DEFAULT 0"),
+    ("llm_metrics", "llm_calls_wasted", "INTEGER DEFAULT 0"),
+    ("node_spans", "prompt_tokens", "INTEGER"),
+]
+
+
 def init_database():
-    """Create all tables."""
+    """Create all tables and add any columns missing from older deployments."""
     Base.metadata.create_all(bind=engine)
+    
+    if engine.dialect.name == "postgresql":
+        with engine.begin() as conn:
+            for table, column, ddl in ADDED_COLUMNS:
+                conn.execute(text(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {column} {ddl}"))
+    
     print("[INFO] Database tables created successfully")
 
 
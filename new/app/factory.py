@@ -0,0 +1,101 @@
+"""
+FastAPI App Factory
+Builds the AI Personal Trainer API for any registered LLM provider
+(see app/providers.py). The provider's LangChain package is imported
+during startup, and only for the provider the app runs.
+
+Usage:
+    uvicorn --factory app.factory:create_app   # provider from LLM_PROVIDER
+    app = create_app("openai")
+"""
+
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from fastapi import FastAPI, Request
+from fastapi.middleware.cors import CORSMiddleware
+
+from app.service import PlanService
+from app.routers import admin, auth, generation, injuries, metrics, plans, workouts
+
+
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "ollama")
+
+# CORS middleware for web clients
+CORS_ORIGINS = os.getenv("CORS_ORIGINS", "http://localhost:8501,http://frontend:8501")
+
+# Logging setup with LLM metrics
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def create_app(provider: Optional[str] = None) -> FastAPI:
+    """
+    Build the API app for an LLM provider.
+
+    Args:
+        provider: Registered provider name; defaults to LLM_PROVIDER
+
+    Returns:
+        FastAPI app whose lifespan starts (and stops) its PlanService
+    """
+    service = PlanService(provider or LLM_PROVIDER)
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        """Initialize LLM, database, and graph on startup, cleanup on shutdown."""
+        try:
+            await service.start()
+            logger.info(f"FastAPI server initialized successfully ({service.llm_provider_label})")
+            yield
+        except Exception as e:
+            logger.error(f"Failed to initialize server: {e}")
+            raise
+        finally:
+            logger.info("Shutting down server...")
+            await service.stop()
+
+    app = FastAPI(
+        title="AI Personal Trainer API",
+        description=(
+            "Agentic workout planning with LangGraph safety critique loop, user authentication, "
+            f"and workout tracking ({service.provider.label})"
+        ),
+        version="2.2.0",
+        lifespan=lifespan,
+    )
+    app.state.service = service
+
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=[origin.strip() for origin in CORS_ORIGINS.split(",")],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    @app.middleware("http")
+    async def add_request_timing(request: Request, call_next):
+        """Add timing header to all responses."""
+        start_time = time.time()
+        response = await call_next(request)
+        process_time = time.time() - start_time
+        response.headers["X-Process-Time-Ms"] = str(int(process_time * 1000))
+        return response
+
+    # Register routers
+    app.include_router(auth.router)
+    app.include_router(workouts.router)
+    app.include_router(injuries.router)
+    app.include_router(plans.router)
+    app.include_router(metrics.router)
+    app.include_router(generation.router)
+    app.include_router(admin.router)
+
+    return app
@@ -0,0 +1,182 @@
+"""
+Deterministic fake chat model for tests and benchmarks.
+Answers the trainer and physiotherapist prompts with valid plans, critiques
+and targeted revisions, with scripted SAFE/UNSAFE verdicts, a configurable
+latency distribution and a rate of malformed (unparseable) output. Needs
+no model server or GPU.
+
+Usage:
+    llm = FakeTrainerChatModel(verdicts=["UNSAFE", "SAFE"], latency_ms=200, latency_jitter_ms=50,
+                               latency_distribution="lognormal", seed=7)
+    graph = create_graph(llm)
+"""
+
+import asyncio
+import json
+import math
+import random
+import re
+import threading
+import time
+from typing import Literal, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from pydantic import Field, PrivateAttr
+
+from app.prompts import CRITIQUE_SYSTEM_PROMPT, DRAFT_PLAN_SYSTEM_PROMPT, estimate_tokens
+
+
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "normal", "lognormal")
+
+# Returned instead of JSON at malformed_rate; json_extract cannot recover it
+MALFORMED_OUTPUT = "I'm sorry, I can't put together a plan for that right now. Could you tell me more about your goals?"
+
+FAKE_EXERCISES = [
+    {"name": "Goblet Squat", "sets": 3, "reps": "8-12", "weight_kg": 20.0, "rest_seconds": 90,
+     "notes": "Keep chest up"},
+    {"name": "Dumbbell Bench Press", "sets": 3, "reps": "8-12", "weight_kg": 22.5, "rest_seconds": 90,
+     "notes": "Control the descent"},
+    {"name": "Seated Cable Row", "sets": 3, "reps": "10-12", "weight_kg": 40.0, "rest_seconds": 75,
+     "notes": "Squeeze shoulder blades"},
+    {"name": "Romanian Deadlift", "sets": 3, "reps": "8-10", "weight_kg": 40.0, "rest_seconds": 120,
+     "notes": "Hinge at the hips"},
+    {"name": "Plank", "sets": 3, "reps": "30-45s", "weight_kg": None, "rest_seconds": 60,
+     "notes": "Brace the core"},
+]
+
+# "1. Goblet Squat - 3 sets x 8-12 reps" (critique) / "- Goblet Squat - 3 sets x ..." (revision)
+_EXERCISE_LINE = re.compile(r"^(?:\d+\.|-) (.+?) - .+ sets x .+ reps$", re.MULTILINE)
+
+
+def _listed_exercises(prompt: str, heading: str) -> list[str]:
+    """Exercise names listed under a **heading** of a prompt."""
+    _, _, rest = prompt.partition(heading)
+    return _EXERCISE_LINE.findall(rest.split("\n\n", 1)[0])
+
+
+class FakeTrainerChatModel(BaseChatModel):
+    """
+    Scripted stand-in for the trainer/physiotherapist LLM.
+
+    Critique verdicts follow `verdicts` in call order, cycling; under
+    concurrency the calls of different requests interleave on one sequence.
+    An UNSAFE verdict flags the first exercise under review. Latency and
+    malformed output are drawn from a seeded RNG, so a single-threaded run
+    is fully reproducible.
+    """
+
+    verdicts: list[Literal["SAFE", "UNSAFE"]] = Field(default_factory=lambda: ["SAFE"])
+    latency_ms: float = 0.0  # Mean latency per call
+    latency_jitter_ms: float = 0.0  # Half-width (uniform) or standard deviation (normal, lognormal)
+    latency_distribution: Literal["fixed", "uniform", "normal", "lognormal"] = "fixed"
+    malformed_rate: float = 0.0  # Fraction of calls answered with MALFORMED_OUTPUT
+    seed: Optional[int] = 0
+
+    _rng: random.Random = PrivateAttr()
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+    _verdict_index: int = PrivateAttr(default=0)
+    _calls: dict = PrivateAttr(default_factory=dict)
+
+    def model_post_init(self, __context) -> None:
+        if not self.verdicts:
+            raise ValueError("verdicts must not be empty")
+        self._rng = random.Random(self.seed)
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-trainer"
+
+    @property
+    def calls(self) -> dict:
+        """Calls answered so far per prompt kind (draft, revision, critique, malformed)."""
+        with self._lock:
+            return dict(self._calls)
+
+    def _sample_latency_ms(self) -> float:
+        mean, jitter = self.latency_ms, self.latency_jitter_ms
+        if self.latency_distribution == "uniform":
+            value = self._rng.uniform(mean - jitter, mean + jitter)
+        elif self.latency_distribution == "normal":
+            value = self._rng.gauss(mean, jitter)
+        elif self.latency_distribution == "lognormal" and mean > 0:
+            # Same mean and deviation, with the long right tail LLM latencies have
+            sigma2 = math.log(1 + (jitter / mean) ** 2)
+            value = self._rng.lognormvariate(math.log(mean) - sigma2 / 2, math.sqrt(sigma2))
+        else:
+            value = mean
+        return max(value, 0.0)
+
+    def _respond(self, messages) -> tuple[float, str]:
+        """Pick the latency and answer for one call."""
+        system = messages[0].content if len(messages) > 1 else ""
+        prompt = messages[-1].content
+        with self._lock:
+            delay = self._sample_latency_ms() / 1000
+            if self.malformed_rate and self._rng.random() < self.malformed_rate:
+                kind, content = "malformed", MALFORMED_OUTPUT
+            elif system == CRITIQUE_SYSTEM_PROMPT:
+                verdict = self.verdicts[self._verdict_index % len(self.verdicts)]
+                self._verdict_index += 1
+                kind, content = "critique", self._critique(prompt, verdict)
+            elif "**Flagged Exercises (replace these):**" in prompt:
+                kind, content = "revision", self._revision(prompt)
+            elif system == DRAFT_PLAN_SYSTEM_PROMPT:
+                kind, content = "draft", self._draft()
+            else:
+                kind, content = "other", "OK"
+            self._calls[kind] = self._calls.get(kind, 0) + 1
+        return delay, content
+
+    def _draft(self) -> str:
+        return json.dumps({
+            "name": "Full Body Strength - Week 1",
+            "frequency": "3x per week",
+            "exercises": FAKE_EXERCISES,
+            "warm_up": "5 min light cardio, dynamic stretches",
+            "cool_down": "5 min stretching",
+            "progression_notes": "Add 2.5kg when all sets hit the top of the rep range",
+        })
+
+    def _revision(self, prompt: str) -> str:
+        flagged = _listed_exercises(prompt, "**Flagged Exercises (replace these):**") or ["Exercise"]
+        return json.dumps({
+            "exercises": [
+                {"name": f"Modified {name}", "sets": 3, "reps": "10-12", "weight_kg": None, "rest_seconds": 90,
+                 "notes": "Reduced range of motion"}
+                for name in flagged
+            ]
+        })
+
+    def _critique(self, prompt: str, verdict: str) -> str:
+        if verdict == "SAFE":
+            return json.dumps({"status": "SAFE", "feedback": "All exercises are compatible.", "flagged_exercises": []})
+        flagged = _listed_exercises(prompt, "**Exercises:**")[:1]
+        return json.dumps({
+            "status": "UNSAFE",
+            "feedback": f"{', '.join(flagged) or 'The plan'} risks aggravating the reported injury.",
+            "flagged_exercises": flagged,
+        })
+
+    def _result(self, messages, content: str) -> ChatResult:
+        input_tokens = sum(estimate_tokens(str(m.content)) for m in messages)
+        output_tokens = estimate_tokens(content)
+        message = AIMessage(content=content, usage_metadata={
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+        })
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        delay, content = self._respond(messages)
+        if delay:
+            time.sleep(delay)
+        return self._result(messages, content)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        delay, content = self._respond(messages)
+        if delay:
+            await asyncio.sleep(delay)
+        return self._result(messages, content)
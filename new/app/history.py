@@ -0,0 +1,152 @@
+"""
+Checkpoint History
+Pages through a thread's checkpoints for GET /history/{thread_id}, newest
+first, returning only the fields clients show (plan, critique, revision
+count) with each checkpoint's own timestamp.
+
+On Postgres only the workout_plan and critique blobs are read and
+deserialized; messages, profile and injuries never leave the database.
+Other savers fall back to the graph's state history.
+
+Note: with CHECKPOINT_COMPACT_ON_COMPLETE on, finished threads keep one
+checkpoint per revision, so history shows each draft with its critique
+rather than every graph step.
+"""
+
+import os
+from typing import Optional
+
+from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
+from pydantic import ValidationError
+
+from app.schemas import Critique, WorkoutPlan
+
+
+HISTORY_PAGE_SIZE = int(os.getenv("HISTORY_PAGE_SIZE", "20"))
+HISTORY_MAX_PAGE_SIZE = int(os.getenv("HISTORY_MAX_PAGE_SIZE", "100"))
+
+# Channels stored as blobs that history needs; revision_count is an int,
+# so the saver keeps it inline in the checkpoint JSON
+HISTORY_BLOB_CHANNELS = ("workout_plan", "critique")
+
+
+# ============= SQL ============= #
+
+# One row per checkpoint of the thread's root namespace, with only the
+# needed blobs joined at the version each checkpoint points to
+HISTORY_PAGE_SQL = """
+SELECT c.checkpoint_id,
+       c.checkpoint ->> 'ts' AS ts,
+       (c.metadata ->> 'step')::int AS step,
+       c.checkpoint -> 'channel_values' -> 'revision_count' AS revision_count,
+       (
+           SELECT array_agg(array[bl.channel::bytea, bl.type::bytea, bl.blob])
+           FROM checkpoint_blobs bl
+           WHERE bl.thread_id = c.thread_id
+             AND bl.checkpoint_ns = c.checkpoint_ns
+             AND bl.channel = ANY(%(channels)s)
+             AND bl.version = c.checkpoint -> 'channel_versions' ->> bl.channel
+       ) AS blobs
+FROM checkpoints c
+WHERE c.thread_id = %(thread_id)s
+  AND c.checkpoint_ns = ''
+  AND (%(before)s::text IS NULL OR c.checkpoint_id < %(before)s)
+ORDER BY c.checkpoint_id DESC
+LIMIT %(limit)s
+"""
+
+
+def _validated(model, raw):
+    """raw as a model dict, or None if missing or not valid (e.g. malformed LLM output)."""
+    if not isinstance(raw, dict):
+        return None
+    try:
+        return model.model_validate(raw).model_dump()
+    except ValidationError:
+        return None
+
+
+def _history_item(checkpoint_id: str, timestamp: str, step, values: dict) -> dict:
+    return {
+        "checkpoint_id": checkpoint_id,
+        "timestamp": timestamp,
+        "step": step,
+        "workout_plan": _validated(WorkoutPlan, values.get("workout_plan")),
+        "critique": _validated(Critique, values.get("critique")),
+        "revision_count": values.get("revision_count") or 0,
+    }
+
+
+def _page(items: list, limit: int) -> tuple[list, Optional[str]]:
+    """Trim the limit + 1 lookahead row; its presence means there is an older page."""
+    if len(items) > limit:
+        items = items[:limit]
+        return items, items[-1]["checkpoint_id"]
+    return items, None
+
+
+# ============= Readers ============= #
+
+async def _apostgres_history(checkpointer, thread_id: str, limit: int, before: Optional[str]) -> list:
+    async with checkpointer._cursor() as cur:
+        await cur.execute(
+            HISTORY_PAGE_SQL,
+            {
+                "thread_id": thread_id,
+                "channels": list(HISTORY_BLOB_CHANNELS),
+                "before": before,
+                "limit": limit + 1,
+            },
+            binary=True,
+        )
+        rows = await cur.fetchall()
+
+    items = []
+    for row in rows:
+        values = {"revision_count": row["revision_count"]}
+        for channel, type_tag, blob in row["blobs"] or []:
+            if type_tag != b"empty":
+                values[channel.decode()] = checkpointer.serde.loads_typed((type_tag.decode(), blob))
+        items.append(_history_item(row["checkpoint_id"], row["ts"], row["step"], values))
+    return items
+
+
+async def _agraph_history(graph_app, thread_id: str, limit: int, before: Optional[str]) -> list:
+    config = {"configurable": {"thread_id": thread_id}}
+    before_config = {"configurable": {"thread_id": thread_id, "checkpoint_id": before}} if before else None
+    items = []
+    async for snapshot in graph_app.aget_state_history(config, before=before_config, limit=limit + 1):
+        items.append(_history_item(
+            snapshot.config["configurable"]["checkpoint_id"],
+            snapshot.created_at,
+            (snapshot.metadata or {}).get("step"),
+            snapshot.values or {},
+        ))
+    return items
+
+
+async def aget_plan_history(
+    graph_app,
+    thread_id: str,
+    limit: int = HISTORY_PAGE_SIZE,
+    before: Optional[str] = None,
+) -> tuple[list[dict], Optional[str]]:
+    """
+    One page of a thread's plan history, newest checkpoint first.
+
+    Args:
+        graph_app: Compiled graph with a checkpointer
+        thread_id: Thread to read
+        limit: Page size (capped at HISTORY_MAX_PAGE_SIZE)
+        before: Cursor from the previous page; only older checkpoints are returned
+
+    Returns:
+        (history items, cursor for the next page or None on the last page)
+    """
+    limit = max(1, min(limit, HISTORY_MAX_PAGE_SIZE))
+    checkpointer = graph_app.checkpointer
+    if isinstance(checkpointer, AsyncPostgresSaver):
+        items = await _apostgres_history(checkpointer, thread_id, limit, before)
+    else:
+        items = await _agraph_history(graph_app, thread_id, limit, before)
+    return _page(items, limit)
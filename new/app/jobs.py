@@ -0,0 +1,150 @@
+"""
+Durable plan job queue backed by the plan_jobs PostgreSQL table.
+The API enqueues requests and returns immediately; app.worker processes
+claim jobs with SELECT ... FOR UPDATE SKIP LOCKED so each job runs on exactly
+one worker, and jobs left running by a crashed worker are reclaimed once
+their lease expires. A live worker renews its lease while the graph runs
+(renew_lease), and only the worker holding the lease may finish a job.
+"""
+
+import os
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+
+from app.models import PlanJob
+
+
+PLAN_JOB_LEASE_SECONDS = int(os.getenv("PLAN_JOB_LEASE_SECONDS", "900"))
+PLAN_JOB_MAX_ATTEMPTS = int(os.getenv("PLAN_JOB_MAX_ATTEMPTS", "3"))
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+
+def enqueue_job(db: Session, request: dict) -> PlanJob:
+    """
+    Insert a queued job.
+
+    Args:
+        db: Database session (committed here)
+        request: WorkoutRequest as a JSON-serializable dict
+
+    Returns:
+        The new PlanJob
+    """
+    job = PlanJob(id=str(uuid.uuid4()), status=QUEUED, request=request, attempts=0)
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def get_job(db: Session, job_id: str) -> Optional[PlanJob]:
+    """Look up a job by id."""
+    return db.get(PlanJob, job_id)
+
+
+def claim_job(
+    db: Session,
+    worker_id: str,
+    lease_seconds: int = PLAN_JOB_LEASE_SECONDS,
+    max_attempts: int = PLAN_JOB_MAX_ATTEMPTS,
+) -> Optional[PlanJob]:
+    """
+    Claim the oldest runnable job for this worker.
+
+    Runnable means queued, or running with an expired lease (its worker
+    died). Rows locked by other workers are skipped rather than waited on.
+    A reclaimed job that already used max_attempts is marked failed.
+
+    Returns:
+        The claimed PlanJob (now running), or None if the queue is empty
+    """
+    while True:
+        now = datetime.utcnow()
+        job = (
+            db.query(PlanJob)
+            .filter(or_(
+                PlanJob.status == QUEUED,
+                and_(PlanJob.status == RUNNING, PlanJob.lease_expires_at < now),
+            ))
+            .order_by(PlanJob.created_at)
+            .with_for_update(skip_locked=True)
+            .limit(1)
+            .first()
+        )
+        if job is None:
+            db.commit()
+            return None
+
+        if (job.attempts or 0) >= max_attempts:
+            job.status = FAILED
+            job.error = f"Abandoned after {job.attempts} attempt(s): worker lease expired"
+            job.finished_at = now
+            db.commit()
+            continue
+
+        job.status = RUNNING
+        job.worker_id = worker_id
+        job.attempts = (job.attempts or 0) + 1
+        job.started_at = now
+        job.lease_expires_at = now + timedelta(seconds=lease_seconds)
+        db.commit()
+        db.refresh(job)
+        return job
+
+
+def _held_by(db: Session, job_id: str, worker_id: str):
+    """Query for the job if it is still running under worker_id's lease."""
+    return db.query(PlanJob).filter(
+        PlanJob.id == job_id,
+        PlanJob.worker_id == worker_id,
+        PlanJob.status == RUNNING,
+    )
+
+
+def renew_lease(db: Session, job_id: str, worker_id: str, lease_seconds: int = PLAN_JOB_LEASE_SECONDS) -> bool:
+    """
+    Extend a running job's lease.
+
+    Returns:
+        False if worker_id no longer holds the job (it was reclaimed or finished)
+    """
+    updated = _held_by(db, job_id, worker_id).update(
+        {PlanJob.lease_expires_at: datetime.utcnow() + timedelta(seconds=lease_seconds)},
+        synchronize_session=False,
+    )
+    db.commit()
+    return updated == 1
+
+
+def complete_job(db: Session, job_id: str, worker_id: str, result: dict) -> bool:
+    """Store a job's PlanResponse and mark it succeeded. False if the lease was lost."""
+    return _finish(db, job_id, worker_id, SUCCEEDED, result=result)
+
+
+def fail_job(db: Session, job_id: str, worker_id: str, error: str) -> bool:
+    """Mark a job failed with an error message. False if the lease was lost."""
+    return _finish(db, job_id, worker_id, FAILED, error=error)
+
+
+def _finish(db: Session, job_id: str, worker_id: str, status: str, result: dict = None, error: str = None) -> bool:
+    # A worker whose lease expired must not overwrite the job its successor is running
+    updated = _held_by(db, job_id, worker_id).update(
+        {
+            PlanJob.status: status,
+            PlanJob.result: result,
+            PlanJob.error: error,
+            PlanJob.finished_at: datetime.utcnow(),
+            PlanJob.lease_expires_at: None,
+        },
+        synchronize_session=False,
+    )
+    db.commit()
+    return updated == 1
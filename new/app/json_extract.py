@@ -0,0 +1,358 @@
+"""
+Robust JSON extraction for LLM output.
+One left-to-right scan locates the first JSON object, skipping any markdown
+fences or prose around it, and repairs the mistakes local models make:
+trailing commas, single quotes, // comments, Python literals, bare keys,
+unquoted string values (e.g. "status": UNSAFE - knee risk), unescaped
+quotes and raw newlines in strings, "..." placeholders, objects sent as
+a JSON string, and output truncated mid-object.
+"""
+
+import json
+import re
+from dataclasses import dataclass
+from typing import Any
+
+
+# Barewords mapped to JSON literals; any other bareword value is quoted as a string
+_LITERALS = {
+    "true": "true", "false": "false", "null": "null",
+    "True": "true", "False": "false", "None": "null",
+}
+
+# Runs of characters that need no rewriting, inside a string and outside one
+_PLAIN_IN_STRING = re.compile(r"[^\\\"'\n\t\r]+")
+_PLAIN_OUTSIDE = re.compile(r"\s+")
+
+# An unquoted value ends at the next delimiter, line break or comment
+_VALUE_END = re.compile(r"[,}\]\n]|//|/\*")
+_NUMBER = re.compile(r"-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][+-]?\d+)?")
+# Elisions such as [{...}, ...] in place of further items
+_PLACEHOLDER = re.compile(r"(?:\.{3,}|\u2026)\s*,?")
+
+# Give up after this many top-level candidate objects
+MAX_CANDIDATES = 5
+
+
+class JSONExtractionError(ValueError):
+    """Raised when no JSON object can be recovered from the text."""
+
+
+@dataclass
+class Extraction:
+    """Result of parse_llm_json."""
+    value: Any
+    repaired: bool = False  # Syntax was fixed up before parsing
+    salvaged: bool = False  # Output was truncated and closed off
+    restarted: bool = False  # An earlier top-level object failed to parse and was skipped
+    end: int = 0  # Index in the text just past the object
+
+
+def _scan(text: str, start: int) -> tuple[str, bool, bool, int]:
+    """
+    Rewrite text[start:] into strict JSON up to the end of the first object.
+
+    Returns:
+        (json_text, repaired, salvaged, end), end being the index just past
+        the object (len(text) when it was truncated)
+    """
+    out: list[str] = []
+    stack: list[str] = []
+    # Last point where the object could be cut cleanly: (len(out), open containers)
+    safe_cut = None
+    repaired = False
+
+    quote = None  # Active string delimiter (' or ")
+    escape = False
+    expect_value = False  # After a colon, or at an array item
+    i = start
+    n = len(text)
+
+    while i < n:
+        ch = text[i]
+
+        # ---- Inside a string ---- #
+        if quote:
+            if not escape:
+                plain = _PLAIN_IN_STRING.match(text, i)
+                if plain:
+                    out.append(plain.group())
+                    i = plain.end()
+                    continue
+            if escape:
+                out.append(ch)
+                escape = False
+            elif ch == "\\":
+                out.append(ch)
+                escape = True
+            elif ch == quote and (quote == "'" or _closes_string(text, i + 1)):
+                out.append('"')
+                quote = None
+            elif ch == '"':  # Inside a single-quoted string, or not followed by a delimiter
+                out.append('\\"')
+                repaired = True
+            elif ch == "\n":
+                out.append("\\n")
+                repaired = True
+            elif ch == "\t":
+                out.append("\\t")
+                repaired = True
+            elif ch == "\r":
+                repaired = True
+            else:
+                out.append(ch)
+            i += 1
+            continue
+
+        # ---- Structure ---- #
+        if ch in "{[":
+            stack.append("}" if ch == "{" else "]")
+            out.append(ch)
+            expect_value = ch == "["
+        elif ch in "}]":
+            if not stack:
+                break
+            if _drop_trailing_comma(out):
+                repaired = True
+            stack.pop()
+            out.append(ch)
+            if not stack:
+                return "".join(out), repaired, False, i + 1
+            safe_cut = (len(out), list(stack))
+            expect_value = False
+        elif ch == ",":
+            safe_cut = (len(out), list(stack))
+            out.append(ch)
+            expect_value = stack[-1] == "]"
+        elif ch == ":":
+            out.append(ch)
+            expect_value = True
+        elif ch == '"' or ch == "'":
+            quote = ch
+            out.append('"')
+            expect_value = False
+            if ch == "'":
+                repaired = True
+        elif ch.isspace():
+            plain = _PLAIN_OUTSIDE.match(text, i)
+            out.append(plain.group())
+            i = plain.end()
+            continue
+
+        # ---- Comments ---- #
+        elif ch == "/" and text.startswith("//", i):
+            end = text.find("\n", i)
+            i = n if end == -1 else end
+            repaired = True
+            continue
+        elif ch == "/" and text.startswith("/*", i):
+            end = text.find("*/", i + 2)
+            i = n if end == -1 else end + 2
+            repaired = True
+            continue
+
+        # ---- Placeholders and unquoted values ---- #
+        elif text.startswith("...", i) or ch == "\u2026":
+            i = _PLACEHOLDER.match(text, i).end()
+            repaired = True
+            continue
+        elif expect_value:
+            end = _VALUE_END.search(text, i)
+            token = text[i:end.start() if end else n].rstrip()
+            if _NUMBER.fullmatch(token):
+                out.append(token)
+            elif token in _LITERALS:
+                out.append(_LITERALS[token])
+                repaired = repaired or token != _LITERALS[token]
+            else:
+                # e.g. UNSAFE, UNSAFE - knee risk, 1/2 bodyweight: keep the text
+                out.append(json.dumps(token))
+                repaired = True
+            expect_value = False
+            i += len(token)
+            continue
+
+        # ---- Barewords: literals and unquoted keys ---- #
+        elif ch.isalpha() or ch == "_":
+            j = i
+            while j < n and (text[j].isalnum() or text[j] == "_"):
+                j += 1
+            word = text[i:j]
+            k = j
+            while k < n and text[k] in " \t":
+                k += 1
+            if k < n and text[k] == ":":
+                out.append(json.dumps(word))
+                repaired = True
+            elif word in _LITERALS:
+                out.append(_LITERALS[word])
+                repaired = repaired or word != _LITERALS[word]
+            else:
+                out.append(json.dumps(word))
+                repaired = True
+            i = j
+            continue
+        else:
+            out.append(ch)
+
+        i += 1
+
+    # ---- Truncated output: close what is open ---- #
+    if not stack:
+        raise JSONExtractionError("No JSON object found")
+
+    if quote:
+        if escape:
+            out.pop()
+        out.append('"')
+
+    closed = _close(out, stack)
+    try:
+        json.loads(closed)
+        return closed, True, True, n
+    except json.JSONDecodeError:
+        pass
+
+    # Fall back to the last clean value boundary
+    if safe_cut is None:
+        raise JSONExtractionError("Truncated JSON could not be salvaged")
+    length, open_stack = safe_cut
+    return _close(out[:length], open_stack), True, True, n
+
+
+def _closes_string(text: str, j: int) -> bool:
+    """
+    Whether a double quote just before index j ends its string: only if a
+    delimiter follows. Otherwise it is an unescaped quote inside the text,
+    as in "Use a "neutral" grip".
+    """
+    while j < len(text) and text[j] in " \t\r":
+        j += 1
+    return j >= len(text) or text[j] in ",:}]\n/"
+
+
+def _drop_trailing_comma(out: list[str]) -> bool:
+    """Remove a trailing comma (ignoring whitespace) before a closing bracket."""
+    j = len(out) - 1
+    while j >= 0 and out[j].isspace():
+        j -= 1
+    if j >= 0 and out[j] == ",":
+        del out[j]
+        return True
+    return False
+
+
+def _close(out: list[str], stack: list[str]) -> str:
+    """Terminate partial output by dropping dangling tokens and closing containers."""
+    text = "".join(out).rstrip()
+    # A key with no value yet, or a dangling comma/colon
+    while text and text[-1] in ",:":
+        text = text[:-1].rstrip()
+        if text.endswith('"') and text[-2:] != '\\"' and _ends_with_key(text):
+            text = text[: _string_start(text)].rstrip()
+    return text + "".join(reversed(stack))
+
+
+def _string_start(text: str) -> int:
+    """Index of the opening quote of the string literal ending text."""
+    j = len(text) - 2
+    while j >= 0:
+        if text[j] == '"' and (j == 0 or text[j - 1] != "\\"):
+            return j
+        j -= 1
+    return 0
+
+
+def _ends_with_key(text: str) -> bool:
+    """True if the trailing string literal sits in key position ({ or , before it)."""
+    before = text[: _string_start(text)].rstrip()
+    return bool(before) and before[-1] in "{,"
+
+
+def parse_llm_json(text: str) -> Extraction:
+    """
+    Extract the first JSON object from raw LLM output.
+
+    Args:
+        text: Raw model response (may include prose, fences, or be truncated)
+
+    Returns:
+        Extraction with the parsed value and repair flags
+
+    Raises:
+        JSONExtractionError: If no object can be recovered
+    """
+    if not text:
+        raise JSONExtractionError("Empty response")
+
+    # Fast path: already valid JSON
+    stripped = text.strip()
+    if stripped.startswith("{"):
+        try:
+            return Extraction(json.loads(stripped), end=len(text))
+        except json.JSONDecodeError:
+            pass
+
+    # The object serialized a second time, as one JSON string
+    if stripped.startswith('"'):
+        try:
+            inner = json.loads(stripped)
+        except json.JSONDecodeError:
+            inner = None
+        if isinstance(inner, str) and "{" in inner:
+            result = parse_llm_json(inner)
+            return Extraction(result.value, repaired=True, salvaged=result.salvaged,
+                              restarted=result.restarted, end=len(text))
+
+    return _parse_from(text, text.find("{"))
+
+
+def _parse_from(text: str, start: int) -> Extraction:
+    """First top-level object that parses, scanning from the brace at start."""
+    last_error = None
+    for attempt in range(MAX_CANDIDATES):
+        if start == -1:
+            break
+        try:
+            candidate, repaired, salvaged, end = _scan(text, start)
+        except JSONExtractionError as e:
+            # The object ran to the end of the text; nothing follows it
+            last_error = e
+            break
+        try:
+            return Extraction(json.loads(candidate), repaired=repaired, salvaged=salvaged,
+                              restarted=attempt > 0, end=end)
+        except json.JSONDecodeError as e:
+            last_error = e
+        # Resume after the failed object: the objects nested in it (e.g. one
+        # exercise of a plan) are not answers on their own
+        start = text.find("{", end)
+
+    raise JSONExtractionError(f"No valid JSON object in LLM output: {last_error or 'no opening brace'}")
+
+
+def parse_llm_json_all(text: str) -> list[Extraction]:
+    """
+    Every top-level JSON object in the text, in order (at most MAX_CANDIDATES).
+
+    Lets callers notice responses that echo an example object before the
+    answer, or give several answers.
+
+    Raises:
+        JSONExtractionError: If no object can be recovered
+    """
+    found = [parse_llm_json(text)]
+    while len(found) < MAX_CANDIDATES:
+        start = text.find("{", found[-1].end)
+        if start == -1:
+            break
+        try:
+            found.append(_parse_from(text, start))
+        except JSONExtractionError:
+            break
+    return found
+
+
+def extract_json(text: str) -> Any:
+    """Convenience wrapper returning only the parsed value."""
+    return parse_llm_json(text).value
@@ -0,0 +1,312 @@
+"""
+Ollama Keep-Alive
+Ollama unloads a model once it has been idle for its keep_alive duration,
+and the next request pays the full model load (seconds on CPU). A
+background scheduler pings each configured model on every backend before
+that happens, while traffic is expected: during business hours, or for a
+while after the last request.
+
+A ping is an empty /api/generate (load only, no tokens). Both sides are
+measured: a ping that took long found the model evicted and absorbed a
+cold load a user request would otherwise have paid; a user request whose
+response reports a long load_duration is a cold load the scheduler did
+not prevent. The load-only response has no timings, so pings are timed
+by wall clock.
+"""
+
+import asyncio
+import json
+import math
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Awaitable, Callable, Optional
+
+
+OLLAMA_KEEPALIVE_ENABLED = os.getenv("OLLAMA_KEEPALIVE_ENABLED", "true").lower() in ("1", "true", "yes")
+# Ping a model after it has been idle this long; keep well below OLLAMA_KEEP_ALIVE
+OLLAMA_KEEPALIVE_INTERVAL_SECONDS = float(os.getenv("OLLAMA_KEEPALIVE_INTERVAL_SECONDS", "600"))
+# Keep pinging for this long after the last request (0 = only during business hours)
+OLLAMA_KEEPALIVE_IDLE_SECONDS = float(os.getenv("OLLAMA_KEEPALIVE_IDLE_SECONDS", "3600"))
+# Business hours in server local time, e.g. "8-20" (empty = none) and the days they apply to
+OLLAMA_KEEPALIVE_HOURS = os.getenv("OLLAMA_KEEPALIVE_HOURS", "")
+OLLAMA_KEEPALIVE_DAYS = os.getenv("OLLAMA_KEEPALIVE_DAYS", "mon-fri")
+# Extra models to keep loaded besides OLLAMA_MODEL (comma-separated)
+OLLAMA_KEEPALIVE_MODELS = os.getenv("OLLAMA_KEEPALIVE_MODELS", "")
+# A load (request load_duration or ping wall-clock time) above this means the model was not resident
+OLLAMA_COLD_LOAD_MS = float(os.getenv("OLLAMA_COLD_LOAD_MS", "1000"))
+
+WEEKDAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+
+
+# ============= Schedule ============= #
+
+def parse_hours(spec: str) -> Optional[tuple[int, int]]:
+    """"8-20" -> (8, 20); start > end wraps past midnight. None for an empty spec."""
+    if not spec.strip():
+        return None
+    try:
+        start, end = (int(part) for part in spec.split("-"))
+    except ValueError:
+        raise ValueError(f"Invalid OLLAMA_KEEPALIVE_HOURS {spec!r} (expected e.g. '8-20')") from None
+    if not (0 <= start <= 24 and 0 <= end <= 24):
+        raise ValueError(f"Invalid OLLAMA_KEEPALIVE_HOURS {spec!r} (hours are 0-24)")
+    return start, end
+
+
+def parse_days(spec: str) -> frozenset:
+    """"mon-fri" / "mon,wed,sat" -> weekday numbers (Monday = 0)."""
+    days = set()
+    for part in spec.lower().split(","):
+        part = part.strip()
+        if not part:
+            continue
+        first, _, last = part.partition("-")
+        if first not in WEEKDAYS or (last and last not in WEEKDAYS):
+            raise ValueError(f"Invalid OLLAMA_KEEPALIVE_DAYS {spec!r} (expected e.g. 'mon-fri')")
+        start = WEEKDAYS.index(first)
+        end = WEEKDAYS.index(last or first)
+        days.update(day % 7 for day in range(start, end + 1 if end >= start else end + 8))
+    return frozenset(days)
+
+
+def in_hours(now: datetime, hours: Optional[tuple[int, int]], days: frozenset) -> bool:
+    if hours is None:
+        return False
+    start, end = hours
+    if start <= end:
+        return now.weekday() in days and start <= now.hour < end
+    # Overnight window: the hours after midnight belong to the previous day's shift
+    if now.hour >= start:
+        return now.weekday() in days
+    return now.hour < end and (now.weekday() - 1) % 7 in days
+
+
+def keepalive_models(model: str) -> list[str]:
+    """The served model plus OLLAMA_KEEPALIVE_MODELS, without duplicates."""
+    extra = [m.strip() for m in OLLAMA_KEEPALIVE_MODELS.split(",") if m.strip()]
+    return list(dict.fromkeys([model, *extra]))
+
+
+# ============= Activity ============= #
+
+class ModelActivity:
+    """
+    Per backend and model: when it was last used and how long Ollama took
+    to load it, from user requests and keep-alive pings.
+    """
+
+    def __init__(self, cold_load_ms: float = OLLAMA_COLD_LOAD_MS, clock: Callable[[], float] = time.monotonic):
+        self.cold_load_ms = cold_load_ms
+        self._clock = clock
+        # Written from the event loop and from sync graph threads
+        self._lock = threading.Lock()
+        self._models: dict[tuple[str, str], dict] = {}
+        self.last_request: Optional[float] = None
+        self.requests = 0
+        self.cold_loads = 0
+
+    def _entry(self, backend_url: str, model: str) -> dict:
+        return self._models.setdefault((backend_url, model), {
+            "last_request": None, "last_ping": None, "last_load_ms": None, "requests": 0, "cold_loads": 0,
+        })
+
+    def record_request(self, backend_url: str, model: str, load_ms: Optional[float]):
+        """A user request finished; load_ms is the response's load_duration."""
+        with self._lock:
+            now = self._clock()
+            entry = self._entry(backend_url, model)
+            entry["last_request"] = self.last_request = now
+            entry["requests"] += 1
+            self.requests += 1
+            if load_ms is not None:
+                entry["last_load_ms"] = load_ms
+                if load_ms >= self.cold_load_ms:
+                    entry["cold_loads"] += 1
+                    self.cold_loads += 1
+
+    def record_ping(self, backend_url: str, model: str, load_ms: float):
+        with self._lock:
+            entry = self._entry(backend_url, model)
+            entry["last_ping"] = self._clock()
+            entry["last_load_ms"] = load_ms
+
+    def idle_seconds(self, backend_url: str, model: str) -> float:
+        """Seconds since the model was last requested or pinged (inf if never)."""
+        with self._lock:
+            entry = self._models.get((backend_url, model), {})
+            used = [t for t in (entry.get("last_request"), entry.get("last_ping")) if t is not None]
+            return self._clock() - max(used) if used else math.inf
+
+    def since_last_request(self) -> float:
+        with self._lock:
+            return math.inf if self.last_request is None else self._clock() - self.last_request
+
+    def stats(self) -> dict:
+        with self._lock:
+            now = self._clock()
+
+            def age(t):
+                return round(now - t, 1) if t is not None else None
+
+            return {
+                "requests": self.requests,
+                "cold_loads": self.cold_loads,
+                "cold_load_ms": self.cold_load_ms,
+                "models": [
+                    {
+                        "backend": backend_url,
+                        "model": model,
+                        "requests": entry["requests"],
+                        "cold_loads": entry["cold_loads"],
+                        "last_request_age_s": age(entry["last_request"]),
+                        "last_ping_age_s": age(entry["last_ping"]),
+                        "last_load_ms": entry["last_load_ms"],
+                    }
+                    for (backend_url, model), entry in sorted(self._models.items())
+                ],
+            }
+
+
+_activity: Optional[ModelActivity] = None
+
+
+def get_model_activity() -> ModelActivity:
+    """Process-wide activity shared by every Ollama model built in app.providers."""
+    global _activity
+    if _activity is None:
+        _activity = ModelActivity()
+    return _activity
+
+
+def load_ms(response_body: dict) -> Optional[float]:
+    """Ollama's load_duration (nanoseconds) in milliseconds, if reported."""
+    load_duration = response_body.get("load_duration")
+    return load_duration / 1e6 if isinstance(load_duration, (int, float)) else None
+
+
+def record_ollama_response(backend_url: str, model: str, final_line) -> None:
+    """Record a finished user request from the last line of its Ollama stream."""
+    try:
+        body = json.loads(final_line) if final_line else {}
+    except ValueError:
+        body = {}
+    get_model_activity().record_request(backend_url, model, load_ms(body) if isinstance(body, dict) else None)
+
+
+# ============= Scheduler ============= #
+
+class KeepAliveScheduler:
+    """
+    Pings every (backend, model) that has been idle for interval_seconds,
+    while traffic is expected.
+
+    ping is an async (backend_url, model) -> load time in ms (wall clock;
+    see app.providers.ping_ollama). The loop
+    checks every half interval, so a model is pinged at most 1.5 intervals
+    after its last use.
+    """
+
+    def __init__(
+        self,
+        backends: list[str],
+        models: list[str],
+        ping: Callable[[str, str], Awaitable[float]],
+        interval_seconds: float = OLLAMA_KEEPALIVE_INTERVAL_SECONDS,
+        idle_seconds: float = OLLAMA_KEEPALIVE_IDLE_SECONDS,
+        hours: Optional[tuple[int, int]] = None,
+        days: Optional[frozenset] = None,
+        activity: Optional[ModelActivity] = None,
+        now: Callable[[], datetime] = datetime.now,
+    ):
+        self.backends = backends
+        self.models = models
+        self.ping = ping
+        self.interval_seconds = interval_seconds
+        self.idle_seconds = idle_seconds
+        self.hours = hours if hours is not None else parse_hours(OLLAMA_KEEPALIVE_HOURS)
+        self.days = days if days is not None else parse_days(OLLAMA_KEEPALIVE_DAYS)
+        self.activity = activity or get_model_activity()
+        self._now = now
+        self._task: Optional[asyncio.Task] = None
+
+        self.pings = 0
+        self.ping_failures = 0
+        self.cold_loads_avoided = 0  # Pings that found the model evicted and reloaded it
+        self.skipped_recent = 0  # Models already kept warm by traffic
+        self.inactive_checks = 0  # Checks outside hours with no recent traffic
+        self.last_error: Optional[str] = None
+
+    def active(self) -> bool:
+        """Traffic expected: within business hours or soon after a request."""
+        return (
+            in_hours(self._now(), self.hours, self.days)
+            or self.activity.since_last_request() < self.idle_seconds
+        )
+
+    async def tick(self) -> int:
+        """One check: ping the idle models if traffic is expected. Returns pings sent."""
+        if not self.active():
+            self.inactive_checks += 1
+            return 0
+        due = []
+        for backend_url in self.backends:
+            for model in self.models:
+                if self.activity.idle_seconds(backend_url, model) >= self.interval_seconds:
+                    due.append((backend_url, model))
+                else:
+                    self.skipped_recent += 1
+        await asyncio.gather(*(self._ping(backend_url, model) for backend_url, model in due))
+        return len(due)
+
+    async def _ping(self, backend_url: str, model: str):
+        self.pings += 1
+        try:
+            load = await self.ping(backend_url, model)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.ping_failures += 1
+            self.last_error = f"{backend_url} {model}: {type(e).__name__}: {e}"
+            print(f"[WARNING] Keep-alive ping failed: {self.last_error}")
+            return
+        self.activity.record_ping(backend_url, model, load)
+        if load >= self.activity.cold_load_ms:
+            self.cold_loads_avoided += 1
+            print(f"[INFO] Keep-alive reloaded evicted model {model} on {backend_url} ({load:.0f}ms)")
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval_seconds / 2)
+            await self.tick()
+
+    def start(self) -> Optional[asyncio.Task]:
+        if not OLLAMA_KEEPALIVE_ENABLED:
+            return None
+        self._task = asyncio.create_task(self._run())
+        return self._task
+
+    def cancel(self):
+        if self._task:
+            self._task.cancel()
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self._task is not None,
+            "active": self.active(),
+            "interval_seconds": self.interval_seconds,
+            "idle_seconds": self.idle_seconds,
+            "business_hours": (
+                {"hours": f"{self.hours[0]}-{self.hours[1]}", "days": [WEEKDAYS[d] for d in sorted(self.days)]}
+                if self.hours else None
+            ),
+            "models": self.models,
+            "pings": self.pings,
+            "ping_failures": self.ping_failures,
+            "cold_loads_avoided": self.cold_loads_avoided,
+            "skipped_recent": self.skipped_recent,
+            "inactive_checks": self.inactive_checks,
+            "last_error": self.last_error,
+            "activity": self.activity.stats(),
+        }
@@ -0,0 +1,107 @@
+"""
+One-Time Schema Setup
+Creates the application tables and the LangGraph checkpoint tables once per
+deployment instead of once per process. Setup runs under a Postgres
+advisory lock, so API workers, plan workers and pods that start together
+take turns instead of racing on CREATE TABLE / CREATE INDEX CONCURRENTLY;
+whoever comes second finds everything in place and returns quickly.
+
+The production entry point (app/serve.py) runs setup once before forking
+its workers and sets SCHEMA_SETUP_DONE, so the workers skip it entirely.
+"""
+
+import os
+from contextlib import contextmanager
+from typing import Optional
+
+from sqlalchemy import text
+
+
+# Arbitrary key shared by every process of this app (pg_advisory_lock takes a bigint)
+SCHEMA_SETUP_LOCK_ID = 720_415_001
+SCHEMA_SETUP_DONE_ENV = "SCHEMA_SETUP_DONE"
+
+
+def schema_setup_done() -> bool:
+    """True in processes started after setup already ran (see app/serve.py)."""
+    return os.getenv(SCHEMA_SETUP_DONE_ENV, "").lower() in ("1", "true", "yes")
+
+
+@contextmanager
+def advisory_lock(engine, lock_id: int = SCHEMA_SETUP_LOCK_ID):
+    """
+    Hold a session-level Postgres advisory lock for the block.
+
+    Blocks until other holders release it. No-op on other databases
+    (SQLite in tests and local runs).
+    """
+    if engine.dialect.name != "postgresql":
+        yield
+        return
+    with engine.connect() as conn:
+        conn.execute(text("SELECT pg_advisory_lock(:id)"), {"id": lock_id})
+        try:
+            yield
+        finally:
+            conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": lock_id})
+
+
+@contextmanager
+def try_advisory_lock(engine, lock_id: int):
+    """
+    Try to take a session-level Postgres advisory lock for the block.
+
+    Yields False without waiting when another session holds it, so periodic
+    jobs run in one process at a time. Always True on other databases.
+    """
+    if engine.dialect.name != "postgresql":
+        yield True
+        return
+    with engine.connect() as conn:
+        locked = conn.execute(text("SELECT pg_try_advisory_lock(:id)"), {"id": lock_id}).scalar()
+        try:
+            yield bool(locked)
+        finally:
+            if locked:
+                conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": lock_id})
+
+
+def setup_checkpoint_tables(postgres_url: str) -> bool:
+    """Run the LangGraph saver migrations on one short-lived connection."""
+    try:
+        import psycopg
+        from langgraph.checkpoint.postgres import PostgresSaver
+        from app.checkpoint_pool import CONNECTION_KWARGS
+
+        with psycopg.connect(postgres_url, **CONNECTION_KWARGS) as conn:
+            PostgresSaver(conn).setup()
+        return True
+    except Exception as e:
+        # Same policy as the checkpointer factories: run without persistence
+        print(f"[ERROR] Failed to set up checkpoint tables: {e}")
+        return False
+
+
+def setup_schema(postgres_url: Optional[str] = None) -> bool:
+    """
+    Create the application tables and, with POSTGRES_URL set, the checkpoint
+    tables, under SCHEMA_SETUP_LOCK_ID.
+
+    Args:
+        postgres_url: Checkpoint database; defaults to POSTGRES_URL
+
+    Returns:
+        False if skipped because SCHEMA_SETUP_DONE is set, else True
+    """
+    if schema_setup_done():
+        print("[INFO] Schema setup already done by the parent process; skipping")
+        return False
+
+    from app.database import engine, init_database
+
+    url = postgres_url or os.getenv("POSTGRES_URL")
+    with advisory_lock(engine):
+        init_database()
+        if url:
+            setup_checkpoint_tables(url)
+    return True
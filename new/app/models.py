@@ -3,7 +3,7 @@ Database Models for AI Personal Trainer
 SQLAlchemy models for PostgreSQL
 """
 
-from sqlalchemy import Column, Integer, String, Float, Text, DateTime, Boolean, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, Float, Text, DateTime, Boolean, ForeignKey, JSON, UniqueConstraint
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -108,3 +108,67 @@ class LLMMetrics(Base):
     error_message = Column(Text, nullable=True)
     revision_count = Column(Integer, nullable=True)
     safety_triggered = Column(Boolean, default=False)
+    llm_calls_saved = Column(Integer, default=0)  # Critique calls skipped by fast paths
+    llm_calls_wasted = Column(Integer, default=0)  # Speculative candidates not chosen
+
+
+class PlanCacheEntry(Base):
+    """Shared cache of generated plans keyed on the normalized request hash."""
+    __tablename__ = "plan_cache"
+    
+    cache_key = Column(String(128), primary_key=True)
+    value = Column(JSON, nullable=False)  # {workout_plan, critique, revision_count}
+    expires_at = Column(DateTime, nullable=False, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class ExerciseVerdict(Base):
+    """Physiotherapist verdict for one exercise against one injury type and severity."""
+    __tablename__ = "exercise_verdicts"
+    __table_args__ = (
+        UniqueConstraint("exercise", "injury_type", "severity", name="uq_exercise_verdict"),
+    )
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    exercise = Column(String(100), nullable=False)  # Normalized exercise name
+    injury_type = Column(String(100), nullable=False)  # Normalized injury type
+    severity = Column(String(20), nullable=False)  # minor, moderate, severe
+    verdict = Column(String(20), nullable=False)  # SAFE or UNSAFE
+    feedback = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+
+class PlanJob(Base):
+    """Queued plan generation request, claimed and run by app.worker processes."""
+    __tablename__ = "plan_jobs"
+    
+    id = Column(String(36), primary_key=True)  # UUID
+    status = Column(String(20), nullable=False, default="queued", index=True)  # queued, running, succeeded, failed
+    request = Column(JSON, nullable=False)  # WorkoutRequest
+    result = Column(JSON, nullable=True)  # PlanResponse
+    error = Column(Text, nullable=True)
+    attempts = Column(Integer, default=0)
+    worker_id = Column(String(100), nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)  # Running jobs past this are reclaimed
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+
+class NodeSpan(Base):
+    """Latency of one graph node or checkpoint operation within a plan request."""
+    __tablename__ = "node_spans"
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    request_id = Column(String(36), nullable=False, index=True)  # Groups the spans of one graph run
+    thread_id = Column(String(100), nullable=True)
+    endpoint = Column(String(50), nullable=True)
+    node = Column(String(50), nullable=False, index=True)  # draft_plan, critique_plan, checkpoint.put, ...
+    revision = Column(Integer, nullable=True)  # Plan revision drafted or reviewed
+    started_at = Column(DateTime, default=datetime.utcnow, index=True)
+    wall_ms = Column(Float, nullable=False)
+    llm_ms = Column(Float, nullable=True)
+    parse_ms = Column(Float, nullable=True)
+    prompt_tokens = Column(Integer, nullable=True)  # Estimated prompt size (system + user)
+    success = Column(Boolean, default=True)
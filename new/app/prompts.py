@@ -1,8 +1,167 @@
 """
 Centralized Prompt Templates
 Maintains all LLM prompts for version control and A/B testing.
+
+Prompts are compiled from named sections. Rendered sections are memoized
+(a revision re-renders nothing that did not change), system prompts are
+constants so the provider sees a byte-identical prefix on every call, and
+each prompt is fitted to a token budget before it is sent.
 """
 
+import functools
+import math
+import os
+from dataclasses import dataclass, field
+
+
+# Token budget for one prompt (system + user). Ollama's default context is
+# 2048 tokens and the plan JSON needs room too.
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "1500"))
+
+# Injury notes are cut to about this many tokens when over budget
+PROMPT_NOTE_MAX_TOKENS = int(os.getenv("PROMPT_NOTE_MAX_TOKENS", "40"))
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count (~4 characters per token for English BPE vocabularies)."""
+    return math.ceil(len(text) / 4) if text else 0
+
+
+@dataclass
+class CompiledPrompt:
+    """A system + user prompt pair with per-section token accounting."""
+    system: str
+    sections: dict[str, str]
+    dropped_injuries: int = 0  # Inactive injuries left out to fit the budget
+    truncated_notes: int = 0  # Injury notes shortened or removed
+    over_budget: bool = False  # Still over budget after every reduction
+    budget: int = PROMPT_TOKEN_BUDGET
+    section_tokens: dict[str, int] = field(init=False)
+
+    def __post_init__(self):
+        self.section_tokens = {"system": estimate_tokens(self.system)}
+        self.section_tokens.update({name: estimate_tokens(text) for name, text in self.sections.items()})
+
+    @property
+    def user(self) -> str:
+        return "".join(self.sections.values())
+
+    @property
+    def tokens(self) -> int:
+        return sum(self.section_tokens.values())
+
+    def report(self) -> str:
+        """One-line size summary for logs."""
+        parts = ", ".join(f"{name} {tokens}" for name, tokens in self.section_tokens.items())
+        return f"~{self.tokens}/{self.budget} tokens ({parts})"
+
+
+# ============= Shared Formatting ============= #
+
+@functools.lru_cache(maxsize=4096)
+def _injury_line(injury_type: str, injury_date, severity: str, notes) -> str:
+    return (
+        f"- {injury_type} on {injury_date} (Severity: {severity})"
+        + (f"\n  Notes: {notes}" if notes else "")
+    )
+
+
+def _summarize_note(note: str, max_tokens: int) -> str:
+    """First sentence of a note, cut at a word boundary if still too long."""
+    summary = note.strip().split(". ")[0].strip()
+    max_chars = max_tokens * 4
+    if len(summary) > max_chars:
+        summary = summary[:max_chars].rsplit(" ", 1)[0].rstrip(",;:") + "…"
+    return summary
+
+
+# Reductions applied in order until the injury section fits the budget
+_FULL, _ACTIVE_ONLY, _SHORT_NOTES, _NO_NOTES = range(4)
+
+
+def _injuries_key(injury_history: list[dict]) -> tuple:
+    return tuple(
+        (
+            inj["injury_type"],
+            inj.get("injury_date", "unknown date"),
+            inj["severity"],
+            inj.get("notes") or None,
+            inj.get("is_active") is not False,
+        )
+        for inj in injury_history
+    )
+
+
+@functools.lru_cache(maxsize=1024)
+def _injury_section(key: tuple, level: int = _FULL, note_max_tokens: int = PROMPT_NOTE_MAX_TOKENS) -> tuple[str, int, int]:
+    """
+    Render the injury list at a reduction level.
+
+    Returns:
+        (text, dropped injuries, truncated notes)
+    """
+    if not key:
+        return "None reported", 0, 0
+
+    injuries = [inj for inj in key if level == _FULL or inj[4]]
+    dropped = len(key) - len(injuries)
+    lines, truncated = [], 0
+    for injury_type, injury_date, severity, notes, _ in injuries:
+        if notes and level == _NO_NOTES:
+            notes, truncated = None, truncated + 1
+        elif notes and level == _SHORT_NOTES:
+            short = _summarize_note(notes, note_max_tokens)
+            if short != notes:
+                notes, truncated = short, truncated + 1
+        lines.append(_injury_line(injury_type, injury_date, severity, notes))
+    if dropped:
+        lines.append(f"- ({dropped} recovered injur{'y' if dropped == 1 else 'ies'} omitted)")
+    return "\n".join(lines), dropped, truncated
+
+
+def format_injury_history(injury_history: list[dict]) -> str:
+    """Render injury history as a bullet list for prompts."""
+    return _injury_section(_injuries_key(injury_history))[0]
+
+
+def _fit_injuries(injury_history: list[dict], used_tokens: int, budget: int, template: str) -> tuple[str, int, int, bool]:
+    """
+    Injury section for a prompt whose other sections use used_tokens.
+
+    Inactive injuries are dropped first, then long notes are shortened to
+    their first sentence, then notes are removed. Active injuries are never
+    dropped: the critique must see them, so the prompt may stay over budget.
+
+    Returns:
+        (section text, dropped injuries, truncated notes, over budget)
+    """
+    key = _injuries_key(injury_history)
+    for level in (_FULL, _ACTIVE_ONLY, _SHORT_NOTES, _NO_NOTES):
+        text, dropped, truncated = _injury_section(key, level)
+        section = template.format(injury_text=text)
+        if used_tokens + estimate_tokens(section) <= budget:
+            return section, dropped, truncated, False
+    return section, dropped, truncated, True
+
+
+def _compile(system: str, before: dict, injury_template: str, after: dict, injury_history: list[dict], budget: int) -> CompiledPrompt:
+    """Assemble sections around a budget-fitted injury section."""
+    used = estimate_tokens(system) + sum(estimate_tokens(text) for text in (*before.values(), *after.values()))
+    injuries, dropped, truncated, over = _fit_injuries(injury_history, used, budget, injury_template)
+    return CompiledPrompt(
+        system=system,
+        sections={**before, "injuries": injuries, **after},
+        dropped_injuries=dropped,
+        truncated_notes=truncated,
+        over_budget=over,
+        budget=budget,
+    )
+
+
+def _equipment(user_profile: dict) -> str:
+    return ', '.join(user_profile.get('equipment_available', ['None specified']))
+
+
 # ============= Workout Plan Drafting ============= #
 
 DRAFT_PLAN_SYSTEM_PROMPT = """You are an expert personal trainer with 15+ years of experience in strength training, hypertrophy, and athletic performance.
@@ -16,42 +175,52 @@ Your expertise includes:
 You create science-based, practical workout plans tailored to individual needs."""
 
 
-def get_draft_plan_prompt(user_profile: dict, injury_history: list[dict], critique: dict = None) -> str:
-    """
-    Generate the prompt for drafting a workout plan.
-    
-    Args:
-        user_profile: User's goals, fitness level, equipment
-        injury_history: List of past injuries
-        critique: If this is a revision, the physiotherapist's feedback
-    
-    Returns:
-        Complete prompt for the trainer LLM
-    """
-    
-    # Format injury history for readability
-    injury_text = "None reported" if not injury_history else "\n".join([
-        f"- {inj['injury_type']} on {inj.get('injury_date', 'unknown date')} (Severity: {inj['severity']})"
-        + (f"\n  Notes: {inj['notes']}" if inj.get('notes') else "")
-        for inj in injury_history
-    ])
-    
-    # Base prompt
-    prompt = f"""Create a detailed workout plan for a user with the following profile:
-
-**Goals:** {user_profile.get('goals', 'General fitness')}
-**Fitness Level:** {user_profile.get('fitness_level', 'beginner')}
-**Weight:** {user_profile.get('weight', 'Not provided')} kg
-**Age:** {user_profile.get('age', 'Not provided')}
-**Equipment Available:** {', '.join(user_profile.get('equipment_available', ['None specified']))}
-
-**Injury History:**
-{injury_text}
+# Output format instructions
+DRAFT_PLAN_INSTRUCTIONS = """
+
+Return ONLY a valid JSON object with this exact structure (no markdown, no extra text):
+
+{
+    "name": "Plan name (e.g., 'Upper Body Hypertrophy - Week 1')",
+    "frequency": "Training frequency (e.g., '3x per week', 'Mon/Wed/Fri')",
+    "exercises": [
+        {
+            "name": "Exercise name",
+            "sets": 3,
+            "reps": "8-12",
+            "weight_kg": 50.0,
+            "rest_seconds": 90,
+            "notes": "Form cues or modifications"
+        }
+    ],
+    "warm_up": "5-10 min dynamic stretching, light cardio",
+    "cool_down": "Stretch major muscle groups for 5-10 min",
+    "progression_notes": "Increase weight by 2.5kg when all sets hit top rep range"
+}
+
+Ensure the plan is:
+- Specific to the user's goals
+- Appropriate for their fitness level
+- Compatible with their injury history
+- Balanced and sustainable
 """
-    
-    # Add revision guidance if this is a critique loop
-    if critique and critique.get('status') == 'UNSAFE':
-        prompt += f"""
+
+
+@functools.lru_cache(maxsize=1024)
+def _draft_profile_section(goals, fitness_level, weight, age, equipment: str) -> str:
+    return f"""Create a detailed workout plan for a user with the following profile:
+
+**Goals:** {goals}
+**Fitness Level:** {fitness_level}
+**Weight:** {weight} kg
+**Age:** {age}
+**Equipment Available:** {equipment}
+
+"""
+
+
+def _revision_guidance(critique: dict) -> str:
+    return f"""
 
 ⚠️ **IMPORTANT - REVISION REQUIRED:**
 The previous plan was flagged as UNSAFE by our physiotherapist. You MUST address the following concerns:
@@ -65,38 +234,170 @@ Please revise the plan to:
 2. Replace them with safer alternatives that still meet the user's goals
 3. Ensure all movements are compatible with the injury history
 """
-    
-    # Output format instructions
-    prompt += """
 
-Return ONLY a valid JSON object with this exact structure (no markdown, no extra text):
+
+def compile_draft_prompt(
+    user_profile: dict,
+    injury_history: list[dict],
+    critique: dict = None,
+    budget: int = PROMPT_TOKEN_BUDGET,
+) -> CompiledPrompt:
+    """
+    Compile the trainer prompt for drafting a workout plan.
+
+    Args:
+        user_profile: User's goals, fitness level, equipment
+        injury_history: List of past injuries
+        critique: If this is a revision, the physiotherapist's feedback
+        budget: Token budget for system + user prompt
+
+    Returns:
+        CompiledPrompt with DRAFT_PLAN_SYSTEM_PROMPT as the system prompt
+    """
+    profile = _draft_profile_section(
+        user_profile.get('goals', 'General fitness'),
+        user_profile.get('fitness_level', 'beginner'),
+        user_profile.get('weight', 'Not provided'),
+        user_profile.get('age', 'Not provided'),
+        _equipment(user_profile),
+    )
+
+    # Add revision guidance if this is a critique loop
+    after = {}
+    if critique and critique.get('status') == 'UNSAFE':
+        after["revision"] = _revision_guidance(critique)
+    after["instructions"] = DRAFT_PLAN_INSTRUCTIONS
+
+    return _compile(
+        DRAFT_PLAN_SYSTEM_PROMPT, {"profile": profile}, "**Injury History:**\n{injury_text}\n", after,
+        injury_history, budget,
+    )
+
+
+def get_draft_plan_prompt(user_profile: dict, injury_history: list[dict], critique: dict = None) -> str:
+    """
+    Generate the prompt for drafting a workout plan.
+
+    Args:
+        user_profile: User's goals, fitness level, equipment
+        injury_history: List of past injuries
+        critique: If this is a revision, the physiotherapist's feedback
+
+    Returns:
+        Complete prompt for the trainer LLM
+    """
+    return compile_draft_prompt(user_profile, injury_history, critique).user
+
+
+# ============= Targeted Revision ============= #
+
+REVISION_INSTRUCTIONS = """Return ONLY a valid JSON object with one replacement per flagged exercise, in the same order (no markdown, no extra text):
 
 {
-    "name": "Plan name (e.g., 'Upper Body Hypertrophy - Week 1')",
-    "frequency": "Training frequency (e.g., '3x per week', 'Mon/Wed/Fri')",
     "exercises": [
         {
             "name": "Exercise name",
             "sets": 3,
             "reps": "8-12",
-            "weight_kg": 50.0,
+            "weight_kg": 20.0,
             "rest_seconds": 90,
             "notes": "Form cues or modifications"
         }
-    ],
-    "warm_up": "5-10 min dynamic stretching, light cardio",
-    "cool_down": "Stretch major muscle groups for 5-10 min",
-    "progression_notes": "Increase weight by 2.5kg when all sets hit top rep range"
+    ]
 }
 
-Ensure the plan is:
-- Specific to the user's goals
-- Appropriate for their fitness level
-- Compatible with their injury history
-- Balanced and sustainable
+Each replacement must train a similar muscle group and be compatible with the injury history.
 """
-    
-    return prompt
+
+
+@functools.lru_cache(maxsize=1024)
+def _revision_profile_section(goals, fitness_level, equipment: str) -> str:
+    return f"""Revise an existing workout plan. Our physiotherapist flagged some exercises as UNSAFE; replace ONLY those.
+
+**Goals:** {goals}
+**Fitness Level:** {fitness_level}
+**Equipment Available:** {equipment}
+
+"""
+
+
+def compile_revision_prompt(
+    user_profile: dict,
+    injury_history: list[dict],
+    kept_exercises: list[dict],
+    flagged_exercises: list[dict],
+    critique: dict,
+    budget: int = PROMPT_TOKEN_BUDGET,
+) -> CompiledPrompt:
+    """
+    Compile the trainer prompt for a targeted revision.
+
+    Only the flagged exercises are replaced; the rest of the plan is kept
+    as-is, so the prompt and the expected output are much smaller than a
+    full redraft.
+
+    Args:
+        user_profile: User's goals, fitness level, equipment
+        injury_history: List of past injuries
+        kept_exercises: Exercises the physiotherapist did not flag
+        flagged_exercises: Exercises to replace
+        critique: The physiotherapist's UNSAFE critique
+        budget: Token budget for system + user prompt
+
+    Returns:
+        CompiledPrompt with DRAFT_PLAN_SYSTEM_PROMPT as the system prompt
+    """
+    profile = _revision_profile_section(
+        user_profile.get('goals', 'General fitness'),
+        user_profile.get('fitness_level', 'beginner'),
+        _equipment(user_profile),
+    )
+
+    flagged_text = "\n".join([
+        f"- {ex.get('name', 'Unknown')} - {ex.get('sets', '?')} sets x {ex.get('reps', '?')} reps"
+        for ex in flagged_exercises
+    ])
+    kept_text = ", ".join(ex.get('name', 'Unknown') for ex in kept_exercises) or "None"
+
+    revision = f"""
+**Physiotherapist Feedback:**
+{critique.get('feedback', 'No specific feedback')}
+
+**Flagged Exercises (replace these):**
+{flagged_text}
+
+**Exercises Being Kept (do not repeat them):** {kept_text}
+
+"""
+
+    return _compile(
+        DRAFT_PLAN_SYSTEM_PROMPT, {"profile": profile}, "**Injury History:**\n{injury_text}\n",
+        {"revision": revision, "instructions": REVISION_INSTRUCTIONS},
+        injury_history, budget,
+    )
+
+
+def get_revision_prompt(
+    user_profile: dict,
+    injury_history: list[dict],
+    kept_exercises: list[dict],
+    flagged_exercises: list[dict],
+    critique: dict,
+) -> str:
+    """
+    Generate the prompt for a targeted revision.
+
+    Args:
+        user_profile: User's goals, fitness level, equipment
+        injury_history: List of past injuries
+        kept_exercises: Exercises the physiotherapist did not flag
+        flagged_exercises: Exercises to replace
+        critique: The physiotherapist's UNSAFE critique
+
+    Returns:
+        Complete prompt for the trainer LLM
+    """
+    return compile_revision_prompt(user_profile, injury_history, kept_exercises, flagged_exercises, critique).user
 
 
 # ============= Safety Critique ============= #
@@ -114,37 +415,60 @@ You are NOT a trainer trying to design workouts. You are ONLY a safety reviewer
 Be conservative with safety but practical with recommendations."""
 
 
-def get_critique_prompt(workout_plan: dict, injury_history: list[dict]) -> str:
+CRITIQUE_INTRO = """Review the following workout plan for safety concerns based on the user's injury history.
+
+"""
+
+CRITIQUE_INSTRUCTIONS = """Your task:
+1. Cross-reference each exercise against the injury history
+2. Identify any movements that could aggravate existing injuries
+3. Consider joint angles, loading patterns, and range of motion
+4. Determine if the plan is SAFE or UNSAFE
+
+**Decision Criteria:**
+- SAFE: All exercises are compatible with injury history OR user has no injuries
+- UNSAFE: ≥1 exercise poses clear risk of re-injury or aggravation
+
+Return ONLY a valid JSON object with this structure (no markdown, no extra text):
+
+{
+    "status": "SAFE" or "UNSAFE",
+    "feedback": "Detailed explanation of your assessment. If UNSAFE, specify exactly which exercises are problematic and WHY based on the specific injury.",
+    "flagged_exercises": ["Exercise 1", "Exercise 2"]  // Leave empty array if SAFE
+}
+
+Examples:
+- Rotator cuff injury → Flag overhead press, military press, upright rows
+- ACL tear → Flag deep squats, jumping movements  
+- Lower back issues → Flag deadlifts without proper progression, heavy squats
+
+Be specific and cite the injury type in your feedback."""
+
+
+def compile_critique_prompt(
+    workout_plan: dict,
+    injury_history: list[dict],
+    budget: int = PROMPT_TOKEN_BUDGET,
+) -> CompiledPrompt:
     """
-    Generate the prompt for safety critique.
-    
+    Compile the physiotherapist prompt for a safety critique.
+
     Args:
         workout_plan: The drafted workout plan to review
         injury_history: User's injury history
-    
+        budget: Token budget for system + user prompt
+
     Returns:
-        Complete prompt for the physiotherapist LLM
+        CompiledPrompt with CRITIQUE_SYSTEM_PROMPT as the system prompt
     """
-    
-    # Format injury history
-    injury_text = "None reported" if not injury_history else "\n".join([
-        f"- {inj['injury_type']} on {inj.get('injury_date', 'unknown date')} (Severity: {inj['severity']})"
-        + (f"\n  Notes: {inj['notes']}" if inj.get('notes') else "")
-        for inj in injury_history
-    ])
-    
     # Extract exercises for review
     exercises = workout_plan.get('exercises', [])
     exercise_list = "\n".join([
         f"{i+1}. {ex.get('name', 'Unknown')} - {ex.get('sets', '?')} sets x {ex.get('reps', '?')} reps"
         for i, ex in enumerate(exercises)
     ])
-    
-    prompt = f"""Review the following workout plan for safety concerns based on the user's injury history.
-
-**Injury History:**
-{injury_text}
 
+    plan = f"""
 **Proposed Workout Plan:**
 Name: {workout_plan.get('name', 'Unknown')}
 Frequency: {workout_plan.get('frequency', 'Unknown')}
@@ -155,29 +479,24 @@ Frequency: {workout_plan.get('frequency', 'Unknown')}
 **Warm-up:** {workout_plan.get('warm_up', 'Not specified')}
 **Cool-down:** {workout_plan.get('cool_down', 'Not specified')}
 
-Your task:
-1. Cross-reference each exercise against the injury history
-2. Identify any movements that could aggravate existing injuries
-3. Consider joint angles, loading patterns, and range of motion
-4. Determine if the plan is SAFE or UNSAFE
+"""
 
-**Decision Criteria:**
-- SAFE: All exercises are compatible with injury history OR user has no injuries
-- UNSAFE: ≥1 exercise poses clear risk of re-injury or aggravation
+    return _compile(
+        CRITIQUE_SYSTEM_PROMPT, {"intro": CRITIQUE_INTRO}, "**Injury History:**\n{injury_text}\n",
+        {"plan": plan, "instructions": CRITIQUE_INSTRUCTIONS},
+        injury_history, budget,
+    )
 
-Return ONLY a valid JSON object with this structure (no markdown, no extra text):
 
-{{
-    "status": "SAFE" or "UNSAFE",
-    "feedback": "Detailed explanation of your assessment. If UNSAFE, specify exactly which exercises are problematic and WHY based on the specific injury.",
-    "flagged_exercises": ["Exercise 1", "Exercise 2"]  // Leave empty array if SAFE
-}}
+def get_critique_prompt(workout_plan: dict, injury_history: list[dict]) -> str:
+    """
+    Generate the prompt for safety critique.
 
-Examples:
-- Rotator cuff injury → Flag overhead press, military press, upright rows
-- ACL tear → Flag deep squats, jumping movements  
-- Lower back issues → Flag deadlifts without proper progression, heavy squats
+    Args:
+        workout_plan: The drafted workout plan to review
+        injury_history: User's injury history
 
-Be specific and cite the injury type in your feedback."""
-    
-    return prompt
+    Returns:
+        Complete prompt for the physiotherapist LLM
+    """
+    return compile_critique_prompt(workout_plan, injury_history).user
@@ -0,0 +1,578 @@
+"""
+LLM Provider Clients
+Builds the chat models for each provider on one shared, pooled HTTP client
+per process, so concurrent plan requests reuse keep-alive connections
+instead of opening a new one per LLM call, with explicit connect/read
+timeouts and pool utilization stats.
+
+Providers are looked up in a small registry; each one imports its
+LangChain package only when its first model is built.
+"""
+
+import functools
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterator, List, Optional
+
+import httpx
+
+from app.backends import get_backend_router
+from app.keepalive import record_ollama_response
+
+
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "300"))  # Local generation can take minutes
+HTTP_POOL_MAX_CONNECTIONS = int(os.getenv("HTTP_POOL_MAX_CONNECTIONS", "20"))
+HTTP_POOL_MAX_KEEPALIVE = int(os.getenv("HTTP_POOL_MAX_KEEPALIVE", "10"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "60"))
+# HTTP/2 needs the h2 package and TLS (OpenAI); plain-http Ollama stays on HTTP/1.1
+HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "false").lower() in ("1", "true", "yes")
+# How long Ollama keeps the model loaded after each request or ping (Ollama duration, e.g. "30m", "-1")
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+# ============= Instrumented Transport ============= #
+
+class _Counters:
+    """Request accounting shared by the sync and async transports."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.errors = 0
+        self.timeouts = 0
+
+    def started(self):
+        with self._lock:
+            self.requests += 1
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    def finished(self, error: Optional[BaseException] = None):
+        with self._lock:
+            self.in_flight -= 1
+            if isinstance(error, httpx.TimeoutException):
+                self.timeouts += 1
+            elif error is not None:
+                self.errors += 1
+
+
+class _TrackedStream(httpx.SyncByteStream):
+    """Response body that marks the request finished once it is closed."""
+
+    def __init__(self, stream, counters: _Counters):
+        self._stream = stream
+        self._counters = counters
+        self._closed = False
+
+    def __iter__(self):
+        yield from self._stream
+
+    def close(self):
+        try:
+            self._stream.close()
+        finally:
+            if not self._closed:
+                self._closed = True
+                self._counters.finished()
+
+
+class _AsyncTrackedStream(httpx.AsyncByteStream):
+    """Async counterpart of _TrackedStream."""
+
+    def __init__(self, stream, counters: _Counters):
+        self._stream = stream
+        self._counters = counters
+        self._closed = False
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self):
+        try:
+            await self._stream.aclose()
+        finally:
+            if not self._closed:
+                self._closed = True
+                self._counters.finished()
+
+
+class _CountingTransport(httpx.BaseTransport):
+    """Counts requests in flight, including streamed bodies still being read."""
+
+    def __init__(self, transport: httpx.BaseTransport, counters: _Counters):
+        self.transport = transport
+        self._counters = counters
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        self._counters.started()
+        try:
+            response = self.transport.handle_request(request)
+        except BaseException as e:
+            self._counters.finished(e)
+            raise
+        if response.is_closed:  # Body already buffered in full
+            self._counters.finished()
+        else:
+            response.stream = _TrackedStream(response.stream, self._counters)
+        return response
+
+    def close(self):
+        self.transport.close()
+
+
+class _AsyncCountingTransport(httpx.AsyncBaseTransport):
+    """Async counterpart of _CountingTransport."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, counters: _Counters):
+        self.transport = transport
+        self._counters = counters
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self._counters.started()
+        try:
+            response = await self.transport.handle_async_request(request)
+        except BaseException as e:
+            self._counters.finished(e)
+            raise
+        if response.is_closed:
+            self._counters.finished()
+        else:
+            response.stream = _AsyncTrackedStream(response.stream, self._counters)
+        return response
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+
+def _connection_stats(transport) -> dict:
+    """Open and idle connections in an httpx transport's connection pool."""
+    pool = getattr(transport, "_pool", None)
+    connections = list(getattr(pool, "connections", []) or [])
+    idle = sum(1 for c in connections if getattr(c, "is_idle", lambda: False)())
+    return {"open": len(connections), "idle": idle, "active": len(connections) - idle}
+
+
+# ============= Shared Client Pool ============= #
+
+class HTTPClientPool:
+    """
+    Shared sync and async httpx clients for LLM provider calls.
+
+    Sync callers (startup checks, job workers) and async callers (/plan)
+    each get one keep-alive connection pool, created on first use.
+    """
+
+    def __init__(
+        self,
+        connect_timeout: float = HTTP_CONNECT_TIMEOUT,
+        read_timeout: float = HTTP_READ_TIMEOUT,
+        max_connections: int = HTTP_POOL_MAX_CONNECTIONS,
+        max_keepalive: int = HTTP_POOL_MAX_KEEPALIVE,
+        keepalive_expiry: float = HTTP_KEEPALIVE_EXPIRY,
+        http2: bool = HTTP2_ENABLED,
+        transport: Optional[httpx.BaseTransport] = None,
+        async_transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+            keepalive_expiry=keepalive_expiry,
+        )
+        if http2 and not _http2_available():
+            print("[WARNING] HTTP2_ENABLED is set but the h2 package is not installed; using HTTP/1.1")
+            http2 = False
+        self.http2 = http2
+        self._transport = transport
+        self._async_transport = async_transport
+        self._counters = _Counters()
+        self._lock = threading.Lock()
+        self._client: Optional[httpx.Client] = None
+        self._async_client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.Client:
+        with self._lock:
+            if self._client is None:
+                transport = self._transport or httpx.HTTPTransport(limits=self.limits, http2=self.http2)
+                self._client = httpx.Client(
+                    timeout=self.timeout,
+                    transport=_CountingTransport(transport, self._counters),
+                )
+            return self._client
+
+    @property
+    def async_client(self) -> httpx.AsyncClient:
+        with self._lock:
+            if self._async_client is None:
+                transport = self._async_transport or httpx.AsyncHTTPTransport(limits=self.limits, http2=self.http2)
+                self._async_client = httpx.AsyncClient(
+                    timeout=self.timeout,
+                    transport=_AsyncCountingTransport(transport, self._counters),
+                )
+            return self._async_client
+
+    def stats(self) -> dict:
+        """Request counters, pool occupancy and configuration."""
+        counters = self._counters
+        connections = {}
+        if self._client is not None:
+            connections["sync"] = _connection_stats(self._client._transport.transport)
+        if self._async_client is not None:
+            connections["async"] = _connection_stats(self._async_client._transport.transport)
+        return {
+            "requests": counters.requests,
+            "in_flight": counters.in_flight,
+            "peak_in_flight": counters.peak_in_flight,
+            "errors": counters.errors,
+            "timeouts": counters.timeouts,
+            "connections": connections,
+            "max_connections": self.limits.max_connections,
+            "max_keepalive_connections": self.limits.max_keepalive_connections,
+            "connect_timeout_s": self.timeout.connect,
+            "read_timeout_s": self.timeout.read,
+            "http2": self.http2,
+        }
+
+    async def aclose(self):
+        """Close both clients (lifespan shutdown)."""
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+        self.close()
+
+    def close(self):
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+
+_http_pool: Optional[HTTPClientPool] = None
+
+
+def get_http_pool() -> HTTPClientPool:
+    """Process-wide client pool shared by every chat model built here."""
+    global _http_pool
+    if _http_pool is None:
+        _http_pool = HTTPClientPool()
+    return _http_pool
+
+
+# ============= Ollama ============= #
+
+class _PooledOllamaMixin:
+    """
+    Replaces the HTTP calls of langchain_community's Ollama models.
+
+    Upstream posts with a bare requests.post (sync) and a fresh
+    aiohttp.ClientSession per call (async), so every LLM call opens a new
+    connection. These overrides send the same payload over the shared pool,
+    routed across the backends listed in base_url (see app/backends.py).
+    """
+
+    def _request_payload(self, payload: Any, stop: Optional[List[str]], **kwargs: Any) -> dict:
+        if self.stop is not None and stop is not None:
+            raise ValueError("`stop` found in both the input and default params.")
+        elif self.stop is not None:
+            stop = self.stop
+
+        params = self._default_params
+        for key in self._default_params:
+            if key in kwargs:
+                params[key] = kwargs[key]
+
+        if "options" in kwargs:
+            params["options"] = kwargs["options"]
+        else:
+            params["options"] = {
+                **params["options"],
+                "stop": stop,
+                **{k: v for k, v in kwargs.items() if k not in self._default_params},
+            }
+
+        if payload.get("messages"):
+            return {"messages": payload.get("messages", []), **params}
+        return {"prompt": payload.get("prompt"), "images": payload.get("images", []), **params}
+
+    def _request_options(self) -> dict:
+        return {
+            "headers": {
+                "Content-Type": "application/json",
+                **(self.headers if isinstance(self.headers, dict) else {}),
+            },
+            "auth": self.auth if isinstance(self.auth, tuple) else None,
+        }
+
+    def _raise_for_status(self, status_code: int, detail: str):
+        from langchain_community.llms.ollama import OllamaEndpointNotFoundError
+
+        if status_code == 404:
+            raise OllamaEndpointNotFoundError(
+                "Ollama call failed with status code 404. "
+                "Maybe your model is not found "
+                f"and you should pull the model with `ollama pull {self.model}`."
+            )
+        raise ValueError(f"Ollama call failed with status code {status_code}. Details: {detail}")
+
+    def _create_stream(self, api_url: str, payload: Any, stop: Optional[List[str]] = None, **kwargs: Any) -> Iterator[str]:
+        request_payload = self._request_payload(payload, stop, **kwargs)
+        router = get_backend_router(self.base_url)
+        path = api_url[len(self.base_url):]
+        client = get_http_pool().client
+        tried = set()
+        while True:
+            backend = router.acquire(frozenset(tried))
+            start = time.perf_counter()
+            failure = None
+            try:
+                with client.stream("POST", backend.url + path, json=request_payload, **self._request_options()) as response:
+                    if response.status_code != 200:
+                        failure = _status_failure(response.status_code)
+                        self._raise_for_status(response.status_code, response.read().decode("utf-8", "replace"))
+                    line = None
+                    for line in response.iter_lines():
+                        yield line
+                # The final line carries load_duration, for the keep-alive scheduler
+                record_ollama_response(backend.url, self.model, line)
+                return
+            except httpx.TransportError as e:
+                failure = f"{type(e).__name__}: {e}"
+                tried.add(backend.url)
+                # Nothing reached the backend; safe to try the next one
+                if isinstance(e, httpx.ConnectError) and len(tried) < len(router.backends):
+                    continue
+                raise
+            finally:
+                router.release(backend, (time.perf_counter() - start) * 1000, failed=failure is not None, error=failure)
+
+    async def _acreate_stream(self, api_url: str, payload: Any, stop: Optional[List[str]] = None, **kwargs: Any) -> AsyncIterator[str]:
+        request_payload = self._request_payload(payload, stop, **kwargs)
+        router = get_backend_router(self.base_url)
+        path = api_url[len(self.base_url):]
+        client = get_http_pool().async_client
+        tried = set()
+        while True:
+            backend = router.acquire(frozenset(tried))
+            start = time.perf_counter()
+            failure = None
+            try:
+                async with client.stream("POST", backend.url + path, json=request_payload, **self._request_options()) as response:
+                    if response.status_code != 200:
+                        failure = _status_failure(response.status_code)
+                        self._raise_for_status(response.status_code, (await response.aread()).decode("utf-8", "replace"))
+                    line = None
+                    async for line in response.aiter_lines():
+                        yield line
+                record_ollama_response(backend.url, self.model, line)
+                return
+            except httpx.TransportError as e:
+                failure = f"{type(e).__name__}: {e}"
+                tried.add(backend.url)
+                if isinstance(e, httpx.ConnectError) and len(tried) < len(router.backends):
+                    continue
+                raise
+            finally:
+                router.release(backend, (time.perf_counter() - start) * 1000, failed=failure is not None, error=failure)
+
+
+def _status_failure(status_code: int) -> Optional[str]:
+    """Statuses that count against a backend's health: server errors and a missing model."""
+    if status_code >= 500 or status_code == 404:
+        return f"HTTP {status_code}"
+    return None
+
+
+@functools.lru_cache(maxsize=None)
+def pooled_ollama_class(base: type) -> type:
+    """Subclass of an Ollama model class (ChatOllama, Ollama) using the shared pool."""
+    return type(f"Pooled{base.__name__}", (_PooledOllamaMixin, base), {})
+
+
+# ============= Provider Registry ============= #
+
+@dataclass(frozen=True)
+class ProviderSpec:
+    """
+    How to configure and build one LLM provider's chat model.
+
+    build imports the provider's LangChain package itself, so a process
+    only ever imports the package of the provider it runs.
+    """
+    name: str
+    label: str  # Human-readable name for /health
+    model_env: str  # Env var holding the model name
+    default_model: str
+    build: Callable[..., Any]  # (model, temperature, pool, **kwargs) -> chat model
+    env_options: Callable[[], dict] = dict  # Provider kwargs read from the environment
+    required_env: tuple = ()  # Env vars that must be set to start
+    warm_up: Optional[Callable[[Any], Awaitable[None]]] = None  # async (llm) -> None; default: one test call
+    # async (backend_url, model) -> load ms; runs the keep-alive scheduler (app/keepalive.py)
+    keep_alive_ping: Optional[Callable[[str, str], Awaitable[float]]] = None
+    structured_output: Optional[str] = None  # Name for app.structured_output, if supported
+
+    @property
+    def model(self) -> str:
+        return os.getenv(self.model_env, self.default_model)
+
+
+_PROVIDERS: dict[str, ProviderSpec] = {}
+
+
+def register_provider(spec: ProviderSpec) -> ProviderSpec:
+    """Add (or replace) a provider in the registry."""
+    _PROVIDERS[spec.name] = spec
+    return spec
+
+
+def get_provider(name: str) -> ProviderSpec:
+    """Registered provider by name; ValueError for unknown names."""
+    try:
+        return _PROVIDERS[name]
+    except KeyError:
+        raise ValueError(f"Unknown provider: {name!r} (expected one of {available_providers()})") from None
+
+
+def available_providers() -> tuple:
+    return tuple(_PROVIDERS)
+
+
+def _build_ollama(model: str, temperature: float, pool: HTTPClientPool, **kwargs):
+    from langchain_community.chat_models import ChatOllama
+    return pooled_ollama_class(ChatOllama)(model=model, temperature=temperature, **kwargs)
+
+
+def _build_openai(model: str, temperature: float, pool: HTTPClientPool, **kwargs):
+    from langchain_openai import ChatOpenAI
+    return ChatOpenAI(
+        model=model,
+        temperature=temperature,
+        http_client=pool.client,
+        http_async_client=pool.async_client,
+        timeout=pool.timeout,
+        **kwargs,
+    )
+
+
+def _build_fake(model: str, temperature: float, pool: HTTPClientPool, **kwargs):
+    from app.fake_llm import FakeTrainerChatModel
+    return FakeTrainerChatModel(**kwargs)
+
+
+async def probe_chat_model(llm) -> None:
+    """Default warm-up: one short generation."""
+    await llm.ainvoke("Say 'OK' if you're ready")
+
+
+async def ping_ollama(backend_url: str, model: str) -> float:
+    """
+    Load the model on one Ollama backend without generating a token.
+
+    A /api/generate request with no prompt only loads the model (a no-op if
+    it is resident) and keeps it loaded for OLLAMA_KEEP_ALIVE. Its response
+    carries no timings ({"done": true, "done_reason": "load"}), so the load
+    is measured as the request's wall-clock time.
+
+    Returns:
+        Time the load took in ms (a few ms when already loaded)
+    """
+    started = time.perf_counter()
+    response = await get_http_pool().async_client.post(
+        f"{backend_url}/api/generate",
+        json={"model": model, "keep_alive": OLLAMA_KEEP_ALIVE},
+    )
+    response.raise_for_status()
+    return (time.perf_counter() - started) * 1000
+
+
+async def preload_ollama(llm) -> None:
+    """
+    Load the model on every Ollama backend (see ping_ollama).
+    Succeeds if at least one backend loaded it.
+    """
+    errors = []
+    for backend in get_backend_router(llm.base_url).backends:
+        try:
+            await ping_ollama(backend.url, llm.model)
+        except httpx.HTTPError as e:
+            errors.append(f"{backend.url}: {type(e).__name__}: {e}")
+    if errors:
+        print(f"[WARNING] Ollama preload failed on {len(errors)} backend(s): {'; '.join(errors)}")
+    if len(errors) == len(get_backend_router(llm.base_url).backends):
+        raise RuntimeError(f"Model {llm.model!r} could not be loaded on any Ollama backend")
+
+
+register_provider(ProviderSpec(
+    name="ollama",
+    label="Ollama",
+    model_env="OLLAMA_MODEL",
+    default_model="mistral",
+    build=_build_ollama,
+    # Comma-separated for several backends (see app/backends.py)
+    env_options=lambda: {
+        "base_url": os.getenv("OLLAMA_BASE_URL", "http://localhost:11434"),
+        # Without it each request resets residency to the server default (5m)
+        "keep_alive": OLLAMA_KEEP_ALIVE,
+    },
+    warm_up=preload_ollama,
+    keep_alive_ping=ping_ollama,
+    structured_output="ollama",
+))
+
+register_provider(ProviderSpec(
+    name="openai",
+    label="OpenAI",
+    model_env="OPENAI_MODEL",
+    default_model="gpt-4o",
+    build=_build_openai,
+    env_options=lambda: {
+        "api_key": os.getenv("OPENAI_API_KEY"),
+        "stream_usage": True,  # Report token usage on streamed runs too
+    },
+    required_env=("OPENAI_API_KEY",),
+    structured_output="openai",
+))
+
+# Scripted model with no network calls, for load-testing the API and graph
+register_provider(ProviderSpec(
+    name="fake",
+    label="Fake",
+    model_env="FAKE_LLM_MODEL",
+    default_model="fake-trainer",
+    build=_build_fake,
+    env_options=lambda: {"latency_ms": float(os.getenv("FAKE_LLM_LATENCY_MS", "0"))},
+))
+
+
+# ============= Model Factory ============= #
+
+def build_chat_model(provider: str, model: str, temperature: float = 0.7, **kwargs):
+    """
+    Chat model for a registered provider, wired to the shared HTTP client pool.
+
+    Args:
+        provider: Registered provider name ("ollama", "openai", ...)
+        model: Model name
+        temperature: Sampling temperature
+        **kwargs: Provider options (base_url for Ollama, api_key for OpenAI, ...)
+    """
+    return get_provider(provider).build(model, temperature, get_http_pool(), **kwargs)
+
+
+def build_chat_model_from_env(provider: str, temperature: float = 0.7, **kwargs):
+    """Chat model for a provider with its model name and options read from the environment."""
+    spec = get_provider(provider)
+    return build_chat_model(provider, spec.model, temperature, **{**spec.env_options(), **kwargs})
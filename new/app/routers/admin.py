@@ -0,0 +1,55 @@
+"""
+Admin API routes (require the X-Admin-Key header).
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Optional
+
+from ..checkpoint_retention import acheckpoint_table_stats, aprune_expired_threads
+from ..service import PlanService, get_service
+from .auth import require_admin
+
+router = APIRouter(prefix="/admin", tags=["Admin"], dependencies=[Depends(require_admin)])
+
+
+def _require_checkpointer(service: PlanService):
+    if not service.checkpointer:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Checkpointer not initialized. Set POSTGRES_URL."
+        )
+    return service.checkpointer
+
+
+@router.get("/checkpoints")
+async def get_checkpoint_storage(service: PlanService = Depends(get_service)):
+    """
+    Report LangGraph checkpoint storage (requires X-Admin-Key).
+
+    Returns:
+        Size and approximate row count per checkpoint table, thread count,
+        retention settings and the last pruning run
+
+    Raises:
+        HTTPException: 503 if no checkpointer is configured
+    """
+    return await acheckpoint_table_stats(_require_checkpointer(service))
+
+
+@router.post("/checkpoints/prune")
+async def prune_checkpoints(retention_days: Optional[float] = None, service: PlanService = Depends(get_service)):
+    """
+    Delete threads older than the retention period now (requires X-Admin-Key).
+
+    Args:
+        retention_days: Override CHECKPOINT_RETENTION_DAYS for this run
+
+    Returns:
+        Number of threads deleted
+    """
+    checkpointer = _require_checkpointer(service)
+    if retention_days is None:
+        return {"threads_deleted": await aprune_expired_threads(checkpointer)}
+    if retention_days <= 0:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="retention_days must be positive")
+    return {"threads_deleted": await aprune_expired_threads(checkpointer, retention_days)}
@@ -2,14 +2,16 @@
 Authentication API routes.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from typing import Optional
 import logging
+import secrets
 
 from ..database import get_db
 from ..models import User
+from .. import auth as auth_config
 from ..auth import (
     UserCreate, UserLogin, UserResponse, Token, TokenData,
     get_password_hash, verify_password, create_access_token, decode_token
@@ -67,6 +69,20 @@ def require_auth(
     return user
 
 
+def require_admin(x_admin_key: Optional[str] = Header(None)) -> None:
+    """Require the X-Admin-Key header to match ADMIN_API_KEY - 403 otherwise or when unset."""
+    if not auth_config.ADMIN_API_KEY:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin endpoints are disabled (ADMIN_API_KEY not set)",
+        )
+    if not x_admin_key or not secrets.compare_digest(x_admin_key, auth_config.ADMIN_API_KEY):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Invalid admin key",
+        )
+
+
 @router.post("/signup", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
 def signup(user_data: UserCreate, db: Session = Depends(get_db)):
     """Create a new user account."""
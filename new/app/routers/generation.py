@@ -0,0 +1,181 @@
+"""
+Plan generation API routes: /plan, /plan/stream, the job queue and /history.
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from typing import Optional
+import logging
+
+from ..database import get_db
+from ..history import HISTORY_MAX_PAGE_SIZE, HISTORY_PAGE_SIZE, aget_plan_history
+from ..jobs import enqueue_job, get_job
+from ..models import PlanJob
+from ..schemas import HistoryResponse, PlanJobStatus, PlanResponse, WorkoutRequest
+from ..service import PlanService, get_service
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+
+# ============= Plan Generation ============= #
+
+@router.post("/plan", response_model=PlanResponse, tags=["Workout Planning"])
+async def generate_plan(request: WorkoutRequest, service: PlanService = Depends(get_service)):
+    """
+    Generate a workout plan with safety critique loop.
+
+    Flow:
+    1. Initialize state with user profile and injury history
+    2. Invoke LangGraph workflow (draft → critique → conditional revision)
+    3. Return final plan + critique
+
+    The graph runs via ainvoke inside a bounded concurrency slot, so a slow
+    LLM round trip never blocks the event loop for other routes. Requests
+    identical to one already in flight (same normalized profile + injuries)
+    wait for it and share its result instead of running the graph again.
+
+    Args:
+        request: WorkoutRequest with user profile, injuries, and thread_id
+
+    Returns:
+        PlanResponse with workout plan and safety assessment
+
+    Raises:
+        HTTPException: 503 if graph is not ready or no slot frees up in time,
+                       500 if graph execution fails
+    """
+    service.require_graph()
+    return await service.generate(request)
+
+
+@router.post("/plan/stream", tags=["Workout Planning"])
+async def stream_plan(request: WorkoutRequest, tokens: bool = False, service: PlanService = Depends(get_service)):
+    """
+    Generate a workout plan and stream progress as Server-Sent Events.
+
+    Events (each `data:` line is JSON):
+    - `draft`: trainer finished a draft ({revision, workout_plan})
+    - `critique`: physiotherapist finished a review ({revision, critique})
+    - `token`: incremental trainer output, only when `tokens=true`
+    - `done`: final PlanResponse
+    - `error`: {detail}; the stream ends after it
+
+    Args:
+        request: WorkoutRequest with user profile, injuries, and thread_id
+        tokens: Also stream token-level output from the trainer LLM
+
+    Raises:
+        HTTPException: 503 if graph is not initialized
+    """
+    service.require_graph()
+
+    return StreamingResponse(
+        service.event_stream(request, tokens),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# ============= Plan Job Queue ============= #
+
+def _job_status(job: PlanJob) -> PlanJobStatus:
+    """API view of a plan_jobs row."""
+    return PlanJobStatus(
+        job_id=job.id,
+        status=job.status,
+        thread_id=job.request.get("thread_id", ""),
+        attempts=job.attempts or 0,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+        result=job.result,
+        error=job.error,
+    )
+
+
+@router.post(
+    "/plan/jobs",
+    response_model=PlanJobStatus,
+    status_code=status.HTTP_202_ACCEPTED,
+    tags=["Workout Planning"],
+)
+def submit_plan_job(request: WorkoutRequest, db: Session = Depends(get_db)):
+    """
+    Queue a workout plan for background generation.
+
+    Returns immediately with a job id; poll `GET /plan/jobs/{job_id}` for
+    the result. Jobs are processed by `python -m app.worker` processes and
+    survive API and worker restarts.
+    """
+    job = enqueue_job(db, request.model_dump(mode="json"))
+    logger.info(f"Queued plan job {job.id} for thread_id={request.thread_id}")
+    return _job_status(job)
+
+
+@router.get("/plan/jobs/{job_id}", response_model=PlanJobStatus, tags=["Workout Planning"])
+def get_plan_job(job_id: str, db: Session = Depends(get_db)):
+    """
+    Get the status of a queued plan job.
+
+    `result` holds the PlanResponse once `status` is `succeeded`; `error`
+    is set when it is `failed`.
+    """
+    job = get_job(db, job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Plan job {job_id} not found")
+    return _job_status(job)
+
+
+# ============= History ============= #
+
+@router.get("/history/{thread_id}", response_model=HistoryResponse, tags=["History"])
+async def get_history(
+    thread_id: str,
+    limit: int = Query(HISTORY_PAGE_SIZE, ge=1, le=HISTORY_MAX_PAGE_SIZE),
+    before: Optional[str] = None,
+    service: PlanService = Depends(get_service),
+):
+    """
+    Retrieve the plan history of a thread, newest state first.
+
+    Args:
+        thread_id: Session identifier
+        limit: States per page
+        before: next_cursor from the previous page
+
+    Returns:
+        HistoryResponse with one page of previous states
+
+    Raises:
+        HTTPException: 404 if thread not found, 503 if no persistence configured
+    """
+    if not service.checkpointer:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Persistence not configured. Set POSTGRES_URL to enable history."
+        )
+
+    try:
+        logger.info(f"Fetching history for thread_id={thread_id} (limit={limit}, before={before})")
+        history_items, next_cursor = await aget_plan_history(service.graph_app, thread_id, limit, before)
+    except Exception as e:
+        logger.error(f"Error fetching history: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to fetch history: {str(e)}"
+        )
+
+    # An empty later page just means the cursor was the oldest state
+    if not history_items and before is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No history found for thread_id={thread_id}"
+        )
+
+    return HistoryResponse(
+        thread_id=thread_id,
+        history=history_items,
+        next_cursor=next_cursor,
+    )
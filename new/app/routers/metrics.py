@@ -0,0 +1,274 @@
+"""
+Health and metrics API routes.
+"""
+
+from fastapi import APIRouter, Depends, Response, status
+from typing import Optional
+import logging
+
+from ..backends import get_backend_router
+from ..checkpoint_pool import checkpointer_pool_stats
+from ..database import SessionLocal
+from ..models import LLMMetrics, NodeSpan
+from ..providers import get_http_pool
+from ..schemas import HealthResponse, ReadinessResponse
+from ..service import PlanService, get_service
+from ..tracing import percentile
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+
+@router.get("/health", response_model=HealthResponse, tags=["Health"])
+async def health_check(service: PlanService = Depends(get_service)):
+    """
+    Health check endpoint.
+
+    Returns:
+        HealthResponse with service status
+    """
+    database_status = "connected" if service.checkpointer else "disconnected"
+    overall_status = "healthy" if service.graph_app and database_status == "connected" else "unhealthy"
+
+    return HealthResponse(
+        status=overall_status,
+        database=database_status,
+        llm_provider=service.llm_provider_label
+    )
+
+
+@router.get("/health/live", tags=["Health"])
+async def liveness():
+    """
+    Liveness probe: the process is up and serving requests.
+
+    Never depends on the LLM or the database, so a slow model load or a
+    database blip does not get the pod restarted.
+    """
+    return {"status": "alive"}
+
+
+@router.get("/health/ready", response_model=ReadinessResponse, tags=["Health"])
+async def readiness(response: Response, service: PlanService = Depends(get_service)):
+    """
+    Readiness probe: startup (database + graph) has finished.
+
+    Reports the background LLM warm-up; with WARMUP_REQUIRED_FOR_READY set,
+    stays 503 until the model is warm.
+
+    Returns:
+        ReadinessResponse; status 503 while not ready
+    """
+    ready = service.ready
+    if not ready:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return ReadinessResponse(
+        ready=ready,
+        graph=service.graph_app is not None,
+        llm_provider=service.llm_provider_label,
+        warmup=service.warmup.stats(),
+    )
+
+
+# ============= LLM Metrics ============= #
+
+@router.get("/metrics/llm", tags=["Metrics"])
+def get_llm_metrics(limit: int = 100):
+    """
+    Get recent LLM performance metrics.
+
+    Returns:
+        List of recent LLM request metrics
+    """
+    try:
+        db = SessionLocal()
+        metrics = db.query(LLMMetrics).order_by(LLMMetrics.timestamp.desc()).limit(limit).all()
+        db.close()
+
+        return {
+            "total": len(metrics),
+            "metrics": [
+                {
+                    "timestamp": m.timestamp.isoformat(),
+                    "endpoint": m.endpoint,
+                    "latency_ms": m.latency_ms,
+                    "success": m.success,
+                    "revision_count": m.revision_count,
+                    "safety_triggered": m.safety_triggered,
+                    "llm_calls_saved": m.llm_calls_saved or 0,
+                    "llm_calls_wasted": m.llm_calls_wasted or 0,
+                    "model": m.model_name
+                }
+                for m in metrics
+            ]
+        }
+    except Exception as e:
+        logger.error(f"Failed to fetch LLM metrics: {e}")
+        return {"total": 0, "metrics": [], "error": str(e)}
+
+
+@router.get("/metrics/llm/nodes", tags=["Metrics"])
+def get_node_metrics(limit: int = 1000, endpoint: Optional[str] = None):
+    """
+    Get per-node latency breakdown from recent graph runs.
+
+    Args:
+        limit: Number of most recent spans to aggregate
+        endpoint: Only include spans from this endpoint (e.g. /plan)
+
+    Returns:
+        Count, average and p95 of wall, LLM and parse time and prompt size per node
+    """
+    try:
+        db = SessionLocal()
+        query = db.query(NodeSpan)
+        if endpoint:
+            query = query.filter(NodeSpan.endpoint == endpoint)
+        spans = query.order_by(NodeSpan.started_at.desc()).limit(limit).all()
+        db.close()
+
+        by_node: dict[str, list] = {}
+        for span in spans:
+            by_node.setdefault(span.node, []).append(span)
+
+        def _stats(values):
+            values = [v for v in values if v is not None]
+            if not values:
+                return {"avg_ms": None, "p95_ms": None}
+            return {
+                "avg_ms": round(sum(values) / len(values), 2),
+                "p95_ms": round(percentile(values, 95), 2),
+            }
+
+        def _token_stats(values):
+            values = [v for v in values if v is not None]
+            if not values:
+                return {"avg": None, "p95": None, "max": None}
+            return {
+                "avg": round(sum(values) / len(values), 1),
+                "p95": percentile(values, 95),
+                "max": max(values),
+            }
+
+        return {
+            "total_spans": len(spans),
+            "requests": len({span.request_id for span in spans}),
+            "nodes": {
+                node: {
+                    "count": len(node_spans),
+                    "failures": sum(1 for s in node_spans if not s.success),
+                    "wall": _stats([s.wall_ms for s in node_spans]),
+                    "llm": _stats([s.llm_ms for s in node_spans]),
+                    "parse": _stats([s.parse_ms for s in node_spans]),
+                    "prompt_tokens": _token_stats([s.prompt_tokens for s in node_spans]),
+                }
+                for node, node_spans in sorted(by_node.items())
+            }
+        }
+    except Exception as e:
+        logger.error(f"Failed to fetch node metrics: {e}")
+        return {"total_spans": 0, "requests": 0, "nodes": {}, "error": str(e)}
+
+
+def _backend_stats(service: PlanService) -> Optional[dict]:
+    """Routing state of the Ollama backends, for providers configured with a base_url."""
+    base_url = service.llm_options.get("base_url")
+    return get_backend_router(base_url).stats() if base_url else None
+
+
+@router.get("/metrics/llm/backends", tags=["Metrics"])
+async def get_backend_metrics(service: PlanService = Depends(get_service)):
+    """
+    Get routing state of the Ollama backends listed in OLLAMA_BASE_URL.
+
+    Returns:
+        Per-backend health, in-flight requests and latency (avg, p95);
+        null when the provider does not route across backends
+    """
+    return _backend_stats(service)
+
+
+@router.get("/metrics/llm/keepalive", tags=["Metrics"])
+async def get_keepalive_metrics(service: PlanService = Depends(get_service)):
+    """
+    Get the Ollama keep-alive scheduler's pings and the cold loads seen.
+
+    Returns:
+        Pings sent, cold loads avoided (pings that reloaded an evicted model),
+        cold loads paid by user requests and per-model recency; null when the
+        provider has no keep-alive
+    """
+    return service.keepalive.stats() if service.keepalive else None
+
+
+@router.get("/metrics/llm/summary", tags=["Metrics"])
+def get_llm_metrics_summary(service: PlanService = Depends(get_service)):
+    """
+    Get LLM performance summary statistics.
+
+    Returns:
+        Summary of LLM performance (avg latency, success rate, etc.)
+    """
+    from sqlalchemy import func
+
+    try:
+        db = SessionLocal()
+
+        total = db.query(LLMMetrics).count()
+        successful = db.query(LLMMetrics).filter(LLMMetrics.success == True).count()
+        avg_latency = db.query(func.avg(LLMMetrics.latency_ms)).scalar() or 0
+        min_latency = db.query(func.min(LLMMetrics.latency_ms)).scalar() or 0
+        max_latency = db.query(func.max(LLMMetrics.latency_ms)).scalar() or 0
+        safety_triggers = db.query(LLMMetrics).filter(LLMMetrics.safety_triggered == True).count()
+        llm_calls_saved = db.query(func.sum(LLMMetrics.llm_calls_saved)).scalar() or 0
+        llm_calls_wasted = db.query(func.sum(LLMMetrics.llm_calls_wasted)).scalar() or 0
+
+        db.close()
+
+        return {
+            "total_requests": total,
+            "successful_requests": successful,
+            "success_rate": round(successful / total * 100, 2) if total > 0 else 0,
+            "avg_latency_ms": int(avg_latency),
+            "min_latency_ms": min_latency,
+            "max_latency_ms": max_latency,
+            "safety_triggers": safety_triggers,
+            "llm_calls_saved": int(llm_calls_saved),
+            "llm_calls_wasted": int(llm_calls_wasted),
+            "model": service.model,
+            "concurrency": service.plan_limiter.stats(),
+            "coalescing": service.plan_single_flight.stats(),
+            "plan_cache": service.plan_cache.stats() if service.plan_cache else None,
+            "critique_verdicts": service.verdict_store.stats() if service.verdict_store else None,
+            "http_pool": get_http_pool().stats(),
+            "checkpointer_pool": checkpointer_pool_stats(service.checkpointer),
+            "ollama_backends": _backend_stats(service),
+            "ollama_keepalive": service.keepalive.stats() if service.keepalive else None
+        }
+    except Exception as e:
+        logger.error(f"Failed to fetch LLM metrics summary: {e}")
+        return {"error": str(e)}
+
+
+# ============= Connection Pools ============= #
+
+@router.get("/metrics/http", tags=["Metrics"])
+async def get_http_pool_metrics():
+    """
+    Get utilization of the pooled HTTP client used for LLM calls.
+
+    Returns:
+        Requests in flight, peak, errors/timeouts and open/idle connections
+    """
+    return get_http_pool().stats()
+
+
+@router.get("/metrics/checkpointer", tags=["Metrics"])
+async def get_checkpointer_pool_metrics(service: PlanService = Depends(get_service)):
+    """
+    Get utilization of the Postgres checkpointer connection pool.
+
+    Returns:
+        Pool size, available connections, waiting requests and connection wait times
+    """
+    return checkpointer_pool_stats(service.checkpointer)
@@ -4,7 +4,7 @@ Pydantic Models for API Input/Output Validation
 
 from pydantic import BaseModel, Field, field_validator
 from typing import Optional, Literal
-from datetime import date
+from datetime import date, datetime
 
 
 # ============= Input Models ============= #
@@ -15,6 +15,7 @@ class InjuryHistoryItem(BaseModel):
     injury_date: date = Field(..., description="When the injury occurred")
     severity: Literal["minor", "moderate", "severe"] = Field(..., description="Injury severity level")
     notes: Optional[str] = Field(None, description="Additional context about the injury")
+    is_active: Optional[bool] = Field(True, description="Whether the injury still affects training; inactive injuries may be left out of long prompts")
 
 
 class UserProfile(BaseModel):
@@ -38,6 +39,11 @@ class WorkoutRequest(BaseModel):
     user_profile: UserProfile
     injury_history: list[InjuryHistoryItem] = Field(default_factory=list)
     thread_id: str = Field(..., description="Session identifier for persistence")
+    persist: Optional[bool] = Field(
+        None,
+        description="Write graph checkpoints so the thread shows up in /history. "
+                    "False runs without any checkpoint I/O. Defaults to PLAN_PERSIST_DEFAULT.",
+    )
     
     model_config = {
         "json_schema_extra": {
@@ -116,22 +122,41 @@ class PlanResponse(BaseModel):
     critique: Critique
     revision_count: int = Field(..., description="Number of revisions made")
     thread_id: str
+    llm_calls: Optional[int] = Field(None, description="LLM calls made for this response (0 if served from cache)")
+    tokens_input: Optional[int] = Field(None, description="Prompt tokens across all LLM calls")
+    tokens_output: Optional[int] = Field(None, description="Completion tokens across all LLM calls")
+
+
+class PlanJobStatus(BaseModel):
+    """Status of a queued plan generation job."""
+    job_id: str
+    status: Literal["queued", "running", "succeeded", "failed"]
+    thread_id: str
+    attempts: int = 0
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    result: Optional[PlanResponse] = Field(None, description="Set once the job has succeeded")
+    error: Optional[str] = Field(None, description="Set if the job failed")
 
 
 # ============= History Models ============= #
 
 class StateHistoryItem(BaseModel):
     """Single state from conversation history."""
-    timestamp: str
+    checkpoint_id: Optional[str] = None
+    timestamp: str = Field(..., description="When the checkpoint was written (ISO 8601)")
+    step: Optional[int] = Field(None, description="Graph step that produced the checkpoint")
     workout_plan: Optional[WorkoutPlan]
     critique: Optional[Critique]
     revision_count: int
 
 
 class HistoryResponse(BaseModel):
-    """Response from history endpoint."""
+    """Response from history endpoint (newest state first)."""
     thread_id: str
     history: list[StateHistoryItem]
+    next_cursor: Optional[str] = Field(None, description="Pass as ?before= to fetch older states; null on the last page")
 
 
 # ============= Health Check ============= #
@@ -141,3 +166,21 @@ class HealthResponse(BaseModel):
     status: Literal["healthy", "unhealthy"]
     database: Literal["connected", "disconnected"]
     llm_provider: str
+
+
+class WarmupStatus(BaseModel):
+    """Progress of the background LLM warm-up."""
+    state: Literal["pending", "warming", "retrying", "ready", "disabled"]
+    attempts: int
+    started_at: Optional[str] = None
+    ready_at: Optional[str] = None
+    duration_ms: Optional[int] = None
+    last_error: Optional[str] = None
+
+
+class ReadinessResponse(BaseModel):
+    """Readiness probe response (503 until ready)."""
+    ready: bool
+    graph: bool = Field(..., description="Database initialized and graph compiled")
+    llm_provider: str
+    warmup: WarmupStatus
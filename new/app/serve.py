@@ -0,0 +1,123 @@
+"""
+Production Server
+Runs the API in several preforked uvicorn worker processes so one pod can
+use all of its CPU cores. The parent process creates the database and
+checkpoint tables once (app/migrations.py) and then starts the workers;
+each worker builds its own LLM client, checkpointer pool and graph in its
+lifespan, with table setup skipped.
+
+The worker count defaults to the container's CPU limit (cgroup quota),
+falling back to the CPUs this process may run on.
+
+Usage:
+    python -m app.serve [--workers N] [--provider ollama|openai] [--host 0.0.0.0] [--port 8000]
+"""
+
+import argparse
+import logging
+import math
+import os
+from typing import Optional
+
+from app.migrations import SCHEMA_SETUP_DONE_ENV, setup_schema
+from app.providers import available_providers
+
+
+# Standard uvicorn/gunicorn variable; unset = one worker per available CPU
+WEB_CONCURRENCY = os.getenv("WEB_CONCURRENCY")
+WEB_MAX_WORKERS = int(os.getenv("WEB_MAX_WORKERS", "8"))
+HOST = os.getenv("HOST", "0.0.0.0")
+PORT = int(os.getenv("PORT", "8000"))
+
+CGROUP_V2_CPU_MAX = "/sys/fs/cgroup/cpu.max"
+CGROUP_V1_CPU_QUOTA = "/sys/fs/cgroup/cpu/cpu.cfs_quota_us"
+CGROUP_V1_CPU_PERIOD = "/sys/fs/cgroup/cpu/cpu.cfs_period_us"
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger("app.serve")
+
+
+# ============= Worker Sizing ============= #
+
+def _read(path: str) -> Optional[str]:
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def cgroup_cpu_limit() -> Optional[float]:
+    """CPU limit of the container in cores (e.g. 2.0 for a 2000m limit); None if unlimited."""
+    cpu_max = _read(CGROUP_V2_CPU_MAX)
+    if cpu_max:
+        quota, _, period = cpu_max.partition(" ")
+        if quota != "max" and period:
+            return int(quota) / int(period)
+        return None
+    quota, period = _read(CGROUP_V1_CPU_QUOTA), _read(CGROUP_V1_CPU_PERIOD)
+    if quota and period and int(quota) > 0:
+        return int(quota) / int(period)
+    return None
+
+
+def available_cpus() -> int:
+    """CPUs this process may be scheduled on."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # Not available on macOS
+        return os.cpu_count() or 1
+
+
+def default_workers(cpu_limit: Optional[float] = None, cpus: Optional[int] = None, max_workers: int = WEB_MAX_WORKERS) -> int:
+    """
+    One worker per usable core: the CPU limit rounded down (a partial core
+    would only be throttled), capped by the visible CPUs and max_workers.
+    """
+    cpus = cpus or available_cpus()
+    limit = cgroup_cpu_limit() if cpu_limit is None else cpu_limit
+    usable = min(cpus, math.floor(limit)) if limit else cpus
+    return max(1, min(usable, max_workers))
+
+
+# ============= Entry Point ============= #
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the API with preforked uvicorn workers.")
+    parser.add_argument("--workers", type=int, default=int(WEB_CONCURRENCY) if WEB_CONCURRENCY else None,
+                        help="Worker processes (default: WEB_CONCURRENCY, else one per available CPU)")
+    parser.add_argument("--provider", default=os.getenv("LLM_PROVIDER", "ollama"), choices=available_providers())
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    args = parser.parse_args()
+
+    workers = args.workers or default_workers()
+
+    # Once for the whole pod; workers inherit the environment and skip it
+    setup_schema()
+    os.environ[SCHEMA_SETUP_DONE_ENV] = "1"
+    os.environ["LLM_PROVIDER"] = args.provider
+
+    logger.info(
+        f"Starting {workers} worker(s) ({args.provider}) on {args.host}:{args.port}; "
+        f"CPU limit {cgroup_cpu_limit() or 'none'}, {available_cpus()} CPU(s) visible"
+    )
+
+    import uvicorn
+
+    # Each worker imports the factory and runs its own lifespan (LLM, checkpointer pool, graph)
+    uvicorn.run(
+        "app.factory:create_app",
+        factory=True,
+        host=args.host,
+        port=args.port,
+        workers=workers,
+        log_level="info",
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,491 @@
+"""
+Plan Service
+Runtime state and plan-generation logic shared by every API app: the
+compiled graph, its checkpointer, concurrency limits, request coalescing,
+the plan cache and LLM metrics. One PlanService is created per app by
+app.factory.create_app and reached from routes via get_service.
+"""
+
+import logging
+import os
+import time
+from typing import Optional
+
+from fastapi import HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+
+from app.cache import get_plan_cache, plan_cache_key, start_purge_loop
+from app.checkpoint_retention import schedule_compaction, start_retention_loop
+from app.concurrency import PlanLimiter, SingleFlight
+from app.database import SessionLocal
+from app.backends import parse_base_urls
+from app.graph import create_graph, initialize_state, get_async_checkpointer, ephemeral_graph, should_persist
+from app.migrations import setup_schema
+from app.models import LLMMetrics
+from app.providers import ProviderSpec, build_chat_model_from_env, get_http_pool, get_provider, probe_chat_model
+from app.schemas import Critique, PlanResponse, WorkoutPlan, WorkoutRequest
+from app.streaming import format_sse, stream_graph_events
+from app.structured_output import STRUCTURED_OUTPUT
+from app.tracing import NODE_SPANS_ENABLED, Trace, save_spans, trace_run
+from app.keepalive import KeepAliveScheduler, keepalive_models
+from app.verdicts import get_verdict_store
+from app.warmup import WARMUP_REQUIRED_FOR_READY, Warmup
+
+
+logger = logging.getLogger(__name__)
+
+# Create a special logger for LLM metrics
+llm_metrics_logger = logging.getLogger("llm_metrics")
+llm_metrics_logger.setLevel(logging.INFO)
+
+# Usage reported for responses served without running the graph (cache hits, coalesced)
+NO_LLM_USAGE = {"llm_calls": 0, "tokens_input": 0, "tokens_output": 0}
+
+
+class PlanService:
+    """
+    Everything a running API app needs to generate plans.
+
+    Built cheaply when the app is created; start() (run from the lifespan)
+    builds the LLM, opens the checkpointer and compiles the graph, then
+    warms the model up in the background.
+    """
+
+    def __init__(self, provider: str):
+        self.provider: ProviderSpec = get_provider(provider)
+        self.model = self.provider.model
+        self.llm_options = self.provider.env_options()
+
+        self.graph_app = None
+        self.ephemeral_app = None  # graph_app without checkpoint I/O, for persist=False requests
+        self.checkpointer = None
+        self._retention_task = None
+        self._cache_purge_task = None
+        self.warmup = Warmup()
+        self.keepalive: Optional[KeepAliveScheduler] = None
+
+        # Bounds concurrent graph executions (PLAN_MAX_CONCURRENCY / PLAN_QUEUE_TIMEOUT_SECONDS)
+        self.plan_limiter = PlanLimiter()
+
+        # Concurrent identical /plan requests share one graph execution
+        self.plan_single_flight = SingleFlight()
+
+        # Content-addressed cache of SAFE plans (PLAN_CACHE_BACKEND / PLAN_CACHE_TTL_SECONDS)
+        self.plan_cache = get_plan_cache()
+
+        # Exercise × injury verdicts reused by critique_plan (CRITIQUE_VERDICT_STORE)
+        self.verdict_store = get_verdict_store()
+
+    @property
+    def llm_provider_label(self) -> str:
+        return f"{self.provider.label} ({self.model})"
+
+    # ============= Lifecycle ============= #
+
+    async def start(self):
+        """Initialize the database, LLM, checkpointer and graph (app startup)."""
+        missing = [name for name in self.provider.required_env if not os.getenv(name)]
+        if missing:
+            raise ValueError(f"{', '.join(missing)} environment variable is required for provider {self.provider.name!r}")
+
+        # App and checkpoint tables, once across processes (advisory lock; skipped
+        # in workers of app.serve, which ran it before forking)
+        logger.info("Initializing database tables...")
+        postgres_url = os.getenv("POSTGRES_URL")
+        await run_in_threadpool(setup_schema, postgres_url)
+
+        logger.info(f"Initializing {self.llm_provider_label} LLM")
+
+        # Initialize LLM (shared keep-alive HTTP pool, see app/providers.py)
+        llm = build_chat_model_from_env(self.provider.name, temperature=0.7)
+
+        # Initialize this process's checkpointer pool (async saver, since /plan uses graph.ainvoke)
+        if postgres_url:
+            self.checkpointer = await get_async_checkpointer(postgres_url, setup=False)
+        else:
+            logger.warning("No POSTGRES_URL set. Running without state persistence.")
+
+        # Delete threads past CHECKPOINT_RETENTION_DAYS in the background
+        self._retention_task = start_retention_loop(self.checkpointer)
+
+        # Delete plan cache entries past PLAN_CACHE_TTL_SECONDS (one process at a time)
+        self._cache_purge_task = start_purge_loop(self.plan_cache)
+
+        # Create graph
+        self.graph_app = create_graph(
+            llm, self.checkpointer, verdict_store=self.verdict_store,
+            structured_output=self.provider.structured_output if STRUCTURED_OUTPUT else None,
+        )
+        self.ephemeral_app = ephemeral_graph(self.graph_app)
+
+        # Load the model in the background; requests can arrive meanwhile
+        warm_up = self.provider.warm_up or probe_chat_model
+        self.warmup.start(lambda: warm_up(llm), on_attempt=self._warmup_attempt)
+
+        # Keep it loaded between requests while traffic is expected (OLLAMA_KEEPALIVE_*)
+        if self.provider.keep_alive_ping and self.llm_options.get("base_url"):
+            self.keepalive = KeepAliveScheduler(
+                parse_base_urls(self.llm_options["base_url"]),
+                keepalive_models(self.model),
+                self.provider.keep_alive_ping,
+            )
+            self.keepalive.start()
+        logger.info(f"Plan service initialized ({self.llm_provider_label})")
+
+    def _warmup_attempt(self, success: bool, latency_ms: int, error: Optional[str]):
+        """Record each warm-up attempt in LLM metrics."""
+        self.log_llm_metrics("warmup", latency_ms, success=success, error_message=error)
+
+    async def stop(self):
+        """Stop background work and close connection pools (app shutdown)."""
+        self.warmup.cancel()
+        if self.keepalive:
+            self.keepalive.cancel()
+        if self._retention_task:
+            self._retention_task.cancel()
+        if self._cache_purge_task:
+            self._cache_purge_task.cancel()
+        if self.checkpointer:
+            # Close the checkpoint connection pool (waits for checked-out connections)
+            try:
+                await self.checkpointer.conn.close()
+            except Exception as e:
+                logger.warning(f"Failed to close checkpointer pool: {e}")
+        await get_http_pool().aclose()
+
+    @property
+    def ready(self) -> bool:
+        """Started, and warm if WARMUP_REQUIRED_FOR_READY is set."""
+        return self.graph_app is not None and (self.warmup.ready or not WARMUP_REQUIRED_FOR_READY)
+
+    def require_graph(self):
+        """Raise 503 until start() has compiled the graph."""
+        if not self.graph_app:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Graph not initialized. Check server logs."
+            )
+
+    # ============= LLM Metrics Logging ============= #
+
+    def log_llm_metrics(
+        self,
+        endpoint: str,
+        latency_ms: int,
+        success: bool = True,
+        error_message: str = None,
+        revision_count: int = None,
+        safety_triggered: bool = False,
+        tokens_input: int = None,
+        tokens_output: int = None,
+        user_id: int = None,
+        llm_calls_saved: int = 0,
+        llm_calls_wasted: int = 0
+    ):
+        """Log LLM request metrics to both logger and database."""
+
+        # Log to console with styled output
+        status_icon = "✅" if success else "❌"
+        latency_color = "🟢" if latency_ms < 5000 else "🟡" if latency_ms < 15000 else "🔴"
+
+        llm_metrics_logger.info(
+            f"{status_icon} LLM Request Complete | "
+            f"Endpoint: {endpoint} | "
+            f"Latency: {latency_color} {latency_ms}ms | "
+            f"Revisions: {revision_count or 0} | "
+            f"Safety Triggered: {'Yes' if safety_triggered else 'No'}"
+            + (f" | LLM Calls Saved: {llm_calls_saved}" if llm_calls_saved else "")
+            + (f" | LLM Calls Wasted: {llm_calls_wasted}" if llm_calls_wasted else "")
+        )
+
+        # Log detailed metrics
+        if tokens_input or tokens_output:
+            llm_metrics_logger.info(
+                f"   📊 Tokens: Input={tokens_input or 'N/A'}, Output={tokens_output or 'N/A'}"
+            )
+
+        # Save to database
+        try:
+            db = SessionLocal()
+            metric = LLMMetrics(
+                endpoint=endpoint,
+                latency_ms=latency_ms,
+                success=success,
+                error_message=error_message,
+                revision_count=revision_count,
+                safety_triggered=safety_triggered,
+                tokens_input=tokens_input,
+                tokens_output=tokens_output,
+                user_id=user_id,
+                model_name=self.model,
+                llm_calls_saved=llm_calls_saved,
+                llm_calls_wasted=llm_calls_wasted
+            )
+            db.add(metric)
+            db.commit()
+            db.close()
+        except Exception as e:
+            logger.warning(f"Failed to save LLM metrics to database: {e}")
+
+    # ============= Plan Generation ============= #
+
+    async def generate(self, request: WorkoutRequest) -> PlanResponse:
+        """
+        PlanResponse for a request: from the cache, a coalesced in-flight run,
+        or a new graph run inside a concurrency slot.
+        """
+        # Cache hits skip the graph entirely and never occupy a concurrency slot
+        cached = await self.cache_lookup(request)
+        if cached:
+            return cached
+
+        # Identical requests already in flight share that execution's result
+        response = await self.plan_single_flight.run(self.single_flight_key(request), lambda: self._limited_run(request))
+        if response.thread_id != request.thread_id:
+            logger.info(f"Coalesced plan request for thread_id={request.thread_id}")
+            response = response.model_copy(update={"thread_id": request.thread_id, **NO_LLM_USAGE})
+        return response
+
+    def single_flight_key(self, request: WorkoutRequest) -> str:
+        """
+        Coalescing key: ephemeral runs share by content alone, but a persisted
+        run writes its own thread's checkpoints, so it only joins a run for
+        the same thread (e.g. a client retry).
+        """
+        if should_persist(request.persist):
+            return f"{self.cache_key(request)}:thread:{request.thread_id}"
+        return f"{self.cache_key(request)}:ephemeral"
+
+    async def _limited_run(self, request: WorkoutRequest) -> PlanResponse:
+        """Run the graph inside a concurrency slot, mapping queue timeouts to 503."""
+        try:
+            async with self.plan_limiter.slot():
+                return await self._run_plan(request)
+        except TimeoutError as e:
+            logger.warning(f"Plan request rejected: {e}")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server busy generating other plans. Please retry shortly."
+            )
+
+    def graph_for(self, request: WorkoutRequest):
+        """Compiled graph for a request: checkpointed, or without checkpoint I/O when not persisting."""
+        return self.graph_app if should_persist(request.persist) else self.ephemeral_app
+
+    def prepare_run(self, request: WorkoutRequest) -> tuple[dict, dict]:
+        """Build the initial graph state and thread config for a request."""
+        # Initialize state
+        initial_state = initialize_state(
+            user_profile=request.user_profile.model_dump(),
+            injury_history=[inj.model_dump() for inj in request.injury_history],
+            thread_id=request.thread_id,
+        )
+
+        # Configure thread persistence (ignored by ephemeral_app)
+        if not should_persist(request.persist):
+            logger.info(f"Ephemeral run for thread_id={request.thread_id}: no checkpoints written")
+        config = {
+            "configurable": {
+                "thread_id": request.thread_id
+            }
+        }
+
+        return initial_state, config
+
+    # ============= Plan Cache ============= #
+
+    def cache_key(self, request: WorkoutRequest) -> str:
+        """Cache key for a request: normalized profile + injuries, scoped to the model."""
+        return plan_cache_key(
+            request.user_profile.model_dump(),
+            [inj.model_dump() for inj in request.injury_history],
+            namespace=f"{self.provider.name}:{self.model}",
+        )
+
+    async def cache_lookup(self, request: WorkoutRequest) -> Optional[PlanResponse]:
+        """
+        Return a cached PlanResponse for this request, re-stamped with its
+        thread_id. A persisted hit is also checkpointed on that thread.
+        """
+        if not self.plan_cache:
+            return None
+
+        cached = await run_in_threadpool(self.plan_cache.get, self.cache_key(request))
+        if cached is None:
+            return None
+
+        logger.info(f"Plan cache hit for thread_id={request.thread_id}")
+        response = PlanResponse(**cached, thread_id=request.thread_id, **NO_LLM_USAGE)
+        if should_persist(request.persist):
+            await self._checkpoint_cached(request, response)
+        return response
+
+    async def _checkpoint_cached(self, request: WorkoutRequest, response: PlanResponse):
+        """
+        Write a cache hit to its own thread as a finished run, so /history
+        finds the thread_id the client was given. The plan is recorded as
+        the critique_plan output; cached plans are SAFE, so the thread ends there.
+        """
+        if not self.checkpointer:
+            return
+
+        initial_state, config = self.prepare_run(request)
+        await self.graph_app.aupdate_state(
+            config,
+            {
+                **initial_state,
+                "workout_plan": response.workout_plan.model_dump(mode="json"),
+                "critique": response.critique.model_dump(mode="json"),
+                "revision_count": response.revision_count,
+            },
+            as_node="critique_plan",
+        )
+
+    async def _cache_store(self, request: WorkoutRequest, response: PlanResponse):
+        """Cache a finished plan. Only SAFE plans are stored so retries can still improve UNSAFE ones."""
+        if not self.plan_cache or response.critique.status != "SAFE":
+            return
+
+        await run_in_threadpool(
+            self.plan_cache.set,
+            self.cache_key(request),
+            response.model_dump(mode="json", exclude={"thread_id", *NO_LLM_USAGE}),
+        )
+
+    # ============= Run Bookkeeping ============= #
+
+    async def _complete_run(
+        self,
+        request: WorkoutRequest,
+        final_state: dict,
+        start_time: float,
+        endpoint: str = "/plan",
+    ) -> PlanResponse:
+        """Record LLM metrics for a finished graph run and build the API response."""
+        # Calculate metrics
+        latency_ms = int((time.time() - start_time) * 1000)
+        revision_count = final_state.get('revision_count', 0)
+        safety_triggered = revision_count > 1
+
+        # Provider-reported usage, summed over every draft, revision and critique call
+        tokens_input = final_state.get("tokens_input", 0)
+        tokens_output = final_state.get("tokens_output", 0)
+
+        # Log LLM metrics (DB write off the event loop)
+        await run_in_threadpool(
+            self.log_llm_metrics,
+            endpoint=endpoint,
+            latency_ms=latency_ms,
+            success=True,
+            revision_count=revision_count,
+            safety_triggered=safety_triggered,
+            tokens_input=tokens_input or None,
+            tokens_output=tokens_output or None,
+            llm_calls_saved=final_state.get("llm_calls_saved", 0),
+            llm_calls_wasted=final_state.get("llm_calls_wasted", 0)
+        )
+
+        logger.info(f"Plan generated successfully. Revisions: {revision_count}, Latency: {latency_ms}ms")
+
+        # Parse response
+        workout_plan = WorkoutPlan(**final_state["workout_plan"])
+        critique = Critique(**final_state["critique"])
+
+        response = PlanResponse(
+            workout_plan=workout_plan,
+            critique=critique,
+            revision_count=revision_count,
+            thread_id=request.thread_id,
+            llm_calls=final_state.get("llm_calls", 0),
+            tokens_input=tokens_input,
+            tokens_output=tokens_output,
+        )
+
+        await self._cache_store(request, response)
+        # Keep one checkpoint per revision of the finished thread
+        if should_persist(request.persist):
+            schedule_compaction(self.checkpointer, request.thread_id)
+        return response
+
+    async def _record_failure(self, error: Exception, start_time: float, endpoint: str = "/plan"):
+        """Record a failed graph run in LLM metrics and the error log."""
+        latency_ms = int((time.time() - start_time) * 1000)
+        await run_in_threadpool(
+            self.log_llm_metrics,
+            endpoint=endpoint,
+            latency_ms=latency_ms,
+            success=False,
+            error_message=str(error)
+        )
+
+        logger.error(f"Error generating plan: {error}", exc_info=True)
+
+    async def _run_plan(self, request: WorkoutRequest) -> PlanResponse:
+        """Execute the graph for one request and record LLM metrics."""
+        start_time = time.time()
+
+        with trace_run(thread_id=request.thread_id, endpoint="/plan") as trace:
+            try:
+                logger.info(f"Generating plan for thread_id={request.thread_id} (request_id={trace.request_id})")
+
+                initial_state, config = self.prepare_run(request)
+
+                # Invoke graph workflow
+                final_state = await self.graph_for(request).ainvoke(initial_state, config=config)
+
+                return await self._complete_run(request, final_state, start_time)
+
+            except Exception as e:
+                await self._record_failure(e, start_time)
+                raise HTTPException(
+                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    detail=f"Failed to generate plan: {str(e)}"
+                )
+            finally:
+                await self._save_trace(trace)
+
+    async def _save_trace(self, trace: Trace):
+        """Log per-node timings for a run and persist its spans to node_spans."""
+        logger.info(f"Node timings (request_id={trace.request_id}): {trace.summary()}")
+        if NODE_SPANS_ENABLED:
+            await run_in_threadpool(save_spans, trace)
+
+    # ============= Streaming ============= #
+
+    async def event_stream(self, request: WorkoutRequest, tokens: bool):
+        """SSE body for /plan/stream: one frame per graph event, then done or error."""
+        cached = await self.cache_lookup(request)
+        if cached:
+            yield format_sse("done", cached.model_dump(mode="json"))
+            return
+
+        try:
+            async with self.plan_limiter.slot():
+                start_time = time.time()
+
+                with trace_run(thread_id=request.thread_id, endpoint="/plan/stream") as trace:
+                    try:
+                        logger.info(f"Streaming plan for thread_id={request.thread_id} (request_id={trace.request_id})")
+                        initial_state, config = self.prepare_run(request)
+
+                        async for event, payload in stream_graph_events(self.graph_for(request), initial_state, config, tokens=tokens):
+                            if event == "result":
+                                response = await self._complete_run(request, payload, start_time, endpoint="/plan/stream")
+                                yield format_sse("done", response.model_dump(mode="json"))
+                            else:
+                                yield format_sse(event, payload)
+
+                    except Exception as e:
+                        await self._record_failure(e, start_time, endpoint="/plan/stream")
+                        yield format_sse("error", {"detail": f"Failed to generate plan: {str(e)}"})
+                    finally:
+                        await self._save_trace(trace)
+
+        except TimeoutError as e:
+            logger.warning(f"Plan stream rejected: {e}")
+            yield format_sse("error", {"detail": "Server busy generating other plans. Please retry shortly."})
+
+
+def get_service(request: Request) -> PlanService:
+    """FastAPI dependency: the PlanService of the app handling the request."""
+    return request.app.state.service
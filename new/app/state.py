@@ -24,6 +24,14 @@ class TrainerState(TypedDict, total=False):
     
     # Loop control
     revision_count: int  # Number of revisions made (max 3)
+    llm_calls_saved: int  # Critique LLM calls skipped (no injuries / stored verdicts)
+    pending_exercises: Optional[list[str]]  # Exercises the next critique must review (None = all)
+    
+    # Usage accounting (summed over every LLM call in the run)
+    llm_calls: int  # LLM calls actually made
+    llm_calls_wasted: int  # Calls spent on speculative candidates that were not chosen
+    tokens_input: int  # Prompt tokens reported by the provider
+    tokens_output: int  # Completion tokens reported by the provider
     
     # Session management
     thread_id: str  # User session identifier for persistence
@@ -0,0 +1,71 @@
+"""
+Server-Sent Events helpers for streaming plan generation progress.
+Wraps LangGraph's astream() so clients see each draft and critique as soon as
+the corresponding node finishes, instead of waiting for the whole loop.
+"""
+
+import json
+from typing import AsyncIterator
+
+
+# Nodes whose output is pushed to the client
+STREAMED_NODES = ("draft_plan", "critique_plan", "approve_plan", "speculative_draft")
+
+# Only the trainer's tokens are streamed; the critique is short JSON
+TOKEN_NODES = ("draft_plan",)
+
+
+def format_sse(event: str, data: dict) -> str:
+    """Encode one Server-Sent Event frame."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+async def stream_graph_events(
+    graph_app,
+    initial_state: dict,
+    config: dict,
+    tokens: bool = False,
+) -> AsyncIterator[tuple[str, dict]]:
+    """
+    Run the graph through astream() and yield (event, payload) pairs.
+
+    Events:
+        token    - incremental trainer LLM output (only when tokens=True)
+        draft    - draft_plan finished: {"revision": int, "workout_plan": dict}
+        critique - critique_plan (or approve_plan) finished: {"revision": int, "critique": dict}
+                   (speculative_draft emits the winning draft, then its critique)
+        result   - final merged state, always the last event
+
+    Args:
+        graph_app: Compiled LangGraph workflow
+        initial_state: State from initialize_state()
+        config: Runnable config (thread_id etc.)
+        tokens: Also stream token-level output from the trainer LLM
+    """
+    stream_mode = ["updates", "messages"] if tokens else ["updates"]
+    final_state = dict(initial_state)
+
+    async for mode, chunk in graph_app.astream(initial_state, config=config, stream_mode=stream_mode):
+        if mode == "messages":
+            message, metadata = chunk
+            if metadata.get("langgraph_node") in TOKEN_NODES and message.content:
+                yield "token", {"node": metadata["langgraph_node"], "content": message.content}
+            continue
+
+        for node, update in chunk.items():
+            if node not in STREAMED_NODES or not update:
+                continue
+            final_state.update(update)
+
+            if node in ("draft_plan", "speculative_draft"):
+                yield "draft", {
+                    "revision": final_state.get("revision_count", 0),
+                    "workout_plan": final_state.get("workout_plan"),
+                }
+            if node != "draft_plan":
+                yield "critique", {
+                    "revision": final_state.get("revision_count", 0),
+                    "critique": final_state.get("critique"),
+                }
+
+    yield "result", final_state
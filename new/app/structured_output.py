@@ -0,0 +1,116 @@
+"""
+Schema-constrained LLM output.
+Binds JSON schemas derived from the response models to the chat model so the
+provider constrains decoding: Ollama's `format` parameter and OpenAI
+structured outputs. Responses are then bare JSON objects with no prose or
+code fences to strip.
+"""
+
+import copy
+import os
+from typing import Optional
+
+from pydantic import BaseModel
+
+from app.schemas import Critique, Exercise, WorkoutPlan
+
+
+STRUCTURED_OUTPUT = os.getenv("STRUCTURED_OUTPUT", "true").lower() in ("1", "true", "yes")
+
+PROVIDERS = ("ollama", "openai")
+
+# Keywords OpenAI strict mode rejects; dropped from every schema for consistency
+_UNSUPPORTED_KEYWORDS = ("default", "title", "exclusiveMinimum", "exclusiveMaximum", "minimum", "maximum")
+
+
+class ExerciseReplacements(BaseModel):
+    """Targeted revision response: replacements for the flagged exercises."""
+    exercises: list[Exercise]
+
+
+# ============= Schema Conversion ============= #
+
+def _inline_refs(node, defs: dict):
+    """Replace {"$ref": "#/$defs/X"} with the referenced definition."""
+    if isinstance(node, dict):
+        if "$ref" in node:
+            return _inline_refs(copy.deepcopy(defs[node["$ref"].split("/")[-1]]), defs)
+        return {k: _inline_refs(v, defs) for k, v in node.items()}
+    if isinstance(node, list):
+        return [_inline_refs(v, defs) for v in node]
+    return node
+
+
+def _strict(node):
+    """Close every object and require all of its properties (optional ones stay nullable)."""
+    if isinstance(node, list):
+        return [_strict(v) for v in node]
+    if not isinstance(node, dict):
+        return node
+
+    properties = node.get("properties")
+    node = {k: _strict(v) for k, v in node.items() if k not in _UNSUPPORTED_KEYWORDS and k != "properties"}
+    if properties is not None:
+        # Property names are data, not keywords; only their schemas are cleaned
+        node["properties"] = {k: _strict(v) for k, v in properties.items()}
+    if node.get("type") == "object" and "properties" in node:
+        node["required"] = list(node["properties"])
+        node["additionalProperties"] = False
+    return node
+
+
+def response_schema(model: type[BaseModel]) -> dict:
+    """
+    JSON schema for a response model, in the subset both providers accept.
+
+    References are inlined, every object is closed (additionalProperties
+    false) and lists all properties as required, as OpenAI strict mode demands.
+    """
+    schema = model.model_json_schema()
+    defs = schema.pop("$defs", {})
+    return _strict(_inline_refs(schema, defs))
+
+
+PLAN_SCHEMA = response_schema(WorkoutPlan)
+CRITIQUE_SCHEMA = response_schema(Critique)
+REVISION_SCHEMA = response_schema(ExerciseReplacements)
+
+
+# ============= Provider Binding ============= #
+
+def bind_schema(llm, provider: str, name: str, schema: dict):
+    """
+    Bind a JSON schema to a chat model for one provider.
+
+    Args:
+        llm: ChatOllama or ChatOpenAI instance
+        provider: "ollama" or "openai"
+        name: Schema name (reported by OpenAI)
+        schema: JSON schema from response_schema()
+
+    Returns:
+        Runnable that still returns an AIMessage whose content is the JSON
+    """
+    if provider == "ollama":
+        return llm.bind(format=schema)
+    if provider == "openai":
+        return llm.bind(response_format={
+            "type": "json_schema",
+            "json_schema": {"name": name, "schema": schema, "strict": True},
+        })
+    raise ValueError(f"Unknown structured output provider: {provider!r} (expected one of {PROVIDERS})")
+
+
+def structured_llms(llm, provider: Optional[str]) -> dict:
+    """
+    Per-node models for the graph: draft, revision and critique.
+
+    With provider None every node uses the unconstrained llm.
+    """
+    if provider is None:
+        return {"draft": llm, "revision": llm, "critique": llm}
+    return {
+        "draft": bind_schema(llm, provider, "workout_plan", PLAN_SCHEMA),
+        "revision": bind_schema(llm, provider, "exercise_replacements", REVISION_SCHEMA),
+        "critique": bind_schema(llm, provider, "critique", CRITIQUE_SCHEMA),
+    }
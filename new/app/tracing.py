@@ -0,0 +1,194 @@
+"""
+Per-node latency spans for the LangGraph workflow.
+Each graph run gets a Trace (carried in a context variable, so nodes need no
+extra arguments); nodes record wall, LLM and parse time and the checkpointer
+records its reads and writes. Spans are persisted to node_spans, one row per
+execution, linked by request id.
+"""
+
+import functools
+import math
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Optional
+
+
+NODE_SPANS_ENABLED = os.getenv("NODE_SPANS_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Checkpointer methods timed by instrument_checkpointer()
+CHECKPOINT_METHODS = ("get_tuple", "put", "put_writes", "aget_tuple", "aput", "aput_writes")
+
+
+@dataclass
+class Span:
+    """Timing for one node (or checkpoint operation) execution."""
+    node: str
+    revision: Optional[int] = None
+    started_at: datetime = field(default_factory=datetime.utcnow)
+    wall_ms: float = 0.0
+    llm_ms: Optional[float] = None
+    parse_ms: Optional[float] = None
+    prompt_tokens: Optional[int] = None  # Estimated size of the prompt sent
+    success: bool = True
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time a phase of the node ("llm" or "parse"); repeated phases accumulate."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            attr = f"{name}_ms"
+            setattr(self, attr, (getattr(self, attr) or 0.0) + elapsed)
+
+
+class Trace:
+    """Spans collected during one graph run."""
+
+    def __init__(self, request_id: Optional[str] = None, thread_id: Optional[str] = None, endpoint: str = ""):
+        self.request_id = request_id or str(uuid.uuid4())
+        self.thread_id = thread_id
+        self.endpoint = endpoint
+        self.spans: list[Span] = []
+        self._lock = threading.Lock()  # Sync graphs may run nodes in worker threads
+
+    def add(self, span: Span):
+        with self._lock:
+            self.spans.append(span)
+
+    def summary(self) -> dict:
+        """Total milliseconds per node name, for logging."""
+        totals: dict[str, float] = {}
+        for span in self.spans:
+            totals[span.node] = totals.get(span.node, 0.0) + span.wall_ms
+        return {node: int(ms) for node, ms in totals.items()}
+
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("current_trace", default=None)
+
+
+def current_trace() -> Optional[Trace]:
+    """Trace of the graph run in progress, if any."""
+    return _current_trace.get()
+
+
+@contextmanager
+def trace_run(request_id: Optional[str] = None, thread_id: Optional[str] = None, endpoint: str = ""):
+    """
+    Collect spans for everything executed inside the block.
+
+    Usage:
+        with trace_run(thread_id=request.thread_id, endpoint="/plan") as trace:
+            await graph_app.ainvoke(...)
+        save_spans(trace)
+    """
+    trace = Trace(request_id, thread_id, endpoint)
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+
+
+@contextmanager
+def node_span(node: str, revision: Optional[int] = None):
+    """
+    Time one node execution and attach it to the current trace.
+
+    Yields the Span so the node can time phases with span.phase("llm").
+    Outside a trace the span is timed but discarded.
+    """
+    span = Span(node=node, revision=revision)
+    start = time.perf_counter()
+    try:
+        yield span
+    except BaseException:
+        span.success = False
+        raise
+    finally:
+        span.wall_ms = (time.perf_counter() - start) * 1000
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.add(span)
+
+
+# ============= Checkpointer Instrumentation ============= #
+
+def _timed(method, name: str):
+    if name.startswith("a"):
+        @functools.wraps(method)
+        async def async_wrapper(*args, **kwargs):
+            with node_span(f"checkpoint.{name[1:]}"):
+                return await method(*args, **kwargs)
+        return async_wrapper
+
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        with node_span(f"checkpoint.{name}"):
+            return method(*args, **kwargs)
+    return wrapper
+
+
+def instrument_checkpointer(checkpointer):
+    """
+    Record a span for every checkpoint read and write.
+
+    Wraps the saver's methods on the instance, so it keeps working with any
+    PostgresSaver / AsyncPostgresSaver version and isinstance checks still pass.
+    Returns the same object (None passes through).
+    """
+    if checkpointer is None or getattr(checkpointer, "_spans_instrumented", False):
+        return checkpointer
+    for name in CHECKPOINT_METHODS:
+        method = getattr(checkpointer, name, None)
+        if method is not None:
+            setattr(checkpointer, name, _timed(method, name))
+    checkpointer._spans_instrumented = True
+    return checkpointer
+
+
+# ============= Persistence ============= #
+
+def save_spans(trace: Trace) -> None:
+    """Write one node_spans row per span. Errors are logged, never raised."""
+    if not trace.spans:
+        return
+    try:
+        from app.database import get_db_context
+        from app.models import NodeSpan
+
+        with get_db_context() as db:
+            db.add_all([
+                NodeSpan(
+                    request_id=trace.request_id,
+                    thread_id=trace.thread_id,
+                    endpoint=trace.endpoint,
+                    node=span.node,
+                    revision=span.revision,
+                    started_at=span.started_at,
+                    wall_ms=round(span.wall_ms, 2),
+                    llm_ms=round(span.llm_ms, 2) if span.llm_ms is not None else None,
+                    parse_ms=round(span.parse_ms, 2) if span.parse_ms is not None else None,
+                    prompt_tokens=span.prompt_tokens,
+                    success=span.success,
+                )
+                for span in trace.spans
+            ])
+    except Exception as e:
+        print(f"[WARNING] Failed to save node spans: {e}")
+
+
+def percentile(values: list[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile (pct in 0-100); None for no values."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(0, math.ceil(pct / 100 * len(ordered)) - 1)
+    return ordered[index]
@@ -0,0 +1,297 @@
+"""
+Exercise × injury critique verdict store.
+Remembers the physiotherapist's per-exercise decisions so critique_plan only
+sends exercises it has never judged against the user's injuries to the LLM.
+"""
+
+import os
+import re
+import threading
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Optional
+
+
+CRITIQUE_VERDICT_STORE = os.getenv("CRITIQUE_VERDICT_STORE", "database")  # database | memory | none
+
+
+# ============= Normalization ============= #
+
+def _norm_words(value) -> str:
+    """Lowercase, replace punctuation with spaces and collapse whitespace."""
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", str(value or "").lower()).split())
+
+
+def normalize_exercise(name: str) -> str:
+    """
+    Canonical exercise name: "Push-Ups" and "push ups" both become "push up".
+
+    Only a trailing plural "s" on the last word is dropped ("press" is kept).
+    """
+    words = _norm_words(name).split()
+    if words and len(words[-1]) > 2 and words[-1].endswith("s") and not words[-1].endswith("ss"):
+        words[-1] = words[-1][:-1]
+    return " ".join(words)
+
+
+def normalize_injury(injury_type: str) -> str:
+    """Canonical injury type."""
+    return _norm_words(injury_type)
+
+
+def verdict_key(exercise_name: str, injury: dict) -> tuple[str, str, str]:
+    """Store key: (normalized exercise, normalized injury type, severity)."""
+    return (
+        normalize_exercise(exercise_name),
+        normalize_injury(injury.get("injury_type")),
+        _norm_words(injury.get("severity")),
+    )
+
+
+# ============= Stores ============= #
+
+class VerdictStore(ABC):
+    """
+    Interface for verdict storage plus screening counters.
+
+    Values are {"verdict": "SAFE"|"UNSAFE", "feedback": str}.
+    """
+
+    def __init__(self):
+        self.exercises_screened = 0
+        self.exercises_known = 0
+        self.critiques_skipped = 0
+        self.verdicts_recorded = 0
+
+    @abstractmethod
+    def get_many(self, keys: list[tuple]) -> dict[tuple, dict]:
+        """Stored verdicts for the keys that have one."""
+
+    @abstractmethod
+    def put_many(self, entries: dict[tuple, dict]) -> None:
+        """Record verdicts, keeping a stored UNSAFE over a new SAFE."""
+
+    def stats(self) -> dict:
+        """Counters for metrics endpoints."""
+        return {
+            "exercises_screened": self.exercises_screened,
+            "exercises_known": self.exercises_known,
+            "critique_calls_skipped": self.critiques_skipped,
+            "verdicts_recorded": self.verdicts_recorded,
+        }
+
+
+def _merge_verdict(existing: Optional[dict], new: dict) -> dict:
+    """UNSAFE is sticky: a later SAFE never overrides a recorded UNSAFE."""
+    if existing and existing["verdict"] == "UNSAFE" and new["verdict"] == "SAFE":
+        return existing
+    return new
+
+
+class InMemoryVerdictStore(VerdictStore):
+    """Per-process verdict store (tests and single-worker setups)."""
+
+    def __init__(self):
+        super().__init__()
+        self._data: dict[tuple, dict] = {}
+        self._lock = threading.Lock()
+
+    def get_many(self, keys: list[tuple]) -> dict[tuple, dict]:
+        with self._lock:
+            return {k: self._data[k] for k in keys if k in self._data}
+
+    def put_many(self, entries: dict[tuple, dict]) -> None:
+        with self._lock:
+            for key, value in entries.items():
+                self._data[key] = _merge_verdict(self._data.get(key), value)
+
+
+class DatabaseVerdictStore(VerdictStore):
+    """Verdicts persisted in the exercise_verdicts table, shared by all workers."""
+
+    def get_many(self, keys: list[tuple]) -> dict[tuple, dict]:
+        if not keys:
+            return {}
+
+        from sqlalchemy import tuple_
+        from app.database import SessionLocal
+        from app.models import ExerciseVerdict
+
+        db = SessionLocal()
+        try:
+            rows = db.query(ExerciseVerdict).filter(
+                tuple_(ExerciseVerdict.exercise, ExerciseVerdict.injury_type, ExerciseVerdict.severity).in_(keys)
+            ).all()
+            return {
+                (r.exercise, r.injury_type, r.severity): {"verdict": r.verdict, "feedback": r.feedback or ""}
+                for r in rows
+            }
+        finally:
+            db.close()
+
+    def put_many(self, entries: dict[tuple, dict]) -> None:
+        if not entries:
+            return
+
+        from sqlalchemy.exc import IntegrityError
+        from app.database import get_db_context
+        from app.models import ExerciseVerdict
+
+        existing = self.get_many(list(entries))
+        try:
+            with get_db_context() as db:
+                for key, value in entries.items():
+                    merged = _merge_verdict(existing.get(key), value)
+                    if key in existing:
+                        if merged is existing[key]:
+                            continue
+                        db.query(ExerciseVerdict).filter(
+                            ExerciseVerdict.exercise == key[0],
+                            ExerciseVerdict.injury_type == key[1],
+                            ExerciseVerdict.severity == key[2],
+                        ).update({
+                            "verdict": merged["verdict"],
+                            "feedback": merged["feedback"],
+                            "updated_at": datetime.utcnow(),
+                        })
+                    else:
+                        db.add(ExerciseVerdict(
+                            exercise=key[0],
+                            injury_type=key[1],
+                            severity=key[2],
+                            verdict=merged["verdict"],
+                            feedback=merged["feedback"],
+                        ))
+        except IntegrityError:
+            # Another worker recorded the same pair concurrently; its verdict stands
+            pass
+
+
+def get_verdict_store(backend: str = CRITIQUE_VERDICT_STORE) -> Optional[VerdictStore]:
+    """
+    Build the verdict store selected by CRITIQUE_VERDICT_STORE.
+
+    Returns:
+        VerdictStore, or None when screening is disabled ("none")
+    """
+    if backend == "none":
+        return None
+    if backend == "memory":
+        return InMemoryVerdictStore()
+    if backend == "database":
+        return DatabaseVerdictStore()
+    raise ValueError(f"Unknown CRITIQUE_VERDICT_STORE: {backend!r} (expected database, memory or none)")
+
+
+# ============= Screening ============= #
+
+def screen_exercises(
+    store: VerdictStore,
+    exercises: list[dict],
+    injury_history: list[dict],
+) -> tuple[list[dict], dict[str, str]]:
+    """
+    Split exercises using stored verdicts.
+
+    Returns:
+        (unknown, known_unsafe) where unknown are exercises with at least one
+        unjudged injury pair (these go to the LLM) and known_unsafe maps the
+        names of exercises with a recorded UNSAFE pair to its feedback.
+    """
+    keys_by_exercise = {
+        i: [verdict_key(ex.get("name", ""), inj) for inj in injury_history]
+        for i, ex in enumerate(exercises)
+    }
+    known = store.get_many([k for keys in keys_by_exercise.values() for k in keys])
+
+    unknown = []
+    known_unsafe = {}
+    for i, ex in enumerate(exercises):
+        verdicts = [known.get(k) for k in keys_by_exercise[i]]
+        unsafe = [v for v in verdicts if v and v["verdict"] == "UNSAFE"]
+        if unsafe:
+            known_unsafe[ex.get("name", "Unknown")] = unsafe[0]["feedback"]
+        elif any(v is None for v in verdicts):
+            unknown.append(ex)
+
+    store.exercises_screened += len(exercises)
+    store.exercises_known += len(exercises) - len(unknown)
+    return unknown, known_unsafe
+
+
+def is_flagged(exercise_name: str, flagged: list[str]) -> bool:
+    """
+    Whether the exercise is among the flagged names, compared normalized
+    (case, punctuation and plural drift only; "Press" never matches "Leg Press").
+    """
+    name = normalize_exercise(exercise_name)
+    return bool(name) and any(normalize_exercise(f) == name for f in flagged)
+
+
+def record_verdicts(
+    store: VerdictStore,
+    reviewed: list[dict],
+    injury_history: list[dict],
+    critique: dict,
+) -> None:
+    """
+    Persist per-pair verdicts from an LLM critique of the reviewed exercises.
+
+    Only a SAFE critique clears exercises: each unflagged exercise was judged
+    safe against every injury at once, so it is SAFE for each pair. An UNSAFE
+    critique records nothing as SAFE, since an exercise it failed to name (or
+    named differently) may be the unsafe one; it only records the flagged
+    exercises, and only when the user has exactly one injury to attribute
+    them to.
+    """
+    status = critique.get("status")
+    flagged = critique.get("flagged_exercises") or []
+    feedback = critique.get("feedback", "")
+    entries = {}
+
+    for ex in reviewed:
+        name = ex.get("name", "")
+        if not normalize_exercise(name):
+            continue
+        if is_flagged(name, flagged):
+            if status == "UNSAFE" and len(injury_history) == 1:
+                entries[verdict_key(name, injury_history[0])] = {"verdict": "UNSAFE", "feedback": feedback}
+        elif status == "SAFE":
+            for inj in injury_history:
+                entries[verdict_key(name, inj)] = {"verdict": "SAFE", "feedback": ""}
+
+    store.put_many(entries)
+    store.verdicts_recorded += len(entries)
+
+
+def known_critique(known_unsafe: dict[str, str]) -> dict:
+    """Critique synthesized purely from stored verdicts (no LLM call)."""
+    if not known_unsafe:
+        return {
+            "status": "SAFE",
+            "feedback": "All exercises were previously cleared by the physiotherapist for these injuries.",
+            "flagged_exercises": [],
+        }
+    return {
+        "status": "UNSAFE",
+        "feedback": "\n".join(f"{name}: {fb}" for name, fb in known_unsafe.items()),
+        "flagged_exercises": list(known_unsafe),
+    }
+
+
+def merge_critiques(llm_critique: dict, known_unsafe: dict[str, str]) -> dict:
+    """Combine the LLM critique of unknown exercises with known-UNSAFE exercises."""
+    if not known_unsafe:
+        return llm_critique
+
+    known = known_critique(known_unsafe)
+    if llm_critique.get("status") == "UNSAFE":
+        feedback = f"{llm_critique.get('feedback', '')}\n{known['feedback']}"
+    else:
+        feedback = known["feedback"]
+
+    return {
+        "status": "UNSAFE",
+        "feedback": feedback,
+        "flagged_exercises": list(llm_critique.get("flagged_exercises") or []) + known["flagged_exercises"],
+    }
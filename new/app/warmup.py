@@ -0,0 +1,124 @@
+"""
+LLM Warm-up
+Loads the model in the background after startup instead of blocking the
+lifespan on a test generation, retrying with backoff until it succeeds.
+Progress is reported by GET /health/ready.
+
+How a provider warms up is set on its ProviderSpec (app/providers.py):
+Ollama loads the model into memory without generating a token, other
+providers make one short test call.
+"""
+
+import asyncio
+import os
+import time
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Optional
+
+
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "true").lower() in ("1", "true", "yes")
+WARMUP_TIMEOUT_SECONDS = float(os.getenv("WARMUP_TIMEOUT_SECONDS", "300"))  # Per attempt; a cold load can take minutes
+WARMUP_RETRY_SECONDS = float(os.getenv("WARMUP_RETRY_SECONDS", "5"))  # First retry delay, doubled per failure
+WARMUP_MAX_RETRY_SECONDS = float(os.getenv("WARMUP_MAX_RETRY_SECONDS", "60"))
+# Hold readiness (503) until the model is warm; by default traffic is accepted as soon as the app is up
+WARMUP_REQUIRED_FOR_READY = os.getenv("WARMUP_REQUIRED_FOR_READY", "false").lower() in ("1", "true", "yes")
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class Warmup:
+    """Background warm-up of one model, with its progress for /health/ready."""
+
+    def __init__(
+        self,
+        retry_seconds: float = WARMUP_RETRY_SECONDS,
+        max_retry_seconds: float = WARMUP_MAX_RETRY_SECONDS,
+        timeout_seconds: float = WARMUP_TIMEOUT_SECONDS,
+    ):
+        self.retry_seconds = retry_seconds
+        self.max_retry_seconds = max_retry_seconds
+        self.timeout_seconds = timeout_seconds
+        self.state = "pending"  # pending | warming | retrying | ready | disabled
+        self.attempts = 0
+        self.started_at: Optional[str] = None
+        self.ready_at: Optional[str] = None
+        self.duration_ms: Optional[int] = None
+        self.last_error: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.state in ("ready", "disabled")
+
+    def start(
+        self,
+        warm_up: Callable[[], Awaitable[None]],
+        on_attempt: Optional[Callable[[bool, int, Optional[str]], None]] = None,
+    ) -> Optional[asyncio.Task]:
+        """
+        Run warm_up in the background until it succeeds.
+
+        Args:
+            warm_up: Coroutine function that loads or probes the model
+            on_attempt: Called as (success, latency_ms, error) after each attempt,
+                in a worker thread so it may block (e.g. write metrics)
+        """
+        if not WARMUP_ENABLED:
+            self.state = "disabled"
+            return None
+        self._task = asyncio.create_task(self._run(warm_up, on_attempt))
+        return self._task
+
+    async def _run(self, warm_up, on_attempt):
+        self.started_at = _now()
+        started = time.perf_counter()
+        delay = self.retry_seconds
+        while True:
+            self.state = "warming" if self.attempts == 0 else "retrying"
+            self.attempts += 1
+            attempt_start = time.perf_counter()
+            error = None
+            try:
+                await asyncio.wait_for(warm_up(), timeout=self.timeout_seconds)
+            except asyncio.CancelledError:
+                raise
+            except asyncio.TimeoutError:
+                error = f"timed out after {self.timeout_seconds:g}s"
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+
+            latency_ms = int((time.perf_counter() - attempt_start) * 1000)
+
+            if error is None:
+                self.state = "ready"
+                self.ready_at = _now()
+                self.duration_ms = int((time.perf_counter() - started) * 1000)
+                self.last_error = None
+                print(f"[INFO] LLM warm-up complete after {self.attempts} attempt(s), {self.duration_ms}ms")
+            else:
+                self.last_error = error
+                print(f"[WARNING] LLM warm-up attempt {self.attempts} failed ({error}); retrying in {delay:g}s")
+
+            # Recorded after the state change so a slow metrics write never delays readiness
+            if on_attempt:
+                await asyncio.to_thread(on_attempt, error is None, latency_ms, error)
+            if error is None:
+                return
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_retry_seconds)
+
+    def cancel(self):
+        if self._task:
+            self._task.cancel()
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "attempts": self.attempts,
+            "started_at": self.started_at,
+            "ready_at": self.ready_at,
+            "duration_ms": self.duration_ms,
+            "last_error": self.last_error,
+        }
@@ -0,0 +1,301 @@
+"""
+Plan Job Worker Pool
+Claims queued jobs from the plan_jobs table and runs the LangGraph workflow,
+so plan generation scales independently of the API pods and outlives any
+single HTTP connection.
+
+Usage:
+    python -m app.worker [--workers N] [--provider ollama|openai]
+"""
+
+import argparse
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+import time
+
+from app.checkpoint_retention import CHECKPOINT_COMPACT_ON_COMPLETE, compact_thread
+from app.database import SessionLocal, get_db_context
+from app.graph import create_graph, initialize_state, get_checkpointer, ephemeral_graph, should_persist
+from app.jobs import PLAN_JOB_LEASE_SECONDS, claim_job, complete_job, fail_job, renew_lease
+from app.migrations import setup_schema
+from app.models import LLMMetrics
+from app.providers import available_providers, build_chat_model_from_env, get_provider
+from app.schemas import Critique, PlanResponse, WorkoutPlan, WorkoutRequest
+from app.structured_output import STRUCTURED_OUTPUT
+from app.tracing import NODE_SPANS_ENABLED, save_spans, trace_run
+from app.verdicts import get_verdict_store
+
+
+PLAN_WORKERS = int(os.getenv("PLAN_WORKERS", "2"))
+PLAN_WORKER_POLL_SECONDS = float(os.getenv("PLAN_WORKER_POLL_SECONDS", "1.0"))
+PLAN_WORKER_PROVIDER = os.getenv("PLAN_WORKER_PROVIDER", "ollama")  # Any registered provider (app/providers.py)
+# Renew a running job's lease this often; several renewals fit in one lease
+PLAN_JOB_HEARTBEAT_SECONDS = float(os.getenv("PLAN_JOB_HEARTBEAT_SECONDS", str(PLAN_JOB_LEASE_SECONDS / 3)))
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(processName)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger("plan_worker")
+
+
+# ============= Graph Setup ============= #
+
+def build_llm(provider: str):
+    """Chat model for the provider, configured from the same env vars as the servers."""
+    return build_chat_model_from_env(provider, temperature=0.7)
+
+
+def build_graph(provider: str):
+    """Compile the workflow with a sync checkpointer (workers call graph.invoke)."""
+    return create_graph(
+        build_llm(provider),
+        # Each process runs one job at a time, so one pooled connection is enough;
+        # main() already created the tables
+        get_checkpointer(min_size=1, max_size=1, setup=False),
+        verdict_store=get_verdict_store(),
+        structured_output=get_provider(provider).structured_output if STRUCTURED_OUTPUT else None,
+    )
+
+
+# ============= Job Execution ============= #
+
+def run_job(graph_app, request: dict) -> tuple[dict, dict]:
+    """
+    Execute one queued request.
+
+    Args:
+        graph_app: Compiled LangGraph workflow
+        request: WorkoutRequest as stored in plan_jobs.request
+
+    Returns:
+        (PlanResponse as a JSON-serializable dict, final graph state)
+    """
+    # Re-validate so the graph sees exactly what /plan would pass it
+    workout_request = WorkoutRequest(**request)
+    initial_state = initialize_state(
+        user_profile=workout_request.user_profile.model_dump(),
+        injury_history=[inj.model_dump() for inj in workout_request.injury_history],
+        thread_id=workout_request.thread_id,
+    )
+    config = {"configurable": {"thread_id": workout_request.thread_id}}
+    if not should_persist(workout_request.persist):
+        graph_app = ephemeral_graph(graph_app)
+
+    final_state = graph_app.invoke(initial_state, config=config)
+
+    response = PlanResponse(
+        workout_plan=WorkoutPlan(**final_state["workout_plan"]),
+        critique=Critique(**final_state["critique"]),
+        revision_count=final_state.get("revision_count", 0),
+        thread_id=workout_request.thread_id,
+        llm_calls=final_state.get("llm_calls", 0),
+        tokens_input=final_state.get("tokens_input", 0),
+        tokens_output=final_state.get("tokens_output", 0),
+    )
+    return response.model_dump(mode="json"), final_state
+
+
+def _record_metrics(provider: str, latency_ms: int, final_state: dict = None, error: str = None):
+    """Log a job execution to llm_metrics alongside the API's /plan rows."""
+    final_state = final_state or {}
+    revision_count = final_state.get("revision_count")
+    try:
+        with get_db_context() as db:
+            db.add(LLMMetrics(
+                endpoint="/plan/jobs",
+                latency_ms=latency_ms,
+                success=error is None,
+                error_message=error,
+                revision_count=revision_count,
+                safety_triggered=(revision_count or 0) > 1,
+                tokens_input=final_state.get("tokens_input") or None,
+                tokens_output=final_state.get("tokens_output") or None,
+                model_name=get_provider(provider).model,
+                llm_calls_saved=final_state.get("llm_calls_saved", 0),
+                llm_calls_wasted=final_state.get("llm_calls_wasted", 0),
+            ))
+    except Exception as e:
+        logger.warning(f"Failed to save LLM metrics to database: {e}")
+
+
+def _compact_checkpoints(graph_app, thread_id: str):
+    """Keep one checkpoint per revision of a finished job's thread."""
+    if not CHECKPOINT_COMPACT_ON_COMPLETE or graph_app.checkpointer is None:
+        return
+    try:
+        compact_thread(graph_app.checkpointer, thread_id)
+    except Exception as e:
+        logger.warning(f"Checkpoint compaction failed for thread {thread_id}: {e}")
+
+
+class LeaseHeartbeat:
+    """
+    Renews a claimed job's lease from a background thread while the graph
+    runs, so a long run is not reclaimed by another worker. Stops renewing
+    once the lease is lost.
+
+    Usage:
+        with LeaseHeartbeat(job_id, worker_id):
+            run_job(...)
+    """
+
+    def __init__(
+        self,
+        job_id: str,
+        worker_id: str,
+        interval_seconds: float = PLAN_JOB_HEARTBEAT_SECONDS,
+        lease_seconds: int = PLAN_JOB_LEASE_SECONDS,
+    ):
+        self.job_id = job_id
+        self.worker_id = worker_id
+        self.interval_seconds = interval_seconds
+        self.lease_seconds = lease_seconds
+        self.renewals = 0
+        self.lost = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"lease-{job_id}", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval_seconds):
+            try:
+                with get_db_context() as db:
+                    renewed = renew_lease(db, self.job_id, self.worker_id, self.lease_seconds)
+            except Exception as e:
+                # Retried next interval; the lease has slack for a few misses
+                logger.warning(f"Failed to renew lease of plan job {self.job_id}: {e}")
+                continue
+            if not renewed:
+                self.lost = True
+                logger.warning(f"Lost the lease of plan job {self.job_id}; another worker may rerun it")
+                return
+            self.renewals += 1
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        return False
+
+
+def process_next_job(graph_app, worker_id: str, provider: str) -> bool:
+    """
+    Claim and run one job.
+
+    Returns:
+        True if a job was processed, False if the queue was empty
+    """
+    db = SessionLocal()
+    try:
+        job = claim_job(db, worker_id)
+        if job is None:
+            return False
+        job_id, request = job.id, job.request
+    finally:
+        db.close()
+
+    logger.info(f"Claimed plan job {job_id} (thread_id={request.get('thread_id')})")
+    start_time = time.time()
+
+    try:
+        with trace_run(request_id=job_id, thread_id=request.get("thread_id"), endpoint="/plan/jobs") as trace:
+            try:
+                with LeaseHeartbeat(job_id, worker_id):
+                    result, final_state = run_job(graph_app, request)
+            finally:
+                logger.info(f"Plan job {job_id} node timings: {trace.summary()}")
+                if NODE_SPANS_ENABLED:
+                    save_spans(trace)
+    except Exception as e:
+        latency_ms = int((time.time() - start_time) * 1000)
+        logger.error(f"Plan job {job_id} failed after {latency_ms}ms: {e}", exc_info=True)
+        with get_db_context() as db:
+            if not fail_job(db, job_id, worker_id, f"Failed to generate plan: {e}"):
+                logger.warning(f"Plan job {job_id} was reclaimed by another worker; failure not recorded")
+        _record_metrics(provider, latency_ms, error=str(e))
+        return True
+
+    latency_ms = int((time.time() - start_time) * 1000)
+    with get_db_context() as db:
+        finished = complete_job(db, job_id, worker_id, result)
+    _record_metrics(provider, latency_ms, final_state)
+    if not finished:
+        # The job's new worker owns its thread now; leave its checkpoints alone
+        logger.warning(f"Plan job {job_id} was reclaimed by another worker; result discarded")
+        return True
+    if should_persist(request.get("persist")):
+        _compact_checkpoints(graph_app, result["thread_id"])
+    logger.info(f"Plan job {job_id} succeeded. Revisions: {result['revision_count']}, Latency: {latency_ms}ms")
+    return True
+
+
+# ============= Worker Processes ============= #
+
+def worker_main(worker_id: str, provider: str, stop_event, poll_seconds: float = PLAN_WORKER_POLL_SECONDS):
+    """Process entry point: build the graph once, then poll until stop_event is set."""
+    # The parent handles signals and sets stop_event; finish the current job first
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+
+    graph_app = build_graph(provider)
+    logger.info(f"Worker {worker_id} ready ({provider})")
+
+    while not stop_event.is_set():
+        try:
+            if not process_next_job(graph_app, worker_id, provider):
+                stop_event.wait(poll_seconds)
+        except Exception as e:
+            # Database hiccup while claiming/finishing; back off and retry
+            logger.error(f"Worker {worker_id} error: {e}")
+            stop_event.wait(poll_seconds)
+
+    if graph_app.checkpointer is not None:
+        graph_app.checkpointer.conn.close()
+    logger.info(f"Worker {worker_id} stopped")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run plan job worker processes.")
+    parser.add_argument("--workers", type=int, default=PLAN_WORKERS, help="Number of worker processes")
+    parser.add_argument("--provider", default=PLAN_WORKER_PROVIDER, choices=available_providers())
+    args = parser.parse_args()
+
+    # Once, before spawning; the advisory lock serializes it with API pods starting alongside
+    setup_schema()
+
+    ctx = multiprocessing.get_context("spawn")
+    stop_event = ctx.Event()
+
+    def _shutdown(signum, frame):
+        logger.info(f"Received signal {signum}; stopping after in-flight jobs")
+        stop_event.set()
+
+    signal.signal(signal.SIGTERM, _shutdown)
+    signal.signal(signal.SIGINT, _shutdown)
+
+    hostname = socket.gethostname()
+    processes = [
+        ctx.Process(
+            target=worker_main,
+            args=(f"{hostname}-{i}", args.provider, stop_event),
+            name=f"plan-worker-{i}",
+        )
+        for i in range(args.workers)
+    ]
+    for process in processes:
+        process.start()
+    logger.info(f"Started {len(processes)} plan worker(s) ({args.provider})")
+
+    for process in processes:
+        process.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""
+Benchmark: graph throughput and per-node orchestration overhead on a fake LLM.
+
+Drives create_graph with app.fake_llm.FakeTrainerChatModel at several
+concurrency levels and reports plans/sec, p50/p95/p99 request latency and,
+per node, the time spent outside the LLM call (prompt building, parsing,
+state merging, checkpointing). "graph" is what no span covers: LangGraph
+scheduling, routing and the untimed approve_plan node.
+
+Usage (from new/):
+    python -m benchmarks.bench_graph [--concurrency 1,8,32] [--requests 200]
+        [--latency-ms 50] [--jitter-ms 20] [--distribution lognormal]
+        [--verdicts UNSAFE,SAFE] [--malformed-rate 0.05]
+        [--mode async|sync] [--checkpointer none|memory]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from app.fake_llm import LATENCY_DISTRIBUTIONS, FakeTrainerChatModel
+from app.graph import create_graph, initialize_state
+from app.tracing import percentile, trace_run
+
+
+PROFILE = {
+    "goals": "Build strength and muscle",
+    "fitness_level": "intermediate",
+    "weight": 80.0,
+    "age": 32,
+    "equipment_available": ["Dumbbells", "Barbell", "Cable machine"],
+}
+
+INJURIES = [
+    {"injury_type": "Patellar tendinopathy", "injury_date": "2024-05-01", "severity": "moderate",
+     "notes": "Pain on deep knee flexion"},
+]
+
+
+def build_graph(llm, checkpointer: str = "none"):
+    """Graph under test; checkpointer "memory" adds an in-process saver."""
+    saver = None
+    if checkpointer == "memory":
+        from langgraph.checkpoint.memory import InMemorySaver
+        saver = InMemorySaver()
+    # Speculative candidates nest draft/critique spans, which would double-count overhead
+    return create_graph(llm, checkpointer=saver, speculative_drafts=1)
+
+
+def _invoke_config(thread_id: str) -> dict:
+    return {"configurable": {"thread_id": thread_id}}
+
+
+def _traced_sync(graph, injuries: list[dict]) -> tuple[float, list]:
+    thread_id = str(uuid.uuid4())
+    with trace_run(thread_id=thread_id, endpoint="bench") as trace:
+        start = time.perf_counter()
+        graph.invoke(initialize_state(PROFILE, injuries, thread_id), _invoke_config(thread_id))
+        elapsed = time.perf_counter() - start
+    return elapsed, trace.spans
+
+
+async def _traced_async(graph, injuries: list[dict]) -> tuple[float, list]:
+    thread_id = str(uuid.uuid4())
+    with trace_run(thread_id=thread_id, endpoint="bench") as trace:
+        start = time.perf_counter()
+        await graph.ainvoke(initialize_state(PROFILE, injuries, thread_id), _invoke_config(thread_id))
+        elapsed = time.perf_counter() - start
+    return elapsed, trace.spans
+
+
+async def _run_async(graph, injuries: list[dict], requests: int, concurrency: int) -> list:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            return await _traced_async(graph, injuries)
+
+    return await asyncio.gather(*(one() for _ in range(requests)))
+
+
+def run_benchmark(
+    graph,
+    requests: int,
+    concurrency: int,
+    mode: str = "async",
+    injuries: list[dict] = INJURIES,
+) -> dict:
+    """
+    Run `requests` plans through the graph, `concurrency` at a time.
+
+    Returns:
+        Throughput, request latency percentiles (ms) and per-node overhead
+    """
+    start = time.perf_counter()
+    if mode == "async":
+        results = asyncio.run(_run_async(graph, injuries, requests, concurrency))
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(lambda _: _traced_sync(graph, injuries), range(requests)))
+    elapsed = time.perf_counter() - start
+
+    latencies = [seconds * 1000 for seconds, _ in results]
+    by_node: dict[str, list] = {}
+    untraced = []
+    for seconds, spans in results:
+        for span in spans:
+            by_node.setdefault(span.node, []).append(span)
+        untraced.append(seconds * 1000 - sum(span.wall_ms for span in spans))
+
+    def _overhead(spans) -> dict:
+        values = [span.wall_ms - (span.llm_ms or 0.0) for span in spans]
+        return {
+            "count": len(values),
+            "llm_ms": round(sum(span.llm_ms or 0.0 for span in spans) / len(spans), 3),
+            "avg_ms": round(sum(values) / len(values), 3),
+            "p95_ms": round(percentile(values, 95), 3),
+        }
+
+    nodes = {node: _overhead(spans) for node, spans in sorted(by_node.items())}
+    nodes["graph"] = {
+        "count": len(untraced),
+        "llm_ms": 0.0,
+        "avg_ms": round(sum(untraced) / len(untraced), 3),
+        "p95_ms": round(percentile(untraced, 95), 3),
+    }
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "plans_per_sec": round(requests / elapsed, 2),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "nodes": nodes,
+    }
+
+
+def print_result(result: dict):
+    print(
+        f"concurrency {result['concurrency']:>3}: {result['plans_per_sec']:8.2f} plans/s | "
+        f"p50 {result['p50_ms']:8.2f} ms  p95 {result['p95_ms']:8.2f} ms  p99 {result['p99_ms']:8.2f} ms"
+    )
+    print(f"{'':>6}{'node':<22}{'count':>7}{'llm avg ms':>12}{'overhead avg ms':>17}{'p95 ms':>10}")
+    for node, stats in result["nodes"].items():
+        print(
+            f"{'':>6}{node:<22}{stats['count']:>7}{stats['llm_ms']:>12.3f}"
+            f"{stats['avg_ms']:>17.3f}{stats['p95_ms']:>10.3f}"
+        )
+    print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--concurrency", default="1,8,32", help="Comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=200, help="Plans per concurrency level")
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--jitter-ms", type=float, default=20.0)
+    parser.add_argument("--distribution", choices=LATENCY_DISTRIBUTIONS, default="lognormal")
+    parser.add_argument("--verdicts", default="UNSAFE,SAFE", help="Critique verdict sequence, cycled")
+    parser.add_argument("--malformed-rate", type=float, default=0.0)
+    parser.add_argument("--no-injuries", action="store_true", help="Exercise the zero-injury fast path")
+    parser.add_argument("--mode", choices=("async", "sync"), default="async")
+    parser.add_argument("--checkpointer", choices=("none", "memory"), default="none")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--verbose", action="store_true", help="Keep the graph's node logging")
+    args = parser.parse_args()
+
+    print(
+        f"Fake LLM: {args.distribution} {args.latency_ms:g}±{args.jitter_ms:g} ms, verdicts {args.verdicts}, "
+        f"malformed {args.malformed_rate:.0%} | mode {args.mode}, checkpointer {args.checkpointer}\n"
+    )
+    for concurrency in (int(c) for c in args.concurrency.split(",")):
+        llm = FakeTrainerChatModel(
+            verdicts=[v.strip().upper() for v in args.verdicts.split(",")],
+            latency_ms=args.latency_ms,
+            latency_jitter_ms=args.jitter_ms,
+            latency_distribution=args.distribution,
+            malformed_rate=args.malformed_rate,
+            seed=args.seed,
+        )
+        injuries = [] if args.no_injuries else INJURIES
+        # Node logging still runs (it is part of the overhead), it just is not shown
+        with open(os.devnull, "w") as devnull, \
+                (contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(devnull)):
+            graph = build_graph(llm, args.checkpointer)
+            result = run_benchmark(graph, args.requests, concurrency, args.mode, injuries)
+        print_result(result)
+        print(f"{'':>6}LLM calls: {llm.calls}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Benchmark: JSON extraction accuracy and parse cost over recorded LLM output.
+
+Compares the original fence-strip + json.loads parsing against
+app.json_extract on tests/fixtures/llm_responses.jsonl. A response counts
+as correct only if it parses to the expected content (critique status,
+number of exercises), so a parse that silently returns the wrong object
+is a failure too. Critiques with no JSON at all (markdown or YAML reviews)
+count as extraction failures here; the graph treats those as UNSAFE.
+
+Usage (from new/):
+    python -m benchmarks.bench_json_extract [--iterations 200]
+    python benchmarks/bench_json_extract.py [--iterations 200]
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:  # Run as a script rather than with -m
+    sys.path.insert(0, str(ROOT))
+
+from app.json_extract import parse_llm_json  # noqa: E402
+
+
+CORPUS = ROOT / "tests" / "fixtures" / "llm_responses.jsonl"
+
+
+def load_corpus(path: Path = CORPUS) -> list[dict]:
+    """Read the recorded raw responses."""
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def legacy_parse(content: str):
+    """Parsing as graph.py did before app.json_extract."""
+    content = content.strip()
+    if content.startswith("```"):
+        lines = content.split("\n")
+        json_lines = []
+        in_code_block = False
+        for line in lines:
+            if line.startswith("```"):
+                in_code_block = not in_code_block
+                continue
+            if in_code_block:
+                json_lines.append(line)
+        content = "\n".join(json_lines)
+    return json.loads(content)
+
+
+def robust_parse(content: str):
+    result = parse_llm_json(content)
+    if result.salvaged and isinstance(result.value, dict) and "exercises" in result.value:
+        # What the graph keeps of a truncated plan: its complete exercises
+        from app.graph import _salvaged_plan
+        return _salvaged_plan(result.value)
+    return result.value
+
+
+def correct(entry: dict, value) -> bool:
+    """Whether a parsed value has the content recorded for the entry."""
+    if not isinstance(value, dict):
+        return False
+    if entry["kind"] == "critique":
+        # Status normalized as graph._parse_critique_response does
+        return str(value.get("status", "")).strip().upper() == entry["status"]
+    exercises = value.get("exercises")
+    return isinstance(exercises, list) and len(exercises) == entry["exercises"]
+
+
+def measure(parser, corpus: list[dict], iterations: int) -> dict:
+    """Share of responses parsed to the expected content, and mean time per parse."""
+    failures = []
+    for entry in corpus:
+        try:
+            value = parser(entry["raw"])
+        except ValueError:
+            failures.append((entry["id"], "no JSON"))
+            continue
+        if not correct(entry, value):
+            failures.append((entry["id"], "wrong content"))
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for entry in corpus:
+            try:
+                parser(entry["raw"])
+            except ValueError:
+                pass
+    elapsed = time.perf_counter() - start
+
+    return {
+        "accuracy": round((len(corpus) - len(failures)) / len(corpus) * 100, 1),
+        "failures": failures,
+        "us_per_parse": round(elapsed / (iterations * len(corpus)) * 1e6, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    corpus = load_corpus()
+    print(f"Corpus: {len(corpus)} recorded responses ({CORPUS.name})\n")
+
+    for name, fn in (("legacy", legacy_parse), ("json_extract", robust_parse)):
+        result = measure(fn, corpus, args.iterations)
+        print(f"{name:>13}: {result['accuracy']:5.1f}% correct, {result['us_per_parse']:7.1f} us/parse")
+        for entry_id, reason in result["failures"]:
+            print(f"{'':>15}- {entry_id} ({reason})")
+
+
+if __name__ == "__main__":
+    main()
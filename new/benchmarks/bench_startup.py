@@ -0,0 +1,127 @@
+"""
+Benchmark: API import time and cold start per LLM provider.
+
+Each sample runs in a fresh interpreter and times the startup stages of
+app.factory.create_app:
+
+  import      import app.factory (FastAPI, LangGraph, routers, models)
+  create_app  build the app and its PlanService
+  provider    first model build, i.e. importing the provider's LangChain package
+  start       PlanService.start() without the database: model build and
+              graph compilation; the model warm-up runs in the background
+              and is not included (fake provider only)
+
+"eager" additionally imports every registered provider's package up front,
+which is what each process paid when both server modules carried their
+own provider imports; "lazy" is the factory's behaviour.
+
+Usage (from new/):
+    python -m benchmarks.bench_startup [--providers ollama,openai] [--repeat 5]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+
+SAMPLE = r"""
+import json, sys, time
+t0 = time.perf_counter()
+from app.factory import create_app
+from app.providers import available_providers, build_chat_model_from_env, get_provider
+t_import = time.perf_counter()
+
+provider, eager = sys.argv[1], sys.argv[2] == "eager"
+errors = {}
+if eager:
+    for name in available_providers():
+        try:
+            build_chat_model_from_env(name)
+        except Exception as e:
+            errors[name] = f"{type(e).__name__}: {e}"
+t_eager = time.perf_counter()
+
+app = create_app(provider)
+t_create = time.perf_counter()
+
+try:
+    build_chat_model_from_env(provider)
+except Exception as e:
+    errors[provider] = f"{type(e).__name__}: {e}"
+t_provider = time.perf_counter()
+
+start_ms = None
+if provider == "fake":
+    import asyncio
+    from app import service as service_module
+    service_module.setup_schema = lambda postgres_url=None: None
+    service = app.state.service
+    service.verdict_store = None
+    t = time.perf_counter()
+    asyncio.run(service.start())
+    start_ms = (time.perf_counter() - t) * 1000
+
+print(json.dumps({
+    "import": (t_import - t0) * 1000,
+    "eager_providers": (t_eager - t_import) * 1000,
+    "create_app": (t_create - t_eager) * 1000,
+    "provider": (t_provider - t_create) * 1000,
+    "start": start_ms,
+    "modules": len(sys.modules),
+    "errors": errors,
+}))
+"""
+
+STAGES = ("import", "eager_providers", "create_app", "provider", "start")
+
+
+def run_sample(provider: str, mode: str) -> dict:
+    env = {**os.environ, "OPENAI_API_KEY": os.environ.get("OPENAI_API_KEY", "sk-bench")}
+    env.pop("POSTGRES_URL", None)
+    result = subprocess.run(
+        [sys.executable, "-c", SAMPLE, provider, mode],
+        capture_output=True, text=True, env=env, check=True,
+    )
+    # Startup logging goes to stdout too; the measurement is the last line
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def summarize(samples: list[dict]) -> dict:
+    summary = {}
+    for stage in STAGES:
+        values = [s[stage] for s in samples if s[stage] is not None]
+        summary[stage] = statistics.median(values) if values else None
+    summary["total"] = sum(v for v in summary.values() if v is not None)
+    summary["modules"] = statistics.median(s["modules"] for s in samples)
+    summary["errors"] = samples[-1]["errors"]
+    return summary
+
+
+def print_result(provider: str, mode: str, summary: dict):
+    stages = "  ".join(
+        f"{stage} {summary[stage]:7.1f}" for stage in STAGES if summary[stage] is not None and summary[stage] >= 0.05
+    )
+    print(f"{provider:>7} {mode:>5} | total {summary['total']:7.1f} ms | {stages} | {summary['modules']:.0f} modules")
+    for name, error in summary["errors"].items():
+        print(f"{'':>15}! {name}: {error[:100]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--providers", default="fake,ollama,openai", help="Comma-separated providers to start")
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters per measurement (median reported)")
+    args = parser.parse_args()
+
+    print(f"Median of {args.repeat} fresh interpreters, stage times in ms\n")
+    for provider in args.providers.split(","):
+        for mode in ("eager", "lazy"):
+            samples = [run_sample(provider.strip(), mode) for _ in range(args.repeat)]
+            print_result(provider.strip(), mode, summarize(samples))
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -3,8 +3,9 @@ API Client for FastAPI Backend
 Handles all HTTP calls to the backend API.
 """
 
+import json
 import requests
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, Iterator, Tuple
 import streamlit as st
 
 class APIClient:
@@ -219,20 +220,63 @@ class APIClient:
     
     # ============= AI Coach (LangGraph) ============= #
     
-    def generate_plan(self, user_profile: Dict, injury_history: List[Dict], thread_id: str) -> Dict:
+    def generate_plan(self, user_profile: Dict, injury_history: List[Dict], thread_id: str, persist: bool = False) -> Dict:
         """Generate a workout plan using LangGraph."""
         response = requests.post(
             f"{self.base_url}/plan",
             json={
                 "user_profile": user_profile,
                 "injury_history": injury_history,
-                "thread_id": thread_id
+                "thread_id": thread_id,
+                # One-off plans are never resumed, so skip checkpoint writes
+                "persist": persist
             },
             headers=self._headers(),
             timeout=300  # 5 minute timeout for LLM
         )
         return self._handle_response(response)
     
+    def generate_plan_stream(
+        self,
+        user_profile: Dict,
+        injury_history: List[Dict],
+        thread_id: str,
+        tokens: bool = False,
+        persist: bool = False
+    ) -> Iterator[Tuple[str, Dict]]:
+        """
+        Generate a workout plan, yielding (event, data) as the graph progresses.
+        
+        Events: draft, critique, token (if tokens=True), then done or error.
+        """
+        response = requests.post(
+            f"{self.base_url}/plan/stream",
+            params={"tokens": str(tokens).lower()},
+            json={
+                "user_profile": user_profile,
+                "injury_history": injury_history,
+                "thread_id": thread_id,
+                "persist": persist
+            },
+            headers=self._headers(),
+            stream=True,
+            timeout=(10, 300)  # Connect fast; each event may take a full LLM call
+        )
+        
+        if response.status_code >= 400:
+            self._handle_response(response)
+        
+        event = "message"
+        with response:
+            for line in response.iter_lines(decode_unicode=True):
+                if not line:
+                    continue
+                if line.startswith("event:"):
+                    event = line[len("event:"):].strip()
+                elif line.startswith("data:"):
+                    yield event, json.loads(line[len("data:"):].strip())
+                    event = "message"
+    
     # ============= Metrics ============= #
     
     def get_llm_metrics_summary(self) -> Dict:
@@ -250,3 +294,16 @@ class APIClient:
         """Check API health."""
         response = requests.get(f"{self.base_url}/health", timeout=5)
         return self._handle_response(response)
+    
+    def get_plan_history(self, thread_id: str, limit: int = 20, before: Optional[str] = None) -> Dict:
+        """Get one page of a plan thread's states, newest first (follow next_cursor for older ones)."""
+        params = {"limit": limit}
+        if before:
+            params["before"] = before
+        response = requests.get(
+            f"{self.base_url}/history/{thread_id}",
+            params=params,
+            headers=self._headers(),
+            timeout=10
+        )
+        return self._handle_response(response)
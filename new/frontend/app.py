@@ -508,10 +508,34 @@ def show_ai_coach():
                 
                 thread_id = f"user_{st.session_state['user']['id']}_{int(time.time())}"
                 
-                progress.progress(50)
-                status.text("🩺 Physiotherapist reviewing for safety...")
+                # Stream real progress from the graph: show each draft as soon as
+                # the trainer finishes, before the physio review completes
+                draft_preview = st.empty()
+                result = None
                 
-                result = client.generate_plan(user_profile, injury_history, thread_id)
+                for event, data in client.generate_plan_stream(user_profile, injury_history, thread_id):
+                    if event == "draft":
+                        revision = data.get("revision", 1)
+                        draft = data.get("workout_plan") or {}
+                        progress.progress(min(40 + 15 * (revision - 1), 85))
+                        status.text(f"🩺 Physiotherapist reviewing draft #{revision} for safety...")
+                        with draft_preview.container():
+                            st.caption(f"Draft #{revision}: {draft.get('name', 'Untitled')} (pending safety review)")
+                            if draft.get("exercises"):
+                                st.dataframe(pd.DataFrame(draft["exercises"]), use_container_width=True, hide_index=True)
+                    elif event == "critique":
+                        revision = data.get("revision", 1)
+                        if (data.get("critique") or {}).get("status") == "UNSAFE":
+                            progress.progress(min(50 + 15 * (revision - 1), 90))
+                            status.text("🔄 Trainer agent revising flagged exercises...")
+                    elif event == "done":
+                        result = data
+                    elif event == "error":
+                        raise Exception(data.get("detail", "Plan generation failed"))
+                
+                draft_preview.empty()
+                if result is None:
+                    raise Exception("Plan stream ended without a result")
                 
                 elapsed = time.time() - start_time
                 progress.progress(100)
@@ -558,7 +582,9 @@ def show_ai_coach():
                             "revision_count": result.get('revision_count', 1),
                             "safety_status": critique["status"],
                             "goals": goals,
-                            "total_latency_ms": int(elapsed * 1000)
+                            "total_latency_ms": int(elapsed * 1000),
+                            "llm_calls": result.get("llm_calls"),
+                            "tokens_estimated": (result.get("tokens_input") or 0) + (result.get("tokens_output") or 0) or None
                         })
                         st.success("✅ Plan saved!")
                     except Exception as e:
@@ -0,0 +1,187 @@
+"""
+Tests for Ollama backend routing and passive health checking.
+Uses a fake clock and httpx mock transports. No LLM required.
+"""
+
+import asyncio
+import json
+
+import httpx
+import pytest
+from langchain_community.llms.ollama import Ollama
+
+from app import backends, providers
+from app.backends import BackendRouter, get_backend_router, parse_base_urls
+from app.providers import HTTPClientPool, pooled_ollama_class
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def router(clock):
+    return BackendRouter(["http://a", "http://b"], max_failures=2, eject_seconds=30, clock=clock)
+
+
+# ============= Router Tests ============= #
+
+
+class TestParseBaseUrls:
+    """Tests for OLLAMA_BASE_URL parsing."""
+
+    def test_single(self):
+        assert parse_base_urls("http://ollama:11434") == ["http://ollama:11434"]
+
+    def test_list_normalized(self):
+        assert parse_base_urls(" http://a:11434/, http://b:11434 ,,http://a:11434") == [
+            "http://a:11434", "http://b:11434"
+        ]
+
+    def test_empty(self):
+        with pytest.raises(ValueError):
+            parse_base_urls(" , ")
+
+
+class TestBackendRouter:
+    """Tests for least-outstanding routing and ejection."""
+
+    def test_least_outstanding(self, router):
+        first = router.acquire()
+        second = router.acquire()
+        assert {first.url, second.url} == {"http://a", "http://b"}
+
+        router.release(first, 10)
+        assert router.acquire() is first  # Only idle backend
+
+    def test_ejects_after_consecutive_failures(self, router):
+        a = router.backends[0]
+        for _ in range(2):
+            router.release(router.acquire(exclude=frozenset({"http://b"})), 5, failed=True, error="HTTP 500")
+
+        stats = router.stats()["backends"][0]
+        assert (stats["healthy"], stats["ejections"], stats["last_error"]) == (False, 1, "HTTP 500")
+        # All traffic goes to b while a is ejected
+        assert all(router.acquire().url == "http://b" for _ in range(3))
+        assert a.in_flight == 0
+
+    def test_success_resets_failures(self, router):
+        a = router.backends[0]
+        router.release(router.acquire(), 5, failed=True)
+        router.release(router.acquire(exclude=frozenset({"http://b"})), 5)
+        assert a.consecutive_failures == 0
+        assert a.ejections == 0
+
+    def test_readmitted_after_cooldown(self, router, clock):
+        a = router.backends[0]
+        for _ in range(2):
+            router.release(router.acquire(exclude=frozenset({"http://b"})), 5, failed=True)
+
+        clock.now += 31
+        assert router.stats()["healthy"] == 2
+        backend = router.acquire(exclude=frozenset({"http://b"}))
+        assert backend is a
+
+        # A failure right after re-admission ejects again immediately
+        router.release(backend, 5, failed=True)
+        assert a.ejections == 2
+
+    def test_fails_open_when_all_ejected(self, router, clock):
+        for backend in router.backends:
+            backend.ejected_until = clock.now + 10
+        router.backends[1].ejected_until = clock.now + 5
+        assert router.acquire().url == "http://b"
+
+    def test_latency_stats(self, router):
+        for ms in (10, 20, 30):
+            backend = router.acquire(exclude=frozenset({"http://b"}))
+            router.release(backend, ms)
+        stats = router.stats()["backends"][0]
+        assert (stats["requests"], stats["avg_latency_ms"], stats["p95_latency_ms"]) == (3, 20, 30)
+        assert stats["in_flight"] == 0
+
+    def test_router_shared_per_config(self, monkeypatch):
+        monkeypatch.setattr(backends, "_routers", {})
+        assert get_backend_router("http://x,http://y") is get_backend_router("http://x,http://y")
+
+
+# ============= Ollama Routing Tests ============= #
+
+
+def _generate_response():
+    line = {"response": "OK", "done": True}
+    return httpx.Response(200, content=json.dumps(line) + "\n")
+
+
+class TestOllamaRouting:
+    """LLM calls through the pooled Ollama model are routed per call."""
+
+    @pytest.fixture(autouse=True)
+    def _fresh_routers(self, monkeypatch):
+        monkeypatch.setattr(backends, "_routers", {})
+
+    def _llm(self, monkeypatch, handler, base_url="http://a,http://b"):
+        transport = httpx.MockTransport(handler)
+        monkeypatch.setattr(providers, "_http_pool", HTTPClientPool(transport=transport, async_transport=transport))
+        return pooled_ollama_class(Ollama)(base_url=base_url, model="mistral")
+
+    def test_calls_spread_across_backends(self, monkeypatch):
+        hosts = []
+
+        def handler(request):
+            hosts.append(request.url.host)
+            return _generate_response()
+
+        llm = self._llm(monkeypatch, handler)
+        for _ in range(4):
+            assert llm.invoke("hi") == "OK"
+        assert sorted(hosts) == ["a", "a", "b", "b"]
+
+    def test_connect_error_fails_over(self, monkeypatch):
+        def handler(request):
+            if request.url.host == "a":
+                raise httpx.ConnectError("refused", request=request)
+            return _generate_response()
+
+        llm = self._llm(monkeypatch, handler)
+        for _ in range(3):
+            assert llm.invoke("hi") == "OK"
+
+        stats = get_backend_router("http://a,http://b").stats()["backends"]
+        assert stats[0]["healthy"] is False
+        assert stats[0]["last_error"].startswith("ConnectError")
+        assert stats[1]["requests"] == 3
+
+    def test_server_error_counts_against_backend(self, monkeypatch):
+        def handler(request):
+            return httpx.Response(500, text="out of memory")
+
+        llm = self._llm(monkeypatch, handler, base_url="http://a")
+        with pytest.raises(ValueError, match="status code 500"):
+            llm.invoke("hi")
+        [stats] = get_backend_router("http://a").stats()["backends"]
+        assert (stats["failures"], stats["in_flight"]) == (1, 0)
+
+    def test_async_routed(self, monkeypatch):
+        hosts = []
+
+        def handler(request):
+            hosts.append(request.url.host)
+            return _generate_response()
+
+        llm = self._llm(monkeypatch, handler)
+
+        async def run():
+            return await asyncio.gather(*(llm.ainvoke("hi") for _ in range(2)))
+
+        assert asyncio.run(run()) == ["OK", "OK"]
+        assert sorted(hosts) == ["a", "b"]
@@ -0,0 +1,209 @@
+"""
+Tests for the content-addressed plan cache.
+Covers key normalization, the in-memory LRU/TTL backend and expiry of
+the database backend on in-memory SQLite. No LLM or PostgreSQL required.
+"""
+
+import asyncio
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app import cache as cache_module, database, migrations
+from app.cache import (
+    CacheBackend,
+    DatabaseCacheBackend,
+    InMemoryCacheBackend,
+    PlanCache,
+    get_plan_cache,
+    plan_cache_key,
+    run_purge_loop,
+)
+from app.models import Base, PlanCacheEntry
+
+
+# ============= Key Normalization Tests ============= #
+
+
+class TestPlanCacheKey:
+    """Tests for plan_cache_key canonicalization."""
+
+    def test_same_request_same_key(self, sample_user_profile, sample_injury_history):
+        a = plan_cache_key(sample_user_profile, sample_injury_history)
+        b = plan_cache_key(dict(sample_user_profile), list(sample_injury_history))
+        assert a == b
+
+    def test_cosmetic_differences_ignored(self, sample_user_profile, sample_injury_history):
+        noisy_profile = {
+            **sample_user_profile,
+            "goals": "  BUILD upper body   strength and muscle mass ",
+            "equipment_available": ["Bench", "barbell", "dumbbells", "bench"],
+        }
+        noisy_injuries = [{**sample_injury_history[0], "injury_type": "rotator CUFF strain"}]
+        assert plan_cache_key(noisy_profile, noisy_injuries) == plan_cache_key(
+            sample_user_profile, sample_injury_history
+        )
+
+    def test_injury_order_ignored(self, sample_user_profile, sample_injury_history):
+        knee = {"injury_type": "Knee tendonitis", "injury_date": "2024-01-01", "severity": "minor"}
+        a = plan_cache_key(sample_user_profile, sample_injury_history + [knee])
+        b = plan_cache_key(sample_user_profile, [knee] + sample_injury_history)
+        assert a == b
+
+    def test_severity_changes_key(self, sample_user_profile, sample_injury_history):
+        worse = [{**sample_injury_history[0], "severity": "severe"}]
+        assert plan_cache_key(sample_user_profile, worse) != plan_cache_key(
+            sample_user_profile, sample_injury_history
+        )
+
+    def test_namespace_changes_key(self, sample_user_profile):
+        assert plan_cache_key(sample_user_profile, [], namespace="ollama:mistral") != plan_cache_key(
+            sample_user_profile, [], namespace="openai:gpt-4o"
+        )
+
+
+# ============= Backend Tests ============= #
+
+
+class TestInMemoryCacheBackend:
+    """Tests for LRU eviction and TTL expiry."""
+
+    def test_lru_eviction(self):
+        backend = InMemoryCacheBackend(max_entries=2, ttl_seconds=60)
+        backend.set("a", {"v": 1})
+        backend.set("b", {"v": 2})
+        backend.get("a")  # a is now most recently used
+        backend.set("c", {"v": 3})
+
+        assert backend.get("b") is None
+        assert backend.get("a") == {"v": 1}
+        assert backend.get("c") == {"v": 3}
+        assert backend.evictions == 1
+
+    def test_ttl_expiry(self):
+        backend = InMemoryCacheBackend(max_entries=10, ttl_seconds=-1)
+        backend.set("a", {"v": 1})
+        assert backend.get("a") is None
+        assert backend.size() == 0
+
+    def test_purge_expired(self):
+        backend = InMemoryCacheBackend(max_entries=10, ttl_seconds=60)
+        backend.set("fresh", {"v": 1})
+        backend.ttl_seconds = -1
+        backend.set("stale", {"v": 2})
+
+        assert backend.purge_expired() == 1
+        assert backend.size() == 1
+        assert backend.get("fresh") == {"v": 1}
+
+    def test_interface_is_abstract(self):
+        with pytest.raises(TypeError):
+            CacheBackend()
+
+
+@pytest.fixture
+def sqlite_db(monkeypatch):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    monkeypatch.setattr(database, "engine", engine)
+    monkeypatch.setattr(database, "SessionLocal", sessionmaker(bind=engine))
+    return engine
+
+
+class TestDatabaseCacheBackend:
+    """Expired rows are ignored on read and deleted by purge_expired."""
+
+    def test_purge_expired(self, sqlite_db):
+        backend = DatabaseCacheBackend(ttl_seconds=60)
+        backend.set("fresh", {"v": 1})
+        with database.get_db_context() as db:
+            db.add(PlanCacheEntry(cache_key="stale", value={"v": 2}, expires_at=datetime.utcnow() - timedelta(seconds=1)))
+
+        assert backend.get("stale") is None
+        assert backend.purge_expired() == 1
+        assert backend.size() == 1
+        assert backend.get("fresh") == {"v": 1}
+
+    def test_purge_skipped_while_another_process_purges(self, sqlite_db, monkeypatch):
+        @contextmanager
+        def held_elsewhere(engine, lock_id):
+            assert lock_id == cache_module.PLAN_CACHE_PURGE_LOCK_ID
+            yield False
+
+        monkeypatch.setattr(migrations, "try_advisory_lock", held_elsewhere)
+        with database.get_db_context() as db:
+            db.add(PlanCacheEntry(cache_key="stale", value={}, expires_at=datetime.utcnow() - timedelta(seconds=1)))
+
+        assert DatabaseCacheBackend().purge_expired() == 0
+        assert DatabaseCacheBackend().size() == 1
+
+
+class TestPlanCache:
+    """Tests for hit/miss accounting."""
+
+    def test_counters(self):
+        cache = PlanCache(InMemoryCacheBackend(max_entries=10, ttl_seconds=60))
+        assert cache.get("k") is None
+        cache.set("k", {"v": 1})
+        assert cache.get("k") == {"v": 1}
+
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["stores"] == 1
+        assert stats["hit_rate"] == 50.0
+
+    def test_backend_errors_are_misses(self, caplog):
+        class BrokenBackend(InMemoryCacheBackend):
+            def get(self, key):
+                raise ConnectionError("down")
+
+            def set(self, key, value):
+                raise ConnectionError("down")
+
+        cache = PlanCache(BrokenBackend())
+        with caplog.at_level("WARNING", logger=cache_module.__name__):
+            assert cache.get("k") is None
+            cache.set("k", {"v": 1})
+        assert cache.stats()["errors"] == 2
+        assert cache.stats()["misses"] == 1
+        assert "Plan cache read failed: down" in caplog.text
+        assert "Plan cache write failed: down" in caplog.text
+
+    def test_purge_counted(self):
+        cache = PlanCache(InMemoryCacheBackend(max_entries=10, ttl_seconds=-1))
+        cache.set("k", {"v": 1})
+        assert cache.purge_expired() == 1
+        assert cache.stats()["purged"] == 1
+
+    def test_purge_errors_are_logged(self):
+        class BrokenBackend(InMemoryCacheBackend):
+            def purge_expired(self):
+                raise ConnectionError("down")
+
+        cache = PlanCache(BrokenBackend())
+        assert cache.purge_expired() == 0
+        assert cache.stats()["errors"] == 1
+
+    def test_purge_loop(self):
+        cache = PlanCache(InMemoryCacheBackend(max_entries=10, ttl_seconds=-1))
+        cache.set("k", {"v": 1})
+
+        async def run():
+            task = asyncio.create_task(run_purge_loop(cache, interval_seconds=0))
+            while not cache.purged:
+                await asyncio.sleep(0.01)
+            task.cancel()
+
+        asyncio.run(asyncio.wait_for(run(), timeout=5))
+        assert cache.backend.size() == 0
+
+    def test_factory(self):
+        assert get_plan_cache("none") is None
+        assert get_plan_cache("memory").name == "memory"
+        with pytest.raises(ValueError):
+            get_plan_cache("memcached")
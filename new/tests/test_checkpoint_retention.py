@@ -0,0 +1,266 @@
+"""
+Tests for checkpoint compaction, retention pruning and the admin endpoints.
+No database required: savers are given fake connections that record SQL.
+"""
+
+import asyncio
+import contextlib
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from app import auth as auth_config
+from app import checkpoint_retention as retention
+from app.routers.auth import require_admin
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self._rows = []
+
+    def execute(self, sql, params=None):
+        self.conn.executed.append((" ".join(sql.split()), params))
+        self._rows = self.conn.results.pop(0) if "SELECT" in sql.split()[0:1] and self.conn.results else []
+
+    def fetchall(self):
+        return self._rows
+
+    def fetchone(self):
+        return self._rows[0]
+
+
+class AsyncFakeCursor(FakeCursor):
+    async def execute(self, sql, params=None):
+        FakeCursor.execute(self, sql, params)
+
+    async def fetchall(self):
+        return self._rows
+
+    async def fetchone(self):
+        return self._rows[0]
+
+
+class FakeConnection:
+    """Records statements; SELECTs return the queued result sets in order."""
+
+    def __init__(self, results=None, cursor_class=FakeCursor):
+        self.executed = []
+        self.results = list(results or [])
+        self.transactions = 0
+        self.cursor_class = cursor_class
+
+    @contextlib.contextmanager
+    def transaction(self):
+        self.transactions += 1
+        yield
+
+    @contextlib.contextmanager
+    def cursor(self, **kwargs):
+        yield self.cursor_class(self)
+
+
+class AsyncFakeConnection(FakeConnection):
+    def __init__(self, results=None):
+        super().__init__(results, AsyncFakeCursor)
+
+    @contextlib.asynccontextmanager
+    async def transaction(self):
+        self.transactions += 1
+        yield
+
+    @contextlib.asynccontextmanager
+    async def cursor(self, **kwargs):
+        yield self.cursor_class(self)
+
+
+class FakeSaver:
+    def __init__(self, conn):
+        self.conn = conn
+
+
+# ============= Compaction Tests ============= #
+
+
+class TestCompaction:
+    """Tests for keeping one checkpoint per revision of a thread."""
+
+    ROWS = [
+        {"checkpoint_ns": "", "checkpoint_id": "1", "revision_count": None},
+        {"checkpoint_ns": "", "checkpoint_id": "2", "revision_count": 0},
+        {"checkpoint_ns": "", "checkpoint_id": "3", "revision_count": 1},
+        {"checkpoint_ns": "", "checkpoint_id": "4", "revision_count": 1},
+        {"checkpoint_ns": "", "checkpoint_id": "5", "revision_count": 2},
+        {"checkpoint_ns": "", "checkpoint_id": "6", "revision_count": 2},
+        {"checkpoint_ns": "sub", "checkpoint_id": "7", "revision_count": None},
+        {"checkpoint_ns": "sub", "checkpoint_id": "8", "revision_count": None},
+    ]
+
+    def test_keeps_newest_checkpoint_per_revision(self):
+        assert retention.checkpoints_to_keep(self.ROWS) == ["1", "2", "4", "6", "8"]
+
+    def test_sync_compaction_in_one_transaction(self):
+        conn = FakeConnection(results=[self.ROWS])
+        retention.compact_thread(FakeSaver(conn), "user_1_123")
+        assert conn.transactions == 1
+        assert [sql.split()[0] for sql, _ in conn.executed] == ["SELECT", "DELETE", "DELETE", "DELETE"]
+        assert [sql.split()[2] for sql, _ in conn.executed[1:]] == ["checkpoints", "checkpoint_writes", "checkpoint_blobs"]
+        assert conn.executed[1][1] == {"thread_id": "user_1_123", "keep": ["1", "2", "4", "6", "8"]}
+        assert all(params == {"thread_id": "user_1_123"} for _, params in conn.executed[2:])
+
+    def test_async_compaction(self):
+        conn = AsyncFakeConnection(results=[self.ROWS])
+        asyncio.run(retention.acompact_thread(FakeSaver(conn), "t1"))
+        assert conn.transactions == 1
+        assert len(conn.executed) == 4
+        assert conn.executed[1][1]["keep"] == ["1", "2", "4", "6", "8"]
+
+    def test_schedule_without_checkpointer_is_noop(self):
+        retention.schedule_compaction(None, "t1")
+        assert not retention._background_tasks
+
+    def test_schedule_runs_in_background(self):
+        conn = AsyncFakeConnection()
+
+        async def run():
+            retention.schedule_compaction(FakeSaver(conn), "t1")
+            assert len(retention._background_tasks) == 1
+            await asyncio.gather(*retention._background_tasks)
+
+        asyncio.run(run())
+        assert len(conn.executed) == 4
+        assert not retention._background_tasks
+
+    def test_schedule_failure_logged(self, caplog):
+        class BrokenConnection(AsyncFakeConnection):
+            @contextlib.asynccontextmanager
+            async def transaction(self):
+                raise ConnectionError("db down")
+                yield
+
+        async def run():
+            retention.schedule_compaction(FakeSaver(BrokenConnection()), "t1")
+            await asyncio.gather(*retention._background_tasks)
+
+        with caplog.at_level("WARNING", logger=retention.__name__):
+            asyncio.run(run())
+        assert "Checkpoint compaction failed for thread t1: db down" in caplog.text
+
+    def test_schedule_disabled(self, monkeypatch):
+        monkeypatch.setattr(retention, "CHECKPOINT_COMPACT_ON_COMPLETE", False)
+        conn = AsyncFakeConnection()
+
+        async def run():
+            retention.schedule_compaction(FakeSaver(conn), "t1")
+
+        asyncio.run(run())
+        assert conn.executed == []
+
+
+# ============= Retention Tests ============= #
+
+
+class TestPruning:
+    """Tests for batched deletion of expired threads."""
+
+    def test_deletes_in_batches_until_short_batch(self, monkeypatch):
+        monkeypatch.setattr(retention, "PRUNE_BATCH_PAUSE_SECONDS", 0)
+        conn = AsyncFakeConnection(results=[
+            [{"thread_id": "a"}, {"thread_id": "b"}],
+            [{"thread_id": "c"}],
+        ])
+        deleted = asyncio.run(retention.aprune_expired_threads(FakeSaver(conn), retention_days=30, batch_size=2))
+
+        assert deleted == 3
+        assert conn.transactions == 2
+        deletes = [params["thread_ids"] for sql, params in conn.executed if sql.startswith("DELETE")]
+        assert deletes == [["a", "b"]] * 3 + [["c"]] * 3
+
+    def test_nothing_expired(self):
+        conn = AsyncFakeConnection(results=[[]])
+        assert asyncio.run(retention.aprune_expired_threads(FakeSaver(conn), retention_days=30)) == 0
+        assert len(conn.executed) == 1
+
+    def test_zero_retention_keeps_everything(self):
+        conn = AsyncFakeConnection()
+        assert asyncio.run(retention.aprune_expired_threads(FakeSaver(conn), retention_days=0)) == 0
+        assert conn.executed == []
+
+    def _run_once(self, conn):
+        async def run():
+            with pytest.raises(asyncio.TimeoutError):
+                await asyncio.wait_for(retention.run_retention_loop(FakeSaver(conn), 3600, 30), 0.05)
+
+        asyncio.run(run())
+
+    def test_loop_prunes_under_advisory_lock(self, monkeypatch):
+        monkeypatch.setattr(retention, "_last_prune", {})
+        conn = AsyncFakeConnection(results=[[{"locked": True}], [{"thread_id": "a"}]])
+        self._run_once(conn)
+
+        statements = [sql for sql, _ in conn.executed]
+        assert statements[0] == "SELECT pg_try_advisory_lock(%s) AS locked"
+        assert statements[-1] == "SELECT pg_advisory_unlock(%s)"
+        assert sum(sql.startswith("DELETE") for sql in statements) == 3
+        assert retention._last_prune["threads_deleted"] == 1
+
+    def test_loop_skips_while_another_process_prunes(self, monkeypatch):
+        monkeypatch.setattr(retention, "_last_prune", {})
+        conn = AsyncFakeConnection(results=[[{"locked": False}]])
+        self._run_once(conn)
+
+        assert [sql for sql, _ in conn.executed] == ["SELECT pg_try_advisory_lock(%s) AS locked"]
+        assert retention._last_prune == {}
+
+    def test_no_loop_when_retention_disabled(self, monkeypatch):
+        monkeypatch.setattr(retention, "CHECKPOINT_RETENTION_DAYS", 0)
+        assert retention.start_retention_loop(FakeSaver(AsyncFakeConnection())) is None
+        assert retention.start_retention_loop(None) is None
+
+
+# ============= Reporting Tests ============= #
+
+
+class TestTableStats:
+    def test_reports_sizes_and_threads(self):
+        conn = AsyncFakeConnection(results=[
+            [
+                {"table_name": "checkpoint_blobs", "total_bytes": 4096, "table_bytes": 2048, "approx_rows": 10},
+                {"table_name": "checkpoints", "total_bytes": 8192, "table_bytes": 4096, "approx_rows": 5},
+            ],
+            [{"threads": 3}],
+        ])
+        stats = asyncio.run(retention.acheckpoint_table_stats(FakeSaver(conn)))
+
+        assert stats["total_bytes"] == 12288
+        assert stats["tables"]["checkpoints"]["approx_rows"] == 5
+        assert stats["threads"] == 3
+        assert "retention_days" in stats["retention"]
+
+
+class TestRequireAdmin:
+    """Tests for the X-Admin-Key dependency."""
+
+    @pytest.fixture
+    def client(self):
+        app = FastAPI()
+
+        @app.get("/admin/ping", dependencies=[Depends(require_admin)])
+        def ping():
+            return {"ok": True}
+
+        return TestClient(app)
+
+    def test_disabled_without_key(self, client, monkeypatch):
+        monkeypatch.setattr(auth_config, "ADMIN_API_KEY", "")
+        assert client.get("/admin/ping", headers={"X-Admin-Key": ""}).status_code == 403
+
+    def test_wrong_key(self, client, monkeypatch):
+        monkeypatch.setattr(auth_config, "ADMIN_API_KEY", "s3cret")
+        assert client.get("/admin/ping", headers={"X-Admin-Key": "nope"}).status_code == 403
+        assert client.get("/admin/ping").status_code == 403
+
+    def test_correct_key(self, client, monkeypatch):
+        monkeypatch.setattr(auth_config, "ADMIN_API_KEY", "s3cret")
+        assert client.get("/admin/ping", headers={"X-Admin-Key": "s3cret"}).json() == {"ok": True}
@@ -0,0 +1,189 @@
+"""
+Tests for the plan concurrency limiter and single-flight coalescing.
+No LLM or database required.
+"""
+
+import asyncio
+
+import pytest
+
+from app.concurrency import PlanLimiter, SingleFlight
+from app.schemas import PlanResponse, WorkoutRequest
+from app.service import PlanService
+
+
+class TestPlanLimiter:
+    """Tests for PlanLimiter slot accounting."""
+
+    def test_rejects_invalid_size(self):
+        with pytest.raises(ValueError):
+            PlanLimiter(max_concurrency=0)
+
+    def test_bounds_in_flight(self):
+        limiter = PlanLimiter(max_concurrency=2, queue_timeout=5)
+        peak = 0
+
+        async def work():
+            nonlocal peak
+            async with limiter.slot():
+                peak = max(peak, limiter.in_flight)
+                await asyncio.sleep(0.01)
+
+        async def main():
+            await asyncio.gather(*(work() for _ in range(6)))
+
+        asyncio.run(main())
+        assert peak == 2
+        assert limiter.stats()["completed"] == 6
+        assert limiter.stats()["in_flight"] == 0
+
+    def test_queue_timeout_rejects(self):
+        limiter = PlanLimiter(max_concurrency=1, queue_timeout=0.01)
+
+        async def main():
+            async with limiter.slot():
+                with pytest.raises(TimeoutError):
+                    async with limiter.slot():
+                        pass
+
+        asyncio.run(main())
+        assert limiter.rejected == 1
+        assert limiter.waiting == 0
+
+
+class TestSingleFlight:
+    """Tests for SingleFlight request coalescing."""
+
+    def test_concurrent_duplicates_share_one_execution(self):
+        flight = SingleFlight()
+        calls = 0
+
+        async def work():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return {"plan": calls}
+
+        async def main():
+            return await asyncio.gather(*(flight.run("same", work) for _ in range(5)))
+
+        results = asyncio.run(main())
+        assert calls == 1
+        assert all(r is results[0] for r in results)
+        assert flight.stats() == {"executions": 1, "coalesced": 4, "in_flight_keys": 0}
+
+    def test_distinct_keys_run_separately(self):
+        flight = SingleFlight()
+
+        async def work():
+            await asyncio.sleep(0.01)
+            return 1
+
+        async def main():
+            return await asyncio.gather(flight.run("a", work), flight.run("b", work))
+
+        asyncio.run(main())
+        assert flight.executions == 2
+        assert flight.coalesced == 0
+
+    def test_sequential_calls_not_coalesced(self):
+        flight = SingleFlight()
+
+        async def work():
+            return 1
+
+        async def main():
+            await flight.run("same", work)
+            await flight.run("same", work)
+
+        asyncio.run(main())
+        assert flight.executions == 2
+
+    def test_exception_shared_with_followers(self):
+        flight = SingleFlight()
+
+        async def work():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("llm down")
+
+        async def main():
+            return await asyncio.gather(
+                *(flight.run("same", work) for _ in range(3)), return_exceptions=True
+            )
+
+        results = asyncio.run(main())
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert flight.executions == 1
+
+    def test_follower_takes_over_when_leader_cancelled(self):
+        flight = SingleFlight()
+
+        async def work():
+            await asyncio.sleep(0.05)
+            return "done"
+
+        async def main():
+            leader = asyncio.create_task(flight.run("same", work))
+            await asyncio.sleep(0)
+            follower = asyncio.create_task(flight.run("same", work))
+            await asyncio.sleep(0)
+            leader.cancel()
+            return await follower
+
+        assert asyncio.run(main()) == "done"
+        assert flight.executions == 2
+        assert flight.coalesced == 0
+
+
+class TestPlanCoalescing:
+    """Which /plan requests PlanService.generate lets share one run."""
+
+    @pytest.fixture
+    def service(self, monkeypatch, sample_workout_plan, safe_critique):
+        service = PlanService("fake")
+        service.plan_cache = None
+        runs = []
+
+        async def run(request):
+            runs.append(request.thread_id)
+            await asyncio.sleep(0.05)
+            return PlanResponse(
+                thread_id=request.thread_id, workout_plan=sample_workout_plan,
+                critique=safe_critique, revision_count=0,
+            )
+
+        monkeypatch.setattr(service, "_limited_run", run)
+        service.runs = runs
+        return service
+
+    def _request(self, sample_user_profile, thread_id, persist):
+        return WorkoutRequest(user_profile=sample_user_profile, injury_history=[], thread_id=thread_id, persist=persist)
+
+    def _generate(self, service, requests):
+        async def main():
+            return await asyncio.gather(*(service.generate(r) for r in requests))
+
+        return asyncio.run(main())
+
+    def test_ephemeral_runs_coalesce(self, service, sample_user_profile):
+        responses = self._generate(service, [
+            self._request(sample_user_profile, "a", persist=False),
+            self._request(sample_user_profile, "b", persist=False),
+        ])
+        assert service.runs == ["a"]
+        assert [r.thread_id for r in responses] == ["a", "b"]
+
+    def test_persisted_runs_keep_their_own_threads(self, service, sample_user_profile):
+        self._generate(service, [
+            self._request(sample_user_profile, "a", persist=True),
+            self._request(sample_user_profile, "b", persist=True),
+            self._request(sample_user_profile, "c", persist=False),
+        ])
+        assert sorted(service.runs) == ["a", "b", "c"]
+
+    def test_persisted_retry_for_same_thread_coalesces(self, service, sample_user_profile):
+        self._generate(service, [
+            self._request(sample_user_profile, "a", persist=True),
+            self._request(sample_user_profile, "a", persist=True),
+        ])
+        assert service.runs == ["a"]
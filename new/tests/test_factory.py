@@ -0,0 +1,106 @@
+"""
+Tests for the provider registry and the create_app factory.
+Runs the full app with the scripted "fake" provider and an in-memory
+SQLite database. No LLM or PostgreSQL required.
+"""
+
+import subprocess
+import sys
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app import service as service_module
+from app.factory import create_app
+from app.models import Base
+from app.providers import ProviderSpec, available_providers, get_provider, register_provider
+from app.verdicts import InMemoryVerdictStore
+
+
+@pytest.fixture
+def client(monkeypatch, sample_user_profile):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    monkeypatch.setattr(service_module, "SessionLocal", sessionmaker(bind=engine))
+    monkeypatch.setattr(service_module, "setup_schema", lambda postgres_url=None: None)
+    monkeypatch.delenv("POSTGRES_URL", raising=False)
+
+    app = create_app("fake")
+    app.state.service.verdict_store = InMemoryVerdictStore()
+    with TestClient(app) as client:
+        yield client
+
+
+# ============= Registry Tests ============= #
+
+
+class TestProviderRegistry:
+    """Tests for provider lookup and registration."""
+
+    def test_builtin_providers(self):
+        assert {"ollama", "openai", "fake"} <= set(available_providers())
+        assert get_provider("openai").required_env == ("OPENAI_API_KEY",)
+
+    def test_unknown_provider(self):
+        with pytest.raises(ValueError, match="Unknown provider"):
+            create_app("anthropic")
+
+    def test_model_from_env(self, monkeypatch):
+        monkeypatch.setenv("OLLAMA_MODEL", "llama3")
+        assert get_provider("ollama").model == "llama3"
+
+    def test_register_custom_provider(self, monkeypatch):
+        from app import providers
+
+        monkeypatch.setattr(providers, "_PROVIDERS", dict(providers._PROVIDERS))
+        register_provider(ProviderSpec(
+            name="echo", label="Echo", model_env="ECHO_MODEL", default_model="echo-1",
+            build=lambda model, temperature, pool, **kwargs: ("echo", model),
+        ))
+        assert providers.build_chat_model_from_env("echo") == ("echo", "echo-1")
+
+    def test_provider_packages_imported_lazily(self):
+        # A fresh interpreter, since other tests build OpenAI models
+        code = (
+            "import sys; from app.factory import create_app; create_app('ollama'); "
+            "print('langchain_openai' in sys.modules)"
+        )
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+        assert result.stdout.strip().splitlines()[-1] == "False"
+
+
+# ============= App Tests ============= #
+
+
+class TestCreateApp:
+    """The factory app runs end to end on the fake provider."""
+
+    def test_health_reports_provider(self, client):
+        body = client.get("/health").json()
+        assert body["llm_provider"] == "Fake (fake-trainer)"
+        assert body["database"] == "disconnected"
+
+    def test_plan(self, client, sample_user_profile, sample_injury_history):
+        response = client.post("/plan", json={
+            "user_profile": sample_user_profile,
+            "injury_history": sample_injury_history,
+            "thread_id": "factory_1",
+        })
+        assert response.status_code == 200
+        assert response.json()["critique"]["status"] == "SAFE"
+
+    def test_apps_do_not_share_state(self):
+        first, second = create_app("fake"), create_app("fake")
+        assert first.state.service is not second.state.service
+
+    def test_no_backend_stats_without_base_url(self, client):
+        assert client.get("/metrics/llm/backends").json() is None
+
+    def test_missing_required_env_fails_startup(self, monkeypatch):
+        monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+        with pytest.raises(ValueError, match="OPENAI_API_KEY"):
+            with TestClient(create_app("openai")):
+                pass
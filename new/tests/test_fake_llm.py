@@ -0,0 +1,134 @@
+"""
+Tests for the scripted fake LLM and the graph benchmark harness.
+Verifies scripted verdicts, malformed output, latency sampling and that the
+fake drives the full draft → critique → revise loop.
+No LLM required.
+"""
+
+import asyncio
+import json
+import statistics
+
+import pytest
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from app.fake_llm import FakeTrainerChatModel, MALFORMED_OUTPUT
+from app.graph import create_graph, initialize_state
+from app.prompts import (
+    CRITIQUE_SYSTEM_PROMPT,
+    DRAFT_PLAN_SYSTEM_PROMPT,
+    get_critique_prompt,
+    get_draft_plan_prompt,
+)
+
+
+def _critique_messages(plan, injuries):
+    return [SystemMessage(content=CRITIQUE_SYSTEM_PROMPT), HumanMessage(content=get_critique_prompt(plan, injuries))]
+
+
+# ============= Fake Model Tests ============= #
+
+
+class TestFakeTrainerChatModel:
+    """Tests for FakeTrainerChatModel responses."""
+
+    def test_draft_returns_plan(self, sample_user_profile, sample_injury_history):
+        llm = FakeTrainerChatModel()
+        response = llm.invoke([
+            SystemMessage(content=DRAFT_PLAN_SYSTEM_PROMPT),
+            HumanMessage(content=get_draft_plan_prompt(sample_user_profile, sample_injury_history)),
+        ])
+        plan = json.loads(response.content)
+        assert plan["exercises"]
+        assert response.usage_metadata["input_tokens"] > 0
+        assert llm.calls == {"draft": 1}
+
+    def test_verdicts_cycle(self, sample_workout_plan, sample_injury_history):
+        llm = FakeTrainerChatModel(verdicts=["UNSAFE", "SAFE"])
+        messages = _critique_messages(sample_workout_plan, sample_injury_history)
+        statuses = [json.loads(llm.invoke(messages).content)["status"] for _ in range(4)]
+        assert statuses == ["UNSAFE", "SAFE", "UNSAFE", "SAFE"]
+
+    def test_unsafe_flags_first_reviewed_exercise(self, sample_workout_plan, sample_injury_history):
+        llm = FakeTrainerChatModel(verdicts=["UNSAFE"])
+        critique = json.loads(llm.invoke(_critique_messages(sample_workout_plan, sample_injury_history)).content)
+        assert critique["flagged_exercises"] == [sample_workout_plan["exercises"][0]["name"]]
+
+    def test_malformed_rate(self, sample_workout_plan, sample_injury_history):
+        llm = FakeTrainerChatModel(malformed_rate=1.0)
+        response = llm.invoke(_critique_messages(sample_workout_plan, sample_injury_history))
+        assert response.content == MALFORMED_OUTPUT
+        assert llm.calls == {"malformed": 1}
+
+    def test_same_seed_same_sequence(self, sample_workout_plan, sample_injury_history):
+        messages = _critique_messages(sample_workout_plan, sample_injury_history)
+
+        def contents(seed):
+            llm = FakeTrainerChatModel(malformed_rate=0.5, seed=seed)
+            return [llm.invoke(messages).content for _ in range(20)]
+
+        assert contents(3) == contents(3)
+        assert contents(3) != contents(4)
+
+    @pytest.mark.parametrize("distribution", ["uniform", "normal", "lognormal"])
+    def test_latency_distribution_mean(self, distribution):
+        llm = FakeTrainerChatModel(latency_ms=100, latency_jitter_ms=20, latency_distribution=distribution)
+        samples = [llm._sample_latency_ms() for _ in range(5000)]
+        assert statistics.mean(samples) == pytest.approx(100, rel=0.05)
+        assert min(samples) >= 0
+
+    def test_fixed_latency(self):
+        llm = FakeTrainerChatModel(latency_ms=30, latency_jitter_ms=10)
+        assert {llm._sample_latency_ms() for _ in range(10)} == {30}
+
+    def test_rejects_empty_verdicts(self):
+        with pytest.raises(ValueError):
+            FakeTrainerChatModel(verdicts=[])
+
+
+# ============= Graph Integration Tests ============= #
+
+
+class TestFakeLLMGraph:
+    """The fake model drives the real graph end to end."""
+
+    def test_unsafe_then_safe_runs_targeted_revision(self, sample_user_profile, sample_injury_history):
+        llm = FakeTrainerChatModel(verdicts=["UNSAFE", "SAFE"])
+        graph = create_graph(llm, targeted_revisions=True, speculative_drafts=1)
+        result = graph.invoke(initialize_state(sample_user_profile, sample_injury_history, "fake"))
+
+        assert result["critique"]["status"] == "SAFE"
+        assert result["revision_count"] == 2
+        assert result["workout_plan"]["exercises"][0]["name"].startswith("Modified ")
+        assert llm.calls == {"draft": 1, "critique": 2, "revision": 1}
+
+    def test_async_concurrent_runs(self, sample_user_profile, sample_injury_history):
+        llm = FakeTrainerChatModel(latency_ms=5)
+        graph = create_graph(llm, speculative_drafts=1)
+
+        async def run_all():
+            return await asyncio.gather(*(
+                graph.ainvoke(initialize_state(sample_user_profile, sample_injury_history, f"t{i}"))
+                for i in range(5)
+            ))
+
+        results = asyncio.run(run_all())
+        assert all(r["critique"]["status"] == "SAFE" for r in results)
+
+
+class TestGraphBenchmark:
+    """Smoke test for benchmarks/bench_graph.py."""
+
+    @pytest.mark.parametrize("mode", ["async", "sync"])
+    def test_reports_throughput_and_overhead(self, mode):
+        from benchmarks.bench_graph import build_graph, run_benchmark
+
+        graph = build_graph(FakeTrainerChatModel(), checkpointer="memory")
+        result = run_benchmark(graph, requests=6, concurrency=3, mode=mode)
+
+        assert result["plans_per_sec"] > 0
+        assert result["p50_ms"] <= result["p95_ms"] <= result["p99_ms"]
+        assert result["nodes"]["draft_plan"]["count"] == 6
+        assert result["nodes"]["critique_plan"]["count"] == 6
+        assert "checkpoint.put" in result["nodes"]
+        assert result["nodes"]["graph"]["count"] == 6
@@ -9,7 +9,7 @@ Skipped if langgraph is not fully installed (e.g. missing checkpoint extras).
 import pytest
 
 try:
-    from app.graph import initialize_state, route_after_critique
+    from app.graph import initialize_state, route_after_critique, route_after_draft
     HAS_LANGGRAPH = True
 except (ImportError, ModuleNotFoundError):
     HAS_LANGGRAPH = False
@@ -126,3 +126,571 @@ class TestRouteAfterCritique:
         }
         result = route_after_critique(state)
         assert result == "__end__"
+
+    def test_unrecognized_status_loops_back(self, sample_user_profile):
+        """Only an explicit SAFE approves the plan."""
+        state = {
+            "user_profile": sample_user_profile,
+            "injury_history": [],
+            "workout_plan": {"name": "Test Plan"},
+            "critique": {"status": None, "feedback": "Knee risk", "flagged_exercises": []},
+            "revision_count": 1,
+            "thread_id": "test",
+            "messages": [],
+        }
+        assert route_after_critique(state) == "draft_plan"
+
+
+class TestParseCritique:
+    """A malformed verdict must never be read as approval."""
+
+    def _parse(self, content):
+        from types import SimpleNamespace
+        from app.graph import _parse_critique_response
+        return _parse_critique_response(SimpleNamespace(content=content))
+
+    def test_unquoted_unsafe_status(self):
+        critique, clean = self._parse('{"status": UNSAFE, "feedback": "Knee risk", "flagged_exercises": ["Squat"]}')
+        assert critique["status"] == "UNSAFE"
+        assert critique["flagged_exercises"] == ["Squat"]
+        # Acted on, but a repaired response is never stored as a verdict
+        assert not clean
+
+    def test_clean_critique(self):
+        critique, clean = self._parse('```json\n{"status": "SAFE", "feedback": "Fine", "flagged_exercises": []}\n```')
+        assert critique["status"] == "SAFE"
+        assert clean
+
+    def test_status_normalized(self):
+        critique, parsed = self._parse('{"status": "safe ", "feedback": "Fine"}')
+        assert critique["status"] == "SAFE"
+        assert parsed
+
+    def test_unrecognized_status_is_unsafe(self):
+        for content in ('{"status": "MAYBE", "feedback": "Unsure"}', '{"feedback": "No status"}', '{"status": null}'):
+            critique, parsed = self._parse(content)
+            assert critique["status"] == "UNSAFE"
+            assert critique["feedback"]
+            # Not a real verdict, so it is never stored as one
+            assert not parsed
+
+    def test_echoed_example_before_answer_is_unsafe(self):
+        critique, clean = self._parse(
+            'Format: {"status":"SAFE","feedback":"...","flagged_exercises":[]}\n\n'
+            'My review:\n{"status":"UNSAFE","flagged_exercises":["Overhead Press"]}'
+        )
+        assert critique["status"] == "UNSAFE"
+        assert critique["flagged_exercises"] == ["Overhead Press"]
+        assert not clean
+
+    def test_agreeing_objects_are_not_clean(self):
+        critique, clean = self._parse('{"status": "SAFE"} Final answer: {"status": "SAFE", "feedback": "Fine"}')
+        assert critique["status"] == "SAFE"
+        assert not clean
+
+    def test_skipped_candidate_is_not_clean(self):
+        critique, clean = self._parse('Keep {elbows} tucked. {"status": "SAFE", "feedback": "Fine"}')
+        assert critique["status"] == "SAFE"
+        assert not clean
+
+    def test_ambiguous_critique_stores_no_verdicts(self, sample_injury_history):
+        from types import SimpleNamespace
+        from app.graph import _apply_critique_response
+        from app.verdicts import InMemoryVerdictStore, screen_exercises
+
+        store = InMemoryVerdictStore()
+        exercises = [{"name": "Overhead Press"}]
+        response = SimpleNamespace(
+            content='Format: {"status":"SAFE",...}\n\nMy review:\n'
+                    '{"status":"UNSAFE","flagged_exercises":["Overhead Press"]}',
+            response_metadata={},
+        )
+        state = _apply_critique_response(
+            {"injury_history": sample_injury_history}, response, {"exercises": exercises}, {}, store,
+        )
+        assert state["critique"]["status"] == "UNSAFE"
+        assert store.verdicts_recorded == 0
+        unknown, _ = screen_exercises(store, exercises, sample_injury_history)
+        assert unknown == exercises
+
+    def test_unreadable_critique_is_unsafe(self):
+        critique, parsed = self._parse("**Status:** UNSAFE\n\nOverhead Press loads the injured shoulder.")
+        assert critique["status"] == "UNSAFE"
+        assert not parsed
+
+
+class TestApplyDraft:
+    """Only a plan-shaped object is accepted as a draft."""
+
+    def _apply(self, content):
+        from types import SimpleNamespace
+        from app.graph import _apply_draft_response
+        return _apply_draft_response({"revision_count": 0}, SimpleNamespace(content=content, response_metadata={}))
+
+    def test_plan_accepted(self, sample_workout_plan):
+        import json
+        state = self._apply(json.dumps(sample_workout_plan))
+        assert state["workout_plan"]["name"] == sample_workout_plan["name"]
+
+    def test_object_without_exercises_is_a_failed_parse(self):
+        state = self._apply('{"name": "Squat", "sets": 3, "reps": "5"}')
+        assert state["workout_plan"]["name"] == "Error - Invalid Response"
+        assert state["workout_plan"]["exercises"] == []
+
+
+class TestRouteAfterDraft:
+    """Tests for the zero-injury fast path edge."""
+
+    def test_no_injuries_skips_critique(self, sample_user_profile):
+        state = initialize_state(sample_user_profile, [], "test")
+        assert route_after_draft(state) == "approve_plan"
+
+    def test_injuries_go_to_critique(self, sample_user_profile, sample_injury_history):
+        state = initialize_state(sample_user_profile, sample_injury_history, "test")
+        assert route_after_draft(state) == "critique_plan"
+
+
+# ============= Fast Path Tests ============= #
+
+
+class TestZeroInjuryFastPath:
+    """Injury-free requests end after one LLM call when the fast path is on."""
+
+    def _fake_llm(self, responses):
+        from langchain_core.language_models.fake_chat_models import FakeListChatModel
+        return FakeListChatModel(responses=responses)
+
+    def test_fast_path_synthesizes_safe_critique(
+        self, sample_user_profile, sample_workout_plan, unsafe_critique
+    ):
+        import json
+        from app.graph import create_graph
+
+        # An UNSAFE critique is scripted but must never be requested
+        llm = self._fake_llm([json.dumps(sample_workout_plan), json.dumps(unsafe_critique)])
+        graph = create_graph(llm, skip_critique_without_injuries=True)
+
+        final_state = graph.invoke(initialize_state(sample_user_profile, [], "fast_001"))
+
+        assert final_state["critique"]["status"] == "SAFE"
+        assert final_state["revision_count"] == 1
+        assert final_state["llm_calls_saved"] == 1
+
+    def test_fast_path_disabled_calls_critique(
+        self, sample_user_profile, sample_workout_plan, safe_critique
+    ):
+        import json
+        from app.graph import create_graph
+
+        llm = self._fake_llm([json.dumps(sample_workout_plan), json.dumps(safe_critique)])
+        graph = create_graph(llm, skip_critique_without_injuries=False)
+
+        final_state = graph.invoke(initialize_state(sample_user_profile, [], "fast_002"))
+
+        assert final_state["critique"] == safe_critique
+        assert final_state["llm_calls_saved"] == 0
+
+
+# ============= Targeted Revision Tests ============= #
+
+
+class TestTargetedRevision:
+    """UNSAFE critiques replace only the flagged exercises."""
+
+    def _run(self, responses, profile, injuries, targeted=True):
+        import json
+        from langchain_core.language_models.fake_chat_models import FakeListChatModel
+        from app.graph import create_graph
+
+        llm = FakeListChatModel(responses=[json.dumps(r) for r in responses])
+        graph = create_graph(llm, targeted_revisions=targeted)
+        return graph.invoke(initialize_state(profile, injuries, "revise"))
+
+    def _plan(self, sample_workout_plan):
+        plan = dict(sample_workout_plan)
+        plan["exercises"] = [
+            {"name": "Overhead Press", "sets": 3, "reps": "8"},
+        ] + sample_workout_plan["exercises"]
+        return plan
+
+    def test_keeps_unflagged_exercises(
+        self, sample_user_profile, sample_injury_history, sample_workout_plan,
+        unsafe_critique, safe_critique
+    ):
+        plan = self._plan(sample_workout_plan)
+        replacement = {"exercises": [{"name": "Landmine Press", "sets": 3, "reps": "10"}]}
+
+        final_state = self._run(
+            [plan, unsafe_critique, replacement, safe_critique],
+            sample_user_profile, sample_injury_history,
+        )
+
+        names = [ex["name"] for ex in final_state["workout_plan"]["exercises"]]
+        assert names == ["Landmine Press", "Bench Press", "Dumbbell Row"]
+        assert final_state["workout_plan"]["name"] == plan["name"]
+        assert final_state["pending_exercises"] == ["Landmine Press"]
+        assert final_state["revision_count"] == 2
+
+    def test_unparseable_revision_drops_flagged(
+        self, sample_user_profile, sample_injury_history, sample_workout_plan, unsafe_critique
+    ):
+        plan = self._plan(sample_workout_plan)
+
+        final_state = self._run(
+            [plan, unsafe_critique, "not json"],
+            sample_user_profile, sample_injury_history,
+        )
+
+        names = [ex["name"] for ex in final_state["workout_plan"]["exercises"]]
+        assert names == ["Bench Press", "Dumbbell Row"]
+        assert final_state["critique"]["status"] == "SAFE"
+        assert final_state["llm_calls_saved"] == 1
+
+    def test_disabled_redrafts_whole_plan(
+        self, sample_user_profile, sample_injury_history, sample_workout_plan,
+        unsafe_critique, safe_critique
+    ):
+        plan = self._plan(sample_workout_plan)
+
+        final_state = self._run(
+            [plan, unsafe_critique, sample_workout_plan, safe_critique],
+            sample_user_profile, sample_injury_history, targeted=False,
+        )
+
+        assert final_state["workout_plan"] == sample_workout_plan
+        assert final_state["pending_exercises"] is None
+
+
+# ============= Async Execution Tests ============= #
+
+
+class TestAsyncExecution:
+    """Graph runs end-to-end via ainvoke with a scripted chat model."""
+
+    def _fake_llm(self, responses):
+        from langchain_core.language_models.fake_chat_models import FakeListChatModel
+        return FakeListChatModel(responses=responses)
+
+    def test_ainvoke_safe_plan(
+        self, sample_user_profile, sample_injury_history, sample_workout_plan, safe_critique
+    ):
+        import asyncio
+        import json
+        from app.graph import create_graph
+
+        llm = self._fake_llm([json.dumps(sample_workout_plan), json.dumps(safe_critique)])
+        graph = create_graph(llm)
+        state = initialize_state(sample_user_profile, sample_injury_history, "async_001")
+
+        final_state = asyncio.run(graph.ainvoke(state))
+
+        assert final_state["workout_plan"]["name"] == sample_workout_plan["name"]
+        assert final_state["critique"]["status"] == "SAFE"
+        assert final_state["revision_count"] == 1
+
+    def test_ainvoke_revises_unsafe_plan(
+        self, sample_user_profile, sample_injury_history, sample_workout_plan,
+        safe_critique, unsafe_critique
+    ):
+        import asyncio
+        import json
+        from app.graph import create_graph
+
+        llm = self._fake_llm([
+            json.dumps(sample_workout_plan), json.dumps(unsafe_critique),
+            json.dumps(sample_workout_plan), json.dumps(safe_critique),
+        ])
+        graph = create_graph(llm)
+        state = initialize_state(sample_user_profile, sample_injury_history, "async_002")
+
+        final_state = asyncio.run(graph.ainvoke(state))
+
+        assert final_state["critique"]["status"] == "SAFE"
+        assert final_state["revision_count"] == 2
+
+
+# ============= Token Accounting Tests ============= #
+
+
+class TestTokenAccounting:
+    """Provider-reported usage is summed over every LLM call in a run."""
+
+    def _usage_llm(self, responses, usage):
+        from langchain_core.language_models.chat_models import BaseChatModel
+        from langchain_core.messages import AIMessage
+        from langchain_core.outputs import ChatGeneration, ChatResult
+
+        class UsageChatModel(BaseChatModel):
+            responses: list
+            i: int = 0
+
+            @property
+            def _llm_type(self):
+                return "usage-fake"
+
+            def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+                content = self.responses[self.i]
+                self.i += 1
+                message = AIMessage(content=content, usage_metadata=dict(usage))
+                return ChatResult(generations=[ChatGeneration(message=message)])
+
+        return UsageChatModel(responses=responses)
+
+    def test_sums_across_revisions(
+        self, sample_user_profile, sample_injury_history, sample_workout_plan,
+        unsafe_critique, safe_critique
+    ):
+        import json
+        from app.graph import create_graph
+
+        usage = {"input_tokens": 100, "output_tokens": 40, "total_tokens": 140}
+        llm = self._usage_llm(
+            [json.dumps(r) for r in (sample_workout_plan, unsafe_critique, sample_workout_plan, safe_critique)],
+            usage,
+        )
+        graph = create_graph(llm, targeted_revisions=False)
+        final_state = graph.invoke(initialize_state(sample_user_profile, sample_injury_history, "tokens"))
+
+        assert final_state["llm_calls"] == 4
+        assert final_state["tokens_input"] == 400
+        assert final_state["tokens_output"] == 160
+
+    def test_skipped_critique_not_counted(self, sample_user_profile, sample_workout_plan):
+        import json
+        from app.graph import create_graph
+
+        usage = {"input_tokens": 10, "output_tokens": 5, "total_tokens": 15}
+        llm = self._usage_llm([json.dumps(sample_workout_plan)], usage)
+        final_state = create_graph(llm).invoke(initialize_state(sample_user_profile, [], "tokens"))
+
+        assert final_state["llm_calls"] == 1
+        assert final_state["tokens_input"] == 10
+
+    def test_ollama_metadata_fallback(self):
+        from langchain_core.messages import AIMessage
+        from app.graph import _token_usage
+
+        message = AIMessage(content="{}", response_metadata={"prompt_eval_count": 812, "eval_count": 305})
+        assert _token_usage(message) == (812, 305)
+
+    def test_no_usage_reported(self):
+        from langchain_core.messages import AIMessage
+        from app.graph import _token_usage
+
+        assert _token_usage(AIMessage(content="{}")) == (0, 0)
+
+
+# ============= Speculative Drafting Tests ============= #
+
+
+class TestSpeculativeDrafting:
+    """Parallel draft+critique candidates; the first SAFE one wins."""
+
+    def _llm(self, sample_workout_plan, candidates, verdicts):
+        """
+        Chat model scripted per candidate.
+
+        candidates: temperature -> (plan name, draft delay seconds or an exception)
+        verdicts: plan name -> critique dict (a reviewed plan is recognized by its name)
+        """
+        import asyncio
+        import json
+        import time
+        from langchain_core.language_models.chat_models import BaseChatModel
+        from langchain_core.messages import AIMessage
+        from langchain_core.outputs import ChatGeneration, ChatResult
+
+        def respond(messages, temperature):
+            if "physiotherapist" in messages[0].content:
+                reviewed = messages[-1].content
+                name = next(name for name in verdicts if name in reviewed)
+                return 0, json.dumps(verdicts[name])
+            name, delay = candidates[temperature]
+            if isinstance(delay, Exception):
+                raise delay
+            return delay, json.dumps({**sample_workout_plan, "name": name})
+
+        class SpeculativeChatModel(BaseChatModel):
+            @property
+            def _llm_type(self):
+                return "speculative-fake"
+
+            def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+                delay, content = respond(messages, kwargs.get("temperature"))
+                time.sleep(delay)
+                return ChatResult(generations=[ChatGeneration(message=AIMessage(content=content))])
+
+            async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+                delay, content = respond(messages, kwargs.get("temperature"))
+                await asyncio.sleep(delay)
+                return ChatResult(generations=[ChatGeneration(message=AIMessage(content=content))])
+
+        return SpeculativeChatModel()
+
+    def test_first_safe_wins_and_rest_cancelled(
+        self, sample_user_profile, sample_injury_history, sample_workout_plan, safe_critique, unsafe_critique
+    ):
+        import asyncio
+        import time
+        from app.graph import create_graph
+
+        llm = self._llm(
+            sample_workout_plan,
+            {None: ("Slow Plan", 2.0), 1.0: ("Risky Plan", 0.0), 0.4: ("Quick Plan", 0.05)},
+            {"Slow Plan": safe_critique, "Risky Plan": unsafe_critique, "Quick Plan": safe_critique},
+        )
+        graph = create_graph(llm, speculative_drafts=3)
+        state = initialize_state(sample_user_profile, sample_injury_history, "spec_001")
+
+        start = time.perf_counter()
+        final_state = asyncio.run(graph.ainvoke(state))
+
+        assert time.perf_counter() - start < 1.5  # Slow candidate was not awaited
+        assert final_state["workout_plan"]["name"] == "Quick Plan"
+        assert final_state["critique"]["status"] == "SAFE"
+        assert final_state["revision_count"] == 1
+        # Slow: 1 cancelled draft call; Risky: draft + critique
+        assert final_state["llm_calls_wasted"] == 3
+        assert final_state["llm_calls"] == 5
+
+    def test_no_safe_candidate_continues_revision_loop(
+        self, sample_user_profile, sample_injury_history, sample_workout_plan, unsafe_critique
+    ):
+        import asyncio
+        from app.graph import create_graph
+
+        one_flag = {**unsafe_critique, "flagged_exercises": ["Bench Press"]}
+        llm = self._llm(
+            sample_workout_plan,
+            {None: ("Plan A", 0.0), 1.0: ("Plan B", 0.0)},
+            {"Plan A": unsafe_critique, "Plan B": one_flag},
+        )
+        graph = create_graph(llm, speculative_drafts=2, targeted_revisions=False)
+        state = initialize_state(sample_user_profile, sample_injury_history, "spec_002")
+
+        final_state = asyncio.run(graph.ainvoke(state))
+
+        # Both candidates were reviewed; the loser's two calls are wasted
+        assert final_state["llm_calls_wasted"] == 2
+        # Serial revisions followed (always UNSAFE here, so up to the cap)
+        assert final_state["revision_count"] == 3
+
+    def test_fallback_prefers_fewest_flags(self, unsafe_critique):
+        from app.graph import _pick_fallback
+
+        results = {
+            0: {"critique": unsafe_critique},
+            1: {"critique": {**unsafe_critique, "flagged_exercises": ["Bench Press"]}},
+        }
+        assert _pick_fallback(results, []) == 1
+
+    def test_failed_candidate_ignored(
+        self, sample_user_profile, sample_injury_history, sample_workout_plan, safe_critique
+    ):
+        import asyncio
+        from app.graph import create_graph
+
+        llm = self._llm(
+            sample_workout_plan,
+            {None: ("Broken", RuntimeError("backend down")), 1.0: ("Good Plan", 0.0)},
+            {"Good Plan": safe_critique},
+        )
+        graph = create_graph(llm, speculative_drafts=2)
+        final_state = asyncio.run(graph.ainvoke(initialize_state(sample_user_profile, sample_injury_history, "spec_003")))
+
+        assert final_state["workout_plan"]["name"] == "Good Plan"
+        assert final_state["llm_calls_wasted"] == 1
+
+    def test_all_candidates_failing_raises(self, sample_user_profile, sample_injury_history, sample_workout_plan):
+        import asyncio
+        from app.graph import create_graph
+
+        error = RuntimeError("backend down")
+        llm = self._llm(sample_workout_plan, {None: ("A", error), 1.0: ("B", error)}, {})
+        graph = create_graph(llm, speculative_drafts=2)
+        with pytest.raises(RuntimeError, match="backend down"):
+            asyncio.run(graph.ainvoke(initialize_state(sample_user_profile, sample_injury_history, "spec_004")))
+
+    def test_sync_invoke(
+        self, sample_user_profile, sample_injury_history, sample_workout_plan, safe_critique, unsafe_critique
+    ):
+        from app.graph import create_graph
+
+        llm = self._llm(
+            sample_workout_plan,
+            {None: ("Risky Plan", 0.0), 1.0: ("Safe Plan", 0.1)},
+            {"Risky Plan": unsafe_critique, "Safe Plan": safe_critique},
+        )
+        graph = create_graph(llm, speculative_drafts=2)
+        final_state = graph.invoke(initialize_state(sample_user_profile, sample_injury_history, "spec_005"))
+
+        assert final_state["workout_plan"]["name"] == "Safe Plan"
+        assert final_state["llm_calls_wasted"] == 2
+
+    def test_no_injuries_not_speculated(self, sample_user_profile, sample_workout_plan):
+        from app.graph import create_graph
+
+        llm = self._llm(sample_workout_plan, {None: ("Plan", 0.0)}, {})
+        graph = create_graph(llm, speculative_drafts=4)
+        final_state = graph.invoke(initialize_state(sample_user_profile, [], "spec_006"))
+
+        assert final_state["llm_calls"] == 1
+        assert final_state["llm_calls_wasted"] == 0
+
+
+# ============= Ephemeral Execution Tests ============= #
+
+
+class TestEphemeralExecution:
+    """persist=False runs skip the checkpointer entirely."""
+
+    def _graph(self):
+        from langgraph.checkpoint.memory import InMemorySaver
+        from app.fake_llm import FakeTrainerChatModel
+        from app.graph import create_graph
+
+        return create_graph(FakeTrainerChatModel(), InMemorySaver(), speculative_drafts=1)
+
+    def _run(self, graph, profile, injuries, thread_id):
+        from app.graph import initialize_state
+
+        return graph.invoke(
+            initialize_state(profile, injuries, thread_id),
+            {"configurable": {"thread_id": thread_id}},
+        )
+
+    def test_ephemeral_run_writes_no_checkpoints(self, sample_user_profile, sample_injury_history):
+        from app.graph import ephemeral_graph
+
+        graph = self._graph()
+        result = self._run(ephemeral_graph(graph), sample_user_profile, sample_injury_history, "eph")
+
+        assert result["critique"]["status"] == "SAFE"
+        assert list(graph.checkpointer.list({"configurable": {"thread_id": "eph"}})) == []
+
+    def test_original_graph_still_persists(self, sample_user_profile, sample_injury_history):
+        from app.graph import ephemeral_graph
+
+        graph = self._graph()
+        ephemeral_graph(graph)
+        self._run(graph, sample_user_profile, sample_injury_history, "kept")
+
+        assert graph.checkpointer is not None
+        assert list(graph.checkpointer.list({"configurable": {"thread_id": "kept"}}))
+
+    def test_graph_without_checkpointer_returned_as_is(self):
+        from langchain_core.language_models.fake_chat_models import FakeListChatModel
+        from app.graph import create_graph, ephemeral_graph
+
+        graph = create_graph(FakeListChatModel(responses=["{}"]))
+        assert ephemeral_graph(graph) is graph
+
+    def test_should_persist_defaults(self, monkeypatch):
+        from app import graph as graph_module
+
+        monkeypatch.setattr(graph_module, "PLAN_PERSIST_DEFAULT", True)
+        assert graph_module.should_persist(None) is True
+        assert graph_module.should_persist(False) is False
+        monkeypatch.setattr(graph_module, "PLAN_PERSIST_DEFAULT", False)
+        assert graph_module.should_persist(None) is False
+        assert graph_module.should_persist(True) is True
@@ -0,0 +1,233 @@
+"""
+Tests for the plan job queue and worker job execution.
+Uses an in-memory SQLite database (FOR UPDATE SKIP LOCKED is a no-op there)
+and a scripted chat model. No LLM or PostgreSQL required.
+"""
+
+import json
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import pytest
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app import worker
+from app.graph import create_graph
+from app.jobs import claim_job, complete_job, enqueue_job, fail_job, get_job, renew_lease
+from app.models import Base, PlanJob
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine, autoflush=False)
+
+
+@pytest.fixture
+def db(session_factory):
+    session = session_factory()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def job_request(sample_user_profile, sample_injury_history):
+    return {
+        "user_profile": sample_user_profile,
+        "injury_history": sample_injury_history,
+        "thread_id": "job_thread",
+    }
+
+
+# ============= Queue Tests ============= #
+
+
+class TestPlanJobQueue:
+    """Tests for enqueue/claim/finish transitions."""
+
+    def test_enqueue_creates_queued_job(self, db, job_request):
+        job = enqueue_job(db, job_request)
+        assert job.status == "queued"
+        assert get_job(db, job.id).request == job_request
+
+    def test_claim_oldest_first(self, db, job_request):
+        first = enqueue_job(db, job_request)
+        first.created_at = datetime.utcnow() - timedelta(minutes=1)
+        db.commit()
+        enqueue_job(db, job_request)
+
+        claimed = claim_job(db, "w1")
+        assert claimed.id == first.id
+        assert claimed.status == "running"
+        assert claimed.worker_id == "w1"
+        assert claimed.attempts == 1
+        assert claimed.lease_expires_at > datetime.utcnow()
+
+    def test_claimed_job_not_claimed_again(self, db, job_request):
+        enqueue_job(db, job_request)
+        assert claim_job(db, "w1") is not None
+        assert claim_job(db, "w2") is None
+
+    def test_expired_lease_reclaimed(self, db, job_request):
+        enqueue_job(db, job_request)
+        job = claim_job(db, "w1", lease_seconds=-1)
+
+        reclaimed = claim_job(db, "w2")
+        assert reclaimed.id == job.id
+        assert reclaimed.worker_id == "w2"
+        assert reclaimed.attempts == 2
+
+    def test_exhausted_attempts_fail(self, db, job_request):
+        job = enqueue_job(db, job_request)
+        claim_job(db, "w1", lease_seconds=-1, max_attempts=1)
+
+        assert claim_job(db, "w2", max_attempts=1) is None
+        db.refresh(job)
+        assert job.status == "failed"
+        assert "lease expired" in job.error
+
+    def test_complete_and_fail(self, db, job_request):
+        ok = enqueue_job(db, job_request)
+        bad = enqueue_job(db, job_request)
+        claim_job(db, "w1")
+        claim_job(db, "w2")
+
+        assert complete_job(db, ok.id, "w1", {"revision_count": 1})
+        assert fail_job(db, bad.id, "w2", "boom")
+
+        db.refresh(ok)
+        db.refresh(bad)
+        assert (ok.status, ok.result, ok.finished_at is not None) == ("succeeded", {"revision_count": 1}, True)
+        assert (bad.status, bad.error) == ("failed", "boom")
+
+    def test_stale_worker_cannot_finish_reclaimed_job(self, db, job_request):
+        job = enqueue_job(db, job_request)
+        claim_job(db, "w1", lease_seconds=-1)
+        claim_job(db, "w2")
+
+        assert complete_job(db, job.id, "w1", {"revision_count": 1}) is False
+        assert fail_job(db, job.id, "w1", "late") is False
+        db.refresh(job)
+        assert (job.status, job.worker_id, job.result) == ("running", "w2", None)
+
+    def test_finished_job_not_finished_again(self, db, job_request):
+        job = enqueue_job(db, job_request)
+        claim_job(db, "w1")
+        assert complete_job(db, job.id, "w1", {"revision_count": 1})
+        assert fail_job(db, job.id, "w1", "late") is False
+        db.refresh(job)
+        assert job.status == "succeeded"
+
+    def test_renew_lease(self, db, job_request):
+        job = enqueue_job(db, job_request)
+        claim_job(db, "w1", lease_seconds=-1)
+
+        assert renew_lease(db, job.id, "w1", lease_seconds=60)
+        db.refresh(job)
+        assert job.lease_expires_at > datetime.utcnow()
+        # A live lease is not reclaimed
+        assert claim_job(db, "w2") is None
+        assert renew_lease(db, job.id, "w2") is False
+
+
+# ============= Worker Tests ============= #
+
+
+class TestWorkerProcessing:
+    """Tests for process_next_job against the queue."""
+
+    @pytest.fixture(autouse=True)
+    def _use_test_db(self, monkeypatch, session_factory):
+        @contextmanager
+        def db_context():
+            session = session_factory()
+            try:
+                yield session
+                session.commit()
+            finally:
+                session.close()
+
+        monkeypatch.setattr(worker, "SessionLocal", session_factory)
+        monkeypatch.setattr(worker, "get_db_context", db_context)
+        self.saved_traces = []
+        monkeypatch.setattr(worker, "save_spans", self.saved_traces.append)
+
+    def _graph(self, responses):
+        return create_graph(FakeListChatModel(responses=[json.dumps(r) for r in responses]))
+
+    def test_empty_queue(self):
+        assert worker.process_next_job(self._graph([]), "w1", "ollama") is False
+
+    def test_runs_job_to_success(self, db, job_request, sample_workout_plan, safe_critique):
+        job = enqueue_job(db, job_request)
+
+        graph = self._graph([sample_workout_plan, safe_critique])
+        assert worker.process_next_job(graph, "w1", "ollama") is True
+
+        db.refresh(job)
+        assert job.status == "succeeded"
+        assert job.result["thread_id"] == "job_thread"
+        assert job.result["workout_plan"]["name"] == sample_workout_plan["name"]
+        assert job.result["critique"]["status"] == "SAFE"
+
+        # Node spans are keyed by the job id
+        [trace] = self.saved_traces
+        assert trace.request_id == job.id
+        assert trace.endpoint == "/plan/jobs"
+        assert {"draft_plan", "critique_plan"} <= {span.node for span in trace.spans}
+
+    def test_heartbeat_renews_lease(self, db, job_request):
+        job = enqueue_job(db, job_request)
+        claim_job(db, "w1", lease_seconds=-1)
+
+        with worker.LeaseHeartbeat(job.id, "w1", interval_seconds=0.01, lease_seconds=60) as heartbeat:
+            while not heartbeat.renewals:
+                time.sleep(0.01)
+
+        db.refresh(job)
+        assert job.lease_expires_at > datetime.utcnow()
+        assert not heartbeat.lost
+
+    def test_heartbeat_stops_when_lease_lost(self, db, job_request):
+        job = enqueue_job(db, job_request)
+        claim_job(db, "w1", lease_seconds=-1)
+        claim_job(db, "w2")
+
+        with worker.LeaseHeartbeat(job.id, "w1", interval_seconds=0.01) as heartbeat:
+            while not heartbeat.lost:
+                time.sleep(0.01)
+        assert heartbeat.renewals == 0
+
+    def test_reclaimed_job_result_discarded(self, db, job_request, monkeypatch):
+        job = enqueue_job(db, job_request)
+
+        def run_job(graph_app, request):
+            # The lease expires mid-run and another worker takes the job over
+            db.query(PlanJob).update({"lease_expires_at": datetime.utcnow() - timedelta(seconds=1)})
+            db.commit()
+            claim_job(db, "w2")
+            return {"thread_id": "job_thread", "revision_count": 1}, {}
+
+        monkeypatch.setattr(worker, "run_job", run_job)
+        assert worker.process_next_job(self._graph([]), "w1", "ollama") is True
+
+        db.refresh(job)
+        assert (job.status, job.worker_id, job.result) == ("running", "w2", None)
+
+    def test_graph_error_marks_failed(self, db, job_request):
+        job = enqueue_job(db, job_request)
+
+        # A plan without "frequency" fails PlanResponse validation
+        graph = self._graph([{"name": "No frequency", "exercises": []}, {"status": "SAFE", "feedback": "ok"}])
+        assert worker.process_next_job(graph, "w1", "ollama") is True
+
+        db.refresh(job)
+        assert job.status == "failed"
+        assert job.error.startswith("Failed to generate plan")
@@ -0,0 +1,231 @@
+"""
+Tests for the Ollama keep-alive scheduler.
+Uses a fake clock and scripted pings, plus an httpx mock transport for
+the Ollama stream. No LLM required.
+"""
+
+import asyncio
+import json
+from datetime import datetime
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from langchain_community.llms.ollama import Ollama
+
+from app import keepalive, providers
+from app.keepalive import KeepAliveScheduler, ModelActivity, in_hours, keepalive_models, parse_days, parse_hours
+from app.providers import HTTPClientPool, ping_ollama, pooled_ollama_class
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+# Monday 2026-10-12, 10:00 / Sunday 2026-10-18, 10:00
+MONDAY_10AM = datetime(2026, 10, 12, 10)
+SUNDAY_10AM = datetime(2026, 10, 18, 10)
+
+
+# ============= Schedule Tests ============= #
+
+
+class TestSchedule:
+    """Tests for parsing and matching business hours."""
+
+    def test_parse_hours(self):
+        assert parse_hours("8-20") == (8, 20)
+        assert parse_hours("") is None
+        with pytest.raises(ValueError):
+            parse_hours("8am-8pm")
+
+    def test_parse_days(self):
+        assert parse_days("mon-fri") == frozenset(range(5))
+        assert parse_days("sat,sun") == frozenset({5, 6})
+        assert parse_days("fri-mon") == frozenset({4, 5, 6, 0})
+        with pytest.raises(ValueError):
+            parse_days("weekdays")
+
+    def test_in_hours(self):
+        weekdays = parse_days("mon-fri")
+        assert in_hours(MONDAY_10AM, (8, 20), weekdays)
+        assert not in_hours(MONDAY_10AM.replace(hour=20), (8, 20), weekdays)
+        assert not in_hours(SUNDAY_10AM, (8, 20), weekdays)
+        assert not in_hours(MONDAY_10AM, None, weekdays)
+
+    def test_overnight_hours_belong_to_previous_day(self):
+        weekdays = parse_days("mon-fri")
+        # Saturday 02:00 is still Friday's night shift; Monday 02:00 is Sunday's
+        assert in_hours(datetime(2026, 10, 17, 2), (22, 6), weekdays)
+        assert not in_hours(datetime(2026, 10, 12, 2), (22, 6), weekdays)
+
+    def test_keepalive_models(self, monkeypatch):
+        monkeypatch.setattr(keepalive, "OLLAMA_KEEPALIVE_MODELS", "llama3, mistral")
+        assert keepalive_models("mistral") == ["mistral", "llama3"]
+
+
+# ============= Scheduler Tests ============= #
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def activity(clock):
+    return ModelActivity(cold_load_ms=1000, clock=clock)
+
+
+def _scheduler(activity, loads, **kwargs):
+    """Scheduler whose pings return the scripted load times (ms) in order."""
+    pinged = []
+    loads = iter(loads)
+
+    async def ping(backend_url, model):
+        pinged.append((backend_url, model))
+        load = next(loads)
+        if isinstance(load, Exception):
+            raise load
+        return load
+
+    options = {"interval_seconds": 600, "idle_seconds": 3600, "hours": (8, 20), "days": parse_days("mon-fri"),
+               "now": lambda: SUNDAY_10AM}
+    options.update(kwargs)
+    scheduler = KeepAliveScheduler(["http://gpu-a", "http://gpu-b"], ["mistral"], ping, activity=activity, **options)
+    return scheduler, pinged
+
+
+class TestKeepAliveScheduler:
+    """Pings idle models only while traffic is expected."""
+
+    def test_no_pings_when_no_traffic_expected(self, activity):
+        scheduler, pinged = _scheduler(activity, [])
+        assert asyncio.run(scheduler.tick()) == 0
+        assert pinged == []
+        assert scheduler.inactive_checks == 1
+
+    def test_pings_during_business_hours(self, activity):
+        scheduler, pinged = _scheduler(activity, [5, 5], now=lambda: MONDAY_10AM)
+        assert asyncio.run(scheduler.tick()) == 2
+        assert pinged == [("http://gpu-a", "mistral"), ("http://gpu-b", "mistral")]
+
+    def test_pings_after_recent_traffic_but_skips_warm_models(self, activity, clock):
+        activity.record_request("http://gpu-a", "mistral", load_ms=20)
+        clock.now += 60
+        scheduler, pinged = _scheduler(activity, [5])
+        asyncio.run(scheduler.tick())
+        # gpu-a served a request a minute ago; only gpu-b is idle
+        assert pinged == [("http://gpu-b", "mistral")]
+        assert scheduler.skipped_recent == 1
+
+    def test_stops_after_idle_window(self, activity, clock):
+        activity.record_request("http://gpu-a", "mistral", load_ms=20)
+        clock.now += 3601
+        scheduler, pinged = _scheduler(activity, [])
+        assert asyncio.run(scheduler.tick()) == 0
+
+    def test_ping_resets_idle_time(self, activity, clock):
+        scheduler, pinged = _scheduler(activity, [5, 5, 5, 5], now=lambda: MONDAY_10AM)
+        asyncio.run(scheduler.tick())
+        clock.now += 300
+        assert asyncio.run(scheduler.tick()) == 0
+        clock.now += 300
+        assert asyncio.run(scheduler.tick()) == 2
+
+    def test_counts_cold_loads_avoided(self, activity):
+        scheduler, _ = _scheduler(activity, [4200.0, 3.0], now=lambda: MONDAY_10AM)
+        asyncio.run(scheduler.tick())
+        stats = scheduler.stats()
+        assert stats["pings"] == 2
+        assert stats["cold_loads_avoided"] == 1
+        assert stats["activity"]["models"][0]["last_load_ms"] == 4200.0
+
+    def test_ping_failure_recorded(self, activity):
+        scheduler, _ = _scheduler(activity, [httpx.ConnectError("refused"), 3.0], now=lambda: MONDAY_10AM)
+        asyncio.run(scheduler.tick())
+        assert scheduler.ping_failures == 1
+        assert "refused" in scheduler.last_error
+
+    def test_user_cold_loads_counted(self, activity):
+        activity.record_request("http://gpu-a", "mistral", load_ms=3500)
+        activity.record_request("http://gpu-a", "mistral", load_ms=2)
+        stats = activity.stats()
+        assert stats["requests"] == 2
+        assert stats["cold_loads"] == 1
+
+
+# ============= Ollama Integration Tests ============= #
+
+
+@pytest.fixture
+def fresh_activity(monkeypatch):
+    activity = ModelActivity(cold_load_ms=1000)
+    monkeypatch.setattr(keepalive, "_activity", activity)
+    return activity
+
+
+def _pool(monkeypatch, handler):
+    transport = httpx.MockTransport(handler)
+    pool = HTTPClientPool(transport=transport, async_transport=transport)
+    monkeypatch.setattr(providers, "_http_pool", pool)
+    return pool
+
+
+class TestOllamaKeepAlive:
+    """Request load times come from the Ollama stream; pings are timed."""
+
+    def test_request_load_duration_recorded(self, monkeypatch, fresh_activity):
+        lines = [
+            {"response": "OK", "done": False},
+            {"response": "", "done": True, "load_duration": 2_500_000_000},
+        ]
+        _pool(monkeypatch, lambda r: httpx.Response(200, content="\n".join(json.dumps(l) for l in lines) + "\n"))
+        llm = pooled_ollama_class(Ollama)(base_url="http://ollama", model="mistral")
+        llm.invoke("Say OK")
+        asyncio.run(llm.ainvoke("Say OK"))
+
+        stats = fresh_activity.stats()
+        assert stats["requests"] == 2
+        assert stats["cold_loads"] == 2
+        assert stats["models"][0]["backend"] == "http://ollama"
+        assert stats["models"][0]["last_load_ms"] == 2500.0
+
+    # What Ollama returns for a load-only request: no timings at all
+    LOAD_RESPONSE = {"model": "mistral", "created_at": "2026-10-12T10:00:00Z", "response": "", "done": True,
+                     "done_reason": "load"}
+
+    def test_ping_times_the_load(self, monkeypatch):
+        seen = []
+        clock = FakeClock()
+        monkeypatch.setattr(providers, "time", SimpleNamespace(perf_counter=clock))
+
+        def handler(request):
+            seen.append(json.loads(request.content))
+            clock.now += 1.8  # Ollama loading the evicted model
+            return httpx.Response(200, json=self.LOAD_RESPONSE)
+
+        _pool(monkeypatch, handler)
+        assert asyncio.run(ping_ollama("http://ollama", "mistral")) == pytest.approx(1800.0)
+        assert seen == [{"model": "mistral", "keep_alive": providers.OLLAMA_KEEP_ALIVE}]
+
+    def test_warm_ping_is_not_a_cold_load(self, monkeypatch, fresh_activity):
+        _pool(monkeypatch, lambda r: httpx.Response(200, json=self.LOAD_RESPONSE))
+        scheduler = KeepAliveScheduler(["http://ollama"], ["mistral"], ping_ollama, hours=(0, 24),
+                                       days=parse_days("mon-sun"), activity=fresh_activity)
+        asyncio.run(scheduler.tick())
+        assert scheduler.pings == 1
+        assert scheduler.cold_loads_avoided == 0
+
+    def test_ping_failure_raises(self, monkeypatch):
+        _pool(monkeypatch, lambda r: httpx.Response(404, json={"error": "model 'missing' not found"}))
+        with pytest.raises(httpx.HTTPStatusError):
+            asyncio.run(ping_ollama("http://ollama", "missing"))
+
+    def test_requests_keep_model_loaded(self):
+        # Otherwise every request resets residency to the Ollama server default
+        assert providers.get_provider("ollama").env_options()["keep_alive"] == providers.OLLAMA_KEEP_ALIVE
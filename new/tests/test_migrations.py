@@ -0,0 +1,109 @@
+"""
+Tests for the one-time schema setup.
+Runs against in-memory SQLite (no advisory lock); the checkpoint setup is
+replaced by a recorder. No PostgreSQL required.
+"""
+
+import pytest
+from sqlalchemy import create_engine, inspect
+from sqlalchemy.pool import StaticPool
+
+from app import database, migrations
+from app.migrations import SCHEMA_SETUP_DONE_ENV, advisory_lock, setup_schema, try_advisory_lock
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    monkeypatch.setattr(database, "engine", engine)
+    monkeypatch.delenv(SCHEMA_SETUP_DONE_ENV, raising=False)
+    return engine
+
+
+@pytest.fixture
+def checkpoint_setups(monkeypatch):
+    calls = []
+    monkeypatch.setattr(migrations, "setup_checkpoint_tables", lambda url: calls.append(url) or True)
+    return calls
+
+
+class TestSetupSchema:
+    """Tests for creating the tables once per deployment."""
+
+    def test_creates_app_tables(self, engine, checkpoint_setups, monkeypatch):
+        monkeypatch.delenv("POSTGRES_URL", raising=False)
+        assert setup_schema() is True
+        assert {"llm_metrics", "node_spans"} <= set(inspect(engine).get_table_names())
+        assert checkpoint_setups == []
+
+    def test_sets_up_checkpoint_tables(self, engine, checkpoint_setups):
+        setup_schema("postgresql://db/trainer")
+        assert checkpoint_setups == ["postgresql://db/trainer"]
+
+    def test_skipped_in_prefork_workers(self, engine, checkpoint_setups, monkeypatch):
+        monkeypatch.setenv(SCHEMA_SETUP_DONE_ENV, "1")
+        assert setup_schema("postgresql://db/trainer") is False
+        assert inspect(engine).get_table_names() == []
+        assert checkpoint_setups == []
+
+    def test_lock_is_noop_without_postgres(self, engine):
+        with advisory_lock(engine):
+            pass
+
+
+class TestAdvisoryLock:
+    """The lock wraps setup in pg_advisory_lock / pg_advisory_unlock."""
+
+    def _engine(self, executed, acquired=True):
+        class Result:
+            def scalar(self):
+                return acquired
+
+        class Conn:
+            def execute(self, statement, params):
+                executed.append((str(statement), params))
+                return Result()
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                return False
+
+        class Engine:
+            class dialect:
+                name = "postgresql"
+
+            def connect(self):
+                return Conn()
+
+        return Engine()
+
+    def test_lock_and_unlock(self):
+        executed = []
+        with pytest.raises(RuntimeError):
+            with advisory_lock(self._engine(executed), 42):
+                executed.append(("setup", None))
+                raise RuntimeError("migration failed")
+
+        assert executed == [
+            ("SELECT pg_advisory_lock(:id)", {"id": 42}),
+            ("setup", None),
+            ("SELECT pg_advisory_unlock(:id)", {"id": 42}),
+        ]
+
+    def test_try_lock_and_unlock(self):
+        executed = []
+        with try_advisory_lock(self._engine(executed), 42) as locked:
+            assert locked is True
+        assert executed == [
+            ("SELECT pg_try_advisory_lock(:id)", {"id": 42}),
+            ("SELECT pg_advisory_unlock(:id)", {"id": 42}),
+        ]
+
+    def test_try_lock_held_elsewhere(self):
+        executed = []
+        with try_advisory_lock(self._engine(executed, acquired=False), 42) as locked:
+            assert locked is False
+        # Never unlock a lock this session does not hold
+        assert executed == [("SELECT pg_try_advisory_lock(:id)", {"id": 42})]
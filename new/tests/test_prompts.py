@@ -11,6 +11,11 @@ from app.prompts import (
     CRITIQUE_SYSTEM_PROMPT,
     get_draft_plan_prompt,
     get_critique_prompt,
+    get_revision_prompt,
+    compile_draft_prompt,
+    compile_critique_prompt,
+    estimate_tokens,
+    _injury_section,
 )
 
 
@@ -91,6 +96,38 @@ class TestDraftPlanPrompt:
         assert "REVISION REQUIRED" not in prompt
 
 
+# ============= Revision Prompt Tests ============= #
+
+
+class TestRevisionPrompt:
+    """Tests for get_revision_prompt (targeted revisions)."""
+
+    def _prompt(self, profile, injuries, critique):
+        kept = [{"name": "Bench Press", "sets": 4, "reps": "8-10"}]
+        flagged = [{"name": "Overhead Press", "sets": 3, "reps": "8"}]
+        return get_revision_prompt(profile, injuries, kept, flagged, critique)
+
+    def test_lists_flagged_and_kept(self, sample_user_profile, sample_injury_history, unsafe_critique):
+        prompt = self._prompt(sample_user_profile, sample_injury_history, unsafe_critique)
+        assert "Overhead Press - 3 sets x 8 reps" in prompt
+        assert "Bench Press" in prompt
+
+    def test_includes_feedback_and_injuries(self, sample_user_profile, sample_injury_history, unsafe_critique):
+        prompt = self._prompt(sample_user_profile, sample_injury_history, unsafe_critique)
+        assert unsafe_critique["feedback"] in prompt
+        assert "Rotator cuff strain" in prompt
+
+    def test_asks_only_for_exercises(self, sample_user_profile, sample_injury_history, unsafe_critique):
+        prompt = self._prompt(sample_user_profile, sample_injury_history, unsafe_critique)
+        assert '"exercises"' in prompt
+        assert '"warm_up"' not in prompt
+
+    def test_smaller_than_full_redraft(self, sample_user_profile, sample_injury_history, unsafe_critique):
+        prompt = self._prompt(sample_user_profile, sample_injury_history, unsafe_critique)
+        full = get_draft_plan_prompt(sample_user_profile, sample_injury_history, unsafe_critique)
+        assert len(prompt) < len(full)
+
+
 # ============= Critique Prompt Tests ============= #
 
 
@@ -125,3 +162,84 @@ class TestCritiquePrompt:
     def test_mentions_decision_criteria(self, sample_workout_plan):
         prompt = get_critique_prompt(sample_workout_plan, [])
         assert "Decision Criteria" in prompt
+
+
+# ============= Prompt Budget Tests ============= #
+
+
+LONG_NOTE = (
+    "Physio says to avoid loaded knee flexion past ninety degrees. "
+    + "Follow-up scans showed gradual improvement in the patellar tendon over several months. " * 6
+)
+
+
+@pytest.fixture
+def long_injury_history():
+    """One active injury with a long note plus several recovered injuries."""
+    return [
+        {"injury_type": "Patellar tendinopathy", "injury_date": "2024-05-01", "severity": "moderate",
+         "notes": LONG_NOTE},
+    ] + [
+        {"injury_type": f"Old ankle sprain {i}", "injury_date": "2019-01-01", "severity": "minor",
+         "notes": "Fully healed, no restrictions", "is_active": False}
+        for i in range(6)
+    ]
+
+
+class TestPromptBudget:
+    """Tests for compiled prompts: token accounting, memoization and budget enforcement."""
+
+    def test_system_prompt_is_constant(self, sample_user_profile, sample_injury_history, unsafe_critique):
+        first = compile_draft_prompt(sample_user_profile, [])
+        revision = compile_draft_prompt(sample_user_profile, sample_injury_history, unsafe_critique)
+        assert first.system is DRAFT_PLAN_SYSTEM_PROMPT
+        assert revision.system is DRAFT_PLAN_SYSTEM_PROMPT
+
+    def test_reports_tokens_per_section(self, sample_user_profile, sample_injury_history):
+        prompt = compile_draft_prompt(sample_user_profile, sample_injury_history)
+        assert set(prompt.section_tokens) == {"system", "profile", "injuries", "instructions"}
+        assert prompt.tokens == sum(prompt.section_tokens.values())
+        assert prompt.tokens == estimate_tokens(prompt.system) + sum(
+            estimate_tokens(text) for text in prompt.sections.values()
+        )
+        assert f"~{prompt.tokens}/" in prompt.report()
+
+    def test_injury_section_is_memoized(self, sample_workout_plan, sample_injury_history):
+        compile_critique_prompt(sample_workout_plan, sample_injury_history)
+        hits = _injury_section.cache_info().hits
+        compile_critique_prompt(sample_workout_plan, sample_injury_history)
+        assert _injury_section.cache_info().hits > hits
+
+    def test_under_budget_keeps_everything(self, sample_user_profile, long_injury_history):
+        prompt = compile_draft_prompt(sample_user_profile, long_injury_history, budget=10_000)
+        assert prompt.dropped_injuries == 0
+        assert prompt.truncated_notes == 0
+        assert "Old ankle sprain 5" in prompt.user
+        assert LONG_NOTE in prompt.user
+
+    def test_drops_inactive_injuries_first(self, sample_user_profile, long_injury_history):
+        full = compile_draft_prompt(sample_user_profile, long_injury_history, budget=10_000)
+        budget = full.tokens - 20
+        prompt = compile_draft_prompt(sample_user_profile, long_injury_history, budget=budget)
+        assert prompt.dropped_injuries == 6
+        assert prompt.truncated_notes == 0
+        assert "Old ankle sprain" not in prompt.user
+        assert "(6 recovered injuries omitted)" in prompt.user
+        assert LONG_NOTE in prompt.user
+        assert prompt.tokens <= budget
+
+    def test_then_summarizes_long_notes(self, sample_user_profile, long_injury_history):
+        active_only = compile_draft_prompt(sample_user_profile, long_injury_history[:1], budget=10_000)
+        budget = active_only.tokens - 20
+        prompt = compile_draft_prompt(sample_user_profile, long_injury_history, budget=budget)
+        assert prompt.truncated_notes == 1
+        assert "Patellar tendinopathy" in prompt.user
+        assert "avoid loaded knee flexion past ninety degrees" in prompt.user
+        assert "Follow-up scans" not in prompt.user
+        assert not prompt.over_budget
+
+    def test_never_drops_active_injuries(self, sample_user_profile, long_injury_history):
+        prompt = compile_draft_prompt(sample_user_profile, long_injury_history, budget=50)
+        assert prompt.over_budget
+        assert "Patellar tendinopathy" in prompt.user
+        assert "Notes:" not in prompt.user
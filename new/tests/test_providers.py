@@ -0,0 +1,170 @@
+"""
+Tests for the pooled provider HTTP client.
+Uses httpx mock transports and a local HTTP server. No LLM required.
+"""
+
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+from langchain_community.llms.ollama import Ollama, OllamaEndpointNotFoundError
+
+from app import providers
+from app.providers import HTTPClientPool, build_chat_model, pooled_ollama_class
+
+
+def _ollama_handler(seen):
+    """Mock Ollama /api/generate streaming two chunks."""
+    def handler(request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content) if request.content else {}
+        seen.append(body)
+        if body.get("model") == "missing":
+            return httpx.Response(404, text="model not found")
+        lines = [
+            {"response": "Hello ", "done": False},
+            {"response": "world", "done": True, "prompt_eval_count": 3, "eval_count": 2},
+        ]
+        return httpx.Response(200, content="\n".join(json.dumps(l) for l in lines) + "\n")
+    return handler
+
+
+@pytest.fixture
+def seen():
+    return []
+
+
+@pytest.fixture
+def pool(monkeypatch, seen):
+    transport = httpx.MockTransport(_ollama_handler(seen))
+    pool = HTTPClientPool(transport=transport, async_transport=transport)
+    monkeypatch.setattr(providers, "_http_pool", pool)
+    yield pool
+    pool.close()
+
+
+# ============= Pool Accounting Tests ============= #
+
+
+class TestHTTPClientPool:
+    """Tests for request counters and configuration."""
+
+    def test_counts_requests(self, pool):
+        pool.client.get("http://ollama/api/tags")
+        pool.client.get("http://ollama/api/tags")
+        stats = pool.stats()
+        assert stats["requests"] == 2
+        assert stats["in_flight"] == 0
+        assert stats["peak_in_flight"] == 1
+
+    def test_streamed_response_in_flight_until_closed(self):
+        def handler(request):
+            return httpx.Response(200, content=iter([b"chunk-1\n", b"chunk-2\n"]))
+
+        pool = HTTPClientPool(transport=httpx.MockTransport(handler))
+        with pool.client.stream("POST", "http://ollama/api/generate", json={"model": "m"}) as response:
+            assert pool.stats()["in_flight"] == 1
+            assert list(response.iter_lines()) == ["chunk-1", "chunk-2"]
+        assert pool.stats()["in_flight"] == 0
+
+    def test_timeout_counted(self):
+        def handler(request):
+            raise httpx.ReadTimeout("slow", request=request)
+
+        pool = HTTPClientPool(transport=httpx.MockTransport(handler))
+        with pytest.raises(httpx.ReadTimeout):
+            pool.client.get("http://ollama/")
+        stats = pool.stats()
+        assert (stats["timeouts"], stats["errors"], stats["in_flight"]) == (1, 0, 0)
+
+    def test_async_client_counts(self, pool):
+        async def run():
+            await pool.async_client.get("http://ollama/api/tags")
+            await pool.aclose()
+
+        asyncio.run(run())
+        assert pool.stats()["requests"] == 1
+
+    def test_configured_timeouts_and_limits(self):
+        pool = HTTPClientPool(connect_timeout=2, read_timeout=30, max_connections=4, max_keepalive=2)
+        stats = pool.stats()
+        assert (stats["connect_timeout_s"], stats["read_timeout_s"]) == (2, 30)
+        assert (stats["max_connections"], stats["max_keepalive_connections"]) == (4, 2)
+        assert pool.client.timeout.read == 30
+
+    def test_http2_falls_back_without_h2(self, monkeypatch):
+        monkeypatch.setattr(providers, "_http2_available", lambda: False)
+        assert HTTPClientPool(http2=True).http2 is False
+
+    def test_keepalive_connection_reused(self):
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                self.send_response(200)
+                self.send_header("Content-Length", "2")
+                self.end_headers()
+                self.wfile.write(b"ok")
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        pool = HTTPClientPool()
+        try:
+            url = f"http://127.0.0.1:{server.server_port}/"
+            for _ in range(3):
+                assert pool.client.get(url).text == "ok"
+            assert pool.stats()["connections"]["sync"] == {"open": 1, "idle": 1, "active": 0}
+        finally:
+            pool.close()
+            server.shutdown()
+            server.server_close()
+
+
+# ============= Ollama Model Tests ============= #
+
+
+class TestPooledOllama:
+    """The Ollama HTTP calls go through the shared pool."""
+
+    def test_invoke_uses_pool(self, pool, seen):
+        llm = pooled_ollama_class(Ollama)(base_url="http://ollama", model="mistral", temperature=0.1)
+        assert llm.invoke("Say OK") == "Hello world"
+        assert seen[0]["prompt"] == "Say OK"
+        assert seen[0]["options"]["temperature"] == 0.1
+        assert pool.stats()["requests"] == 1
+
+    def test_ainvoke_uses_pool(self, pool, seen):
+        llm = pooled_ollama_class(Ollama)(base_url="http://ollama", model="mistral")
+        assert asyncio.run(llm.ainvoke("Say OK")) == "Hello world"
+        assert pool.stats()["requests"] == 1
+
+    def test_missing_model_raises(self, pool):
+        llm = pooled_ollama_class(Ollama)(base_url="http://ollama", model="missing")
+        with pytest.raises(OllamaEndpointNotFoundError):
+            llm.invoke("Say OK")
+        assert pool.stats()["in_flight"] == 0
+
+    def test_class_cached(self):
+        assert pooled_ollama_class(Ollama) is pooled_ollama_class(Ollama)
+
+
+# ============= Factory Tests ============= #
+
+
+class TestBuildChatModel:
+    """Tests for build_chat_model."""
+
+    def test_openai_shares_pool_clients(self, pool):
+        llm = build_chat_model("openai", "gpt-4o", api_key="sk-test")
+        assert llm.http_client is pool.client
+        assert llm.http_async_client is pool.async_client
+
+    def test_unknown_provider(self):
+        with pytest.raises(ValueError, match="Unknown provider"):
+            build_chat_model("anthropic", "model")
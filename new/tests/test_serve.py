@@ -0,0 +1,71 @@
+"""
+Tests for the production entry point's worker sizing.
+cgroup files are written to a temp directory. No server is started.
+"""
+
+import pytest
+
+from app import serve
+from app.serve import cgroup_cpu_limit, default_workers
+
+
+@pytest.fixture
+def cgroup(tmp_path, monkeypatch):
+    """Point the cgroup paths at temp files; returns a writer for them."""
+    paths = {
+        "v2": tmp_path / "cpu.max",
+        "quota": tmp_path / "cpu.cfs_quota_us",
+        "period": tmp_path / "cpu.cfs_period_us",
+    }
+    monkeypatch.setattr(serve, "CGROUP_V2_CPU_MAX", str(paths["v2"]))
+    monkeypatch.setattr(serve, "CGROUP_V1_CPU_QUOTA", str(paths["quota"]))
+    monkeypatch.setattr(serve, "CGROUP_V1_CPU_PERIOD", str(paths["period"]))
+
+    def write(**files):
+        for name, content in files.items():
+            paths[name].write_text(content + "\n")
+
+    return write
+
+
+class TestCgroupCpuLimit:
+    """Tests for reading the container CPU limit."""
+
+    def test_cgroup_v2_limit(self, cgroup):
+        cgroup(v2="200000 100000")
+        assert cgroup_cpu_limit() == 2.0
+
+    def test_cgroup_v2_unlimited(self, cgroup):
+        cgroup(v2="max 100000")
+        assert cgroup_cpu_limit() is None
+
+    def test_cgroup_v1_limit(self, cgroup):
+        cgroup(quota="150000", period="100000")
+        assert cgroup_cpu_limit() == 1.5
+
+    def test_cgroup_v1_unlimited(self, cgroup):
+        cgroup(quota="-1", period="100000")
+        assert cgroup_cpu_limit() is None
+
+    def test_no_cgroup(self, cgroup):
+        assert cgroup_cpu_limit() is None
+
+
+class TestDefaultWorkers:
+    """One worker per usable core."""
+
+    def test_follows_cpu_limit(self):
+        assert default_workers(cpu_limit=4.0, cpus=16) == 4
+
+    def test_partial_core_rounded_down(self):
+        assert default_workers(cpu_limit=2.5, cpus=16) == 2
+
+    def test_at_least_one_worker(self):
+        assert default_workers(cpu_limit=0.5, cpus=16) == 1
+
+    def test_capped_by_visible_cpus_and_maximum(self):
+        assert default_workers(cpu_limit=8.0, cpus=2) == 2
+        assert default_workers(cpu_limit=32.0, cpus=64, max_workers=8) == 8
+
+    def test_unlimited_uses_visible_cpus(self, cgroup):
+        assert default_workers(cpus=3) == 3
@@ -0,0 +1,103 @@
+"""
+Tests for SSE plan streaming helpers.
+Uses a scripted chat model; no LLM or database required.
+"""
+
+import asyncio
+import json
+
+import pytest
+
+try:
+    from app.graph import create_graph, initialize_state
+    from app.streaming import format_sse, stream_graph_events
+    HAS_LANGGRAPH = True
+except (ImportError, ModuleNotFoundError):
+    HAS_LANGGRAPH = False
+
+pytestmark = pytest.mark.skipif(
+    not HAS_LANGGRAPH,
+    reason="langgraph not fully installed (missing checkpoint dependencies)"
+)
+
+
+def _collect(graph, state, tokens=False):
+    async def run():
+        return [item async for item in stream_graph_events(graph, state, {}, tokens=tokens)]
+    return asyncio.run(run())
+
+
+def _graph(responses):
+    from langchain_core.language_models.fake_chat_models import FakeListChatModel
+    return create_graph(FakeListChatModel(responses=[json.dumps(r) for r in responses]))
+
+
+class TestFormatSse:
+    """Tests for SSE frame encoding."""
+
+    def test_frame_layout(self):
+        frame = format_sse("draft", {"revision": 1})
+        assert frame == 'event: draft\ndata: {"revision": 1}\n\n'
+
+    def test_non_json_values_stringified(self):
+        from datetime import date
+        frame = format_sse("done", {"when": date(2024, 3, 15)})
+        assert '"2024-03-15"' in frame
+
+
+class TestStreamGraphEvents:
+    """Tests for node-level event streaming."""
+
+    def test_safe_run_event_order(
+        self, sample_user_profile, sample_injury_history, sample_workout_plan, safe_critique
+    ):
+        graph = _graph([sample_workout_plan, safe_critique])
+        state = initialize_state(sample_user_profile, sample_injury_history, "stream_001")
+
+        events = _collect(graph, state)
+
+        assert [e for e, _ in events] == ["draft", "critique", "result"]
+        assert events[0][1]["workout_plan"]["name"] == sample_workout_plan["name"]
+        assert events[1][1]["critique"]["status"] == "SAFE"
+        assert events[2][1]["revision_count"] == 1
+
+    def test_revision_emits_second_draft(
+        self, sample_user_profile, sample_injury_history, sample_workout_plan,
+        safe_critique, unsafe_critique
+    ):
+        graph = _graph([sample_workout_plan, unsafe_critique, sample_workout_plan, safe_critique])
+        state = initialize_state(sample_user_profile, sample_injury_history, "stream_002")
+
+        events = _collect(graph, state)
+
+        assert [e for e, _ in events] == ["draft", "critique", "draft", "critique", "result"]
+        assert events[2][1]["revision"] == 2
+
+    def test_speculative_draft_emits_draft_and_critique(
+        self, sample_user_profile, sample_injury_history, sample_workout_plan, safe_critique
+    ):
+        from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+        # Candidates run concurrently, so every call gets the same response,
+        # which parses both as a plan and as a SAFE critique
+        response = json.dumps({**sample_workout_plan, **safe_critique})
+        graph = create_graph(FakeListChatModel(responses=[response]), speculative_drafts=2)
+        state = initialize_state(sample_user_profile, sample_injury_history, "stream_spec")
+
+        events = _collect(graph, state)
+
+        assert [e for e, _ in events] == ["draft", "critique", "result"]
+        assert events[1][1]["critique"]["status"] == "SAFE"
+        assert events[2][1]["llm_calls_wasted"] >= 1
+
+    def test_tokens_only_from_trainer(
+        self, sample_user_profile, sample_workout_plan, safe_critique
+    ):
+        graph = _graph([sample_workout_plan, safe_critique])
+        state = initialize_state(sample_user_profile, [], "stream_003")
+
+        events = _collect(graph, state, tokens=True)
+        token_text = "".join(p["content"] for e, p in events if e == "token")
+
+        assert json.loads(token_text) == sample_workout_plan
+        assert all(p["node"] == "draft_plan" for e, p in events if e == "token")
@@ -0,0 +1,128 @@
+"""
+Tests for schema-constrained LLM output.
+Covers schema conversion, provider binding and the graph wiring.
+No LLM or database required.
+"""
+
+import json
+
+import pytest
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+from app.graph import create_graph, initialize_state
+from app.structured_output import (
+    CRITIQUE_SCHEMA,
+    PLAN_SCHEMA,
+    REVISION_SCHEMA,
+    bind_schema,
+    structured_llms,
+)
+
+
+class RecordingChatModel(FakeListChatModel):
+    """Scripted chat model that records the kwargs bound to each call."""
+    calls: list = []
+
+    def _call(self, messages, stop=None, run_manager=None, **kwargs):
+        self.calls.append(kwargs)
+        return super()._call(messages, stop=stop, run_manager=run_manager, **kwargs)
+
+
+def _objects(schema):
+    """Yield every object schema in a (ref-free) JSON schema."""
+    if isinstance(schema, dict):
+        if schema.get("type") == "object":
+            yield schema
+        for value in schema.values():
+            yield from _objects(value)
+    elif isinstance(schema, list):
+        for value in schema:
+            yield from _objects(value)
+
+
+# ============= Schema Conversion Tests ============= #
+
+
+class TestResponseSchemas:
+    """Schemas must satisfy OpenAI strict mode (and therefore Ollama)."""
+
+    @pytest.mark.parametrize("schema", [PLAN_SCHEMA, CRITIQUE_SCHEMA, REVISION_SCHEMA])
+    def test_objects_closed_and_fully_required(self, schema):
+        for obj in _objects(schema):
+            assert obj["additionalProperties"] is False
+            assert obj["required"] == list(obj["properties"])
+
+    @pytest.mark.parametrize("schema", [PLAN_SCHEMA, CRITIQUE_SCHEMA, REVISION_SCHEMA])
+    def test_refs_inlined_and_defaults_dropped(self, schema):
+        text = json.dumps(schema)
+        assert "$ref" not in text
+        assert "$defs" not in text
+        assert '"default"' not in text
+
+    def test_optional_fields_nullable(self):
+        exercise = PLAN_SCHEMA["properties"]["exercises"]["items"]
+        assert {"type": "null"} in exercise["properties"]["notes"]["anyOf"]
+
+    def test_critique_status_enum(self):
+        assert CRITIQUE_SCHEMA["properties"]["status"]["enum"] == ["SAFE", "UNSAFE"]
+
+
+# ============= Provider Binding Tests ============= #
+
+
+class TestBindSchema:
+    """Tests for per-provider binding."""
+
+    def test_ollama_format(self):
+        bound = bind_schema(FakeListChatModel(responses=["{}"]), "ollama", "critique", CRITIQUE_SCHEMA)
+        assert bound.kwargs == {"format": CRITIQUE_SCHEMA}
+
+    def test_openai_response_format(self):
+        bound = bind_schema(FakeListChatModel(responses=["{}"]), "openai", "critique", CRITIQUE_SCHEMA)
+        response_format = bound.kwargs["response_format"]
+        assert response_format["type"] == "json_schema"
+        assert response_format["json_schema"] == {"name": "critique", "schema": CRITIQUE_SCHEMA, "strict": True}
+
+    def test_unknown_provider(self):
+        with pytest.raises(ValueError, match="Unknown structured output provider"):
+            bind_schema(FakeListChatModel(responses=["{}"]), "bedrock", "critique", CRITIQUE_SCHEMA)
+
+    def test_no_provider_uses_plain_llm(self):
+        llm = FakeListChatModel(responses=["{}"])
+        assert all(model is llm for model in structured_llms(llm, None).values())
+
+
+# ============= Graph Wiring Tests ============= #
+
+
+class TestGraphStructuredOutput:
+    """create_graph(structured_output=...) constrains every node."""
+
+    def test_each_node_gets_its_schema(
+        self, sample_user_profile, sample_injury_history, sample_workout_plan,
+        unsafe_critique, safe_critique
+    ):
+        plan = {**sample_workout_plan, "exercises": [
+            {"name": "Overhead Press", "sets": 3, "reps": "8"},
+        ] + sample_workout_plan["exercises"]}
+        replacement = {"exercises": [{"name": "Landmine Press", "sets": 3, "reps": "10"}]}
+        llm = RecordingChatModel(
+            responses=[json.dumps(r) for r in (plan, unsafe_critique, replacement, safe_critique)],
+            calls=[],
+        )
+
+        graph = create_graph(llm, structured_output="ollama", targeted_revisions=True)
+        final_state = graph.invoke(initialize_state(sample_user_profile, sample_injury_history, "schema"))
+
+        assert [c["format"] for c in llm.calls] == [PLAN_SCHEMA, CRITIQUE_SCHEMA, REVISION_SCHEMA, CRITIQUE_SCHEMA]
+        assert final_state["critique"]["status"] == "SAFE"
+
+    def test_disabled_by_default(self, sample_user_profile, sample_injury_history, sample_workout_plan, safe_critique):
+        llm = RecordingChatModel(
+            responses=[json.dumps(sample_workout_plan), json.dumps(safe_critique)],
+            calls=[],
+        )
+
+        create_graph(llm).invoke(initialize_state(sample_user_profile, sample_injury_history, "plain"))
+
+        assert all("format" not in c for c in llm.calls)
@@ -0,0 +1,209 @@
+"""
+Tests for per-node latency spans.
+Uses a scripted chat model, an in-memory checkpointer and an in-memory SQLite
+database. No LLM or PostgreSQL required.
+"""
+
+import asyncio
+import json
+import time
+from contextlib import contextmanager
+
+import pytest
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langgraph.checkpoint.memory import MemorySaver
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app import database
+from app.graph import create_graph, initialize_state
+from app.models import Base, NodeSpan
+from app.tracing import (
+    current_trace,
+    instrument_checkpointer,
+    node_span,
+    percentile,
+    save_spans,
+    trace_run,
+)
+
+
+# ============= Span Recording Tests ============= #
+
+
+class TestNodeSpan:
+    """Tests for node_span and trace_run."""
+
+    def test_records_span_with_phases(self):
+        with trace_run(thread_id="t1", endpoint="/plan") as trace:
+            with node_span("draft_plan", revision=1) as span:
+                with span.phase("llm"):
+                    time.sleep(0.01)
+                with span.phase("parse"):
+                    pass
+
+        [recorded] = trace.spans
+        assert recorded.node == "draft_plan"
+        assert recorded.revision == 1
+        assert recorded.llm_ms >= 10
+        assert recorded.parse_ms is not None
+        assert recorded.wall_ms >= recorded.llm_ms
+        assert recorded.success is True
+
+    def test_repeated_phase_accumulates(self):
+        with trace_run() as trace:
+            with node_span("critique_plan") as span:
+                for _ in range(2):
+                    with span.phase("llm"):
+                        time.sleep(0.005)
+        assert trace.spans[0].llm_ms >= 10
+
+    def test_failure_recorded_and_reraised(self):
+        with trace_run() as trace:
+            with pytest.raises(RuntimeError):
+                with node_span("draft_plan"):
+                    raise RuntimeError("boom")
+        assert trace.spans[0].success is False
+
+    def test_no_trace_records_nothing(self):
+        assert current_trace() is None
+        with node_span("draft_plan") as span:
+            pass
+        assert span.wall_ms >= 0
+        assert current_trace() is None
+
+    def test_trace_reset_after_block(self):
+        with trace_run() as trace:
+            assert current_trace() is trace
+        assert current_trace() is None
+
+    def test_summary_totals_per_node(self):
+        with trace_run() as trace:
+            for _ in range(2):
+                with node_span("checkpoint.put"):
+                    pass
+        assert set(trace.summary()) == {"checkpoint.put"}
+
+
+# ============= Graph Integration Tests ============= #
+
+
+class TestGraphSpans:
+    """Spans recorded by a full graph run."""
+
+    def _graph(self, responses, checkpointer=None):
+        llm = FakeListChatModel(responses=[json.dumps(r) for r in responses])
+        return create_graph(llm, checkpointer)
+
+    def test_revisions_produce_one_span_per_node_run(
+        self, sample_user_profile, sample_injury_history, sample_workout_plan,
+        safe_critique, unsafe_critique
+    ):
+        graph = self._graph([sample_workout_plan, unsafe_critique, sample_workout_plan, safe_critique])
+        state = initialize_state(sample_user_profile, sample_injury_history, "spans_001")
+
+        with trace_run(thread_id="spans_001") as trace:
+            asyncio.run(graph.ainvoke(state))
+
+        nodes = [(s.node, s.revision) for s in trace.spans]
+        assert nodes.count(("draft_plan", 1)) == 1
+        assert nodes.count(("draft_plan", 2)) == 1
+        assert nodes.count(("critique_plan", 1)) == 1
+        assert nodes.count(("critique_plan", 2)) == 1
+        for span in trace.spans:
+            assert span.llm_ms is not None and span.parse_ms is not None
+
+    def test_checkpoint_spans(self, sample_user_profile, sample_injury_history, sample_workout_plan, safe_critique):
+        checkpointer = MemorySaver()
+        graph = self._graph([sample_workout_plan, safe_critique], checkpointer)
+        state = initialize_state(sample_user_profile, sample_injury_history, "spans_002")
+
+        with trace_run() as trace:
+            graph.invoke(state, config={"configurable": {"thread_id": "spans_002"}})
+
+        nodes = {s.node for s in trace.spans}
+        assert "checkpoint.put" in nodes
+        assert {"draft_plan", "critique_plan"} <= nodes
+
+    def test_instrument_is_idempotent(self):
+        checkpointer = MemorySaver()
+        instrument_checkpointer(checkpointer)
+        put = checkpointer.put
+        assert instrument_checkpointer(checkpointer).put is put
+        assert instrument_checkpointer(None) is None
+
+
+# ============= Persistence Tests ============= #
+
+
+class TestSaveSpans:
+    """Tests for writing spans to node_spans."""
+
+    @pytest.fixture
+    def session_factory(self, monkeypatch):
+        engine = create_engine(
+            "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+        )
+        Base.metadata.create_all(bind=engine)
+        factory = sessionmaker(bind=engine, autoflush=False)
+
+        @contextmanager
+        def db_context():
+            session = factory()
+            try:
+                yield session
+                session.commit()
+            finally:
+                session.close()
+
+        monkeypatch.setattr(database, "get_db_context", db_context)
+        return factory
+
+    def test_rows_linked_by_request_id(self, session_factory):
+        with trace_run(request_id="req-1", thread_id="t1", endpoint="/plan") as trace:
+            with node_span("draft_plan", revision=1) as span:
+                with span.phase("llm"):
+                    pass
+            with node_span("checkpoint.put"):
+                pass
+        save_spans(trace)
+
+        rows = session_factory().query(NodeSpan).order_by(NodeSpan.id).all()
+        assert [(r.request_id, r.endpoint, r.node) for r in rows] == [
+            ("req-1", "/plan", "draft_plan"),
+            ("req-1", "/plan", "checkpoint.put"),
+        ]
+        assert rows[0].llm_ms is not None
+        assert rows[1].llm_ms is None
+
+    def test_database_error_swallowed(self, monkeypatch):
+        @contextmanager
+        def broken():
+            raise RuntimeError("database down")
+            yield
+
+        monkeypatch.setattr(database, "get_db_context", broken)
+        with trace_run() as trace:
+            with node_span("draft_plan"):
+                pass
+        save_spans(trace)  # Must not raise
+
+
+# ============= Percentile Tests ============= #
+
+
+class TestPercentile:
+    """Tests for nearest-rank percentile."""
+
+    def test_empty(self):
+        assert percentile([], 95) is None
+
+    def test_nearest_rank(self):
+        values = list(range(1, 101))
+        assert percentile(values, 95) == 95
+        assert percentile(values, 50) == 50
+        assert percentile(values, 100) == 100
+
+    def test_single_value(self):
+        assert percentile([42.0], 95) == 42.0
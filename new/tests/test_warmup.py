@@ -0,0 +1,201 @@
+"""
+Tests for the background LLM warm-up and the readiness endpoint.
+Uses httpx mock transports for Ollama preloads and the scripted "fake"
+provider for the app. No LLM or PostgreSQL required.
+"""
+
+import asyncio
+import json
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app import providers, service as service_module, warmup as warmup_module
+from app.factory import create_app
+from app.models import Base
+from app.providers import HTTPClientPool, preload_ollama
+from app.verdicts import InMemoryVerdictStore
+from app.warmup import Warmup
+
+
+def _run_warmup(warmup: Warmup, warm_up, on_attempt=None):
+    async def run():
+        task = warmup.start(warm_up, on_attempt)
+        if task:
+            await task
+
+    asyncio.run(run())
+
+
+# ============= Warm-up Tests ============= #
+
+
+class TestWarmup:
+    """Tests for retrying the warm-up until the model is loaded."""
+
+    def test_retries_until_success(self):
+        outcomes = iter([RuntimeError("connection refused"), RuntimeError("still loading"), None])
+        attempts = []
+
+        async def warm_up():
+            outcome = next(outcomes)
+            if outcome:
+                raise outcome
+
+        warmup = Warmup(retry_seconds=0, max_retry_seconds=0)
+        _run_warmup(warmup, warm_up, lambda success, latency_ms, error: attempts.append((success, error)))
+
+        assert warmup.ready
+        assert warmup.stats()["attempts"] == 3
+        assert warmup.stats()["last_error"] is None
+        assert [success for success, _ in attempts] == [False, False, True]
+        assert "still loading" in attempts[1][1]
+
+    def test_timeout_counts_as_failure(self):
+        calls = []
+
+        async def warm_up():
+            calls.append(1)
+            if len(calls) == 1:
+                await asyncio.sleep(10)
+
+        warmup = Warmup(retry_seconds=0, timeout_seconds=0.01)
+        _run_warmup(warmup, warm_up)
+        assert warmup.ready
+        assert warmup.attempts == 2
+
+    def test_backoff_is_capped(self, monkeypatch):
+        delays = []
+        real_sleep = asyncio.sleep
+
+        async def fake_sleep(seconds):
+            delays.append(seconds)
+            await real_sleep(0)
+
+        monkeypatch.setattr(warmup_module.asyncio, "sleep", fake_sleep)
+        outcomes = iter([False] * 5 + [True])
+
+        async def warm_up():
+            if not next(outcomes):
+                raise RuntimeError("down")
+
+        _run_warmup(Warmup(retry_seconds=5, max_retry_seconds=15), warm_up)
+        assert delays == [5, 10, 15, 15, 15]
+
+    def test_disabled(self, monkeypatch):
+        monkeypatch.setattr(warmup_module, "WARMUP_ENABLED", False)
+        warmup = Warmup()
+        _run_warmup(warmup, lambda: None)
+        assert warmup.state == "disabled"
+        assert warmup.ready
+
+
+# ============= Ollama Preload Tests ============= #
+
+
+class TestOllamaPreload:
+    """The Ollama warm-up loads the model without generating."""
+
+    def _pool(self, monkeypatch, handler):
+        transport = httpx.MockTransport(handler)
+        pool = HTTPClientPool(transport=transport, async_transport=transport)
+        monkeypatch.setattr(providers, "_http_pool", pool)
+        return pool
+
+    def test_loads_model_on_every_backend(self, monkeypatch):
+        seen = []
+
+        def handler(request):
+            seen.append((request.url.host, json.loads(request.content)))
+            return httpx.Response(200, json={"model": "mistral", "created_at": "2026-10-12T10:00:00Z", "response": "",
+                                             "done": True, "done_reason": "load"})
+
+        self._pool(monkeypatch, handler)
+        llm = SimpleNamespace(base_url="http://gpu-a:11434,http://gpu-b:11434", model="mistral")
+        asyncio.run(preload_ollama(llm))
+
+        assert [host for host, _ in seen] == ["gpu-a", "gpu-b"]
+        assert all(body == {"model": "mistral", "keep_alive": providers.OLLAMA_KEEP_ALIVE} for _, body in seen)
+
+    def test_one_loaded_backend_is_enough(self, monkeypatch):
+        self._pool(monkeypatch, lambda r: httpx.Response(200 if r.url.host == "gpu-b" else 500))
+        llm = SimpleNamespace(base_url="http://gpu-a:11434,http://gpu-b:11434", model="mistral")
+        asyncio.run(preload_ollama(llm))
+
+    def test_fails_when_no_backend_loads(self, monkeypatch):
+        self._pool(monkeypatch, lambda r: httpx.Response(404, text="model not found"))
+        llm = SimpleNamespace(base_url="http://gpu-a:11434", model="missing")
+        with pytest.raises(RuntimeError, match="could not be loaded"):
+            asyncio.run(preload_ollama(llm))
+
+
+# ============= Readiness Tests ============= #
+
+
+@pytest.fixture
+def make_client(monkeypatch):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    monkeypatch.setattr(service_module, "SessionLocal", sessionmaker(bind=engine))
+    monkeypatch.setattr(service_module, "setup_schema", lambda postgres_url=None: None)
+    monkeypatch.delenv("POSTGRES_URL", raising=False)
+
+    def make(warm_up=None):
+        app = create_app("fake")
+        service = app.state.service
+        service.verdict_store = InMemoryVerdictStore()
+        if warm_up:
+            service.provider = providers.ProviderSpec(**{**service.provider.__dict__, "warm_up": warm_up})
+        return TestClient(app)
+
+    return make
+
+
+class TestReadiness:
+    """Liveness and readiness are separate; startup never waits on the LLM."""
+
+    def test_liveness(self, make_client):
+        with make_client() as client:
+            assert client.get("/health/live").json() == {"status": "alive"}
+
+    def test_ready_while_model_still_loading(self, make_client):
+        async def never_ready(llm):
+            await asyncio.sleep(3600)
+
+        with make_client(never_ready) as client:
+            response = client.get("/health/ready")
+            assert response.status_code == 200
+            assert response.json()["warmup"]["state"] == "warming"
+            assert response.json()["graph"] is True
+
+    def test_can_require_warm_model(self, make_client, monkeypatch):
+        monkeypatch.setattr(service_module, "WARMUP_REQUIRED_FOR_READY", True)
+
+        async def never_ready(llm):
+            await asyncio.sleep(3600)
+
+        with make_client(never_ready) as client:
+            response = client.get("/health/ready")
+            assert response.status_code == 503
+            assert response.json()["ready"] is False
+
+    def test_warm_model_reported(self, make_client, monkeypatch):
+        monkeypatch.setattr(service_module, "WARMUP_REQUIRED_FOR_READY", True)
+        loaded = asyncio.Event()
+
+        async def warm_up(llm):
+            loaded.set()
+
+        with make_client(warm_up) as client:
+            for _ in range(50):
+                body = client.get("/health/ready").json()
+                if body["ready"]:
+                    break
+                client.portal.call(asyncio.sleep, 0.01)
+            assert body["warmup"]["state"] == "ready"
+            assert body["warmup"]["attempts"] == 1